@@ -0,0 +1,145 @@
+"""
+Admission control for AgriVision Pro
+Per-client token buckets and queue-aware load shedding in front of inference
+"""
+
+import math
+import time
+from collections import OrderedDict
+
+from fastapi.responses import JSONResponse
+
+
+class RateLimiter:
+    """
+    Token bucket per client: each holds up to burst tokens and refills at
+    rate_per_hour. A request takes one token or is refused with the time
+    until the next one. At most max_clients buckets are kept; the least
+    recently seen client is forgotten first, which only ever hands it a
+    full bucket back.
+    """
+
+    def __init__(self, rate_per_hour, burst, max_clients=10000):
+        if rate_per_hour <= 0 or burst < 1:
+            raise ValueError("rate_per_hour must be positive and burst at least 1")
+        self.rate = rate_per_hour / 3600.0
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+
+    def acquire(self, client, now=None):
+        """Take a token for client; returns 0 if allowed, else seconds until a token is free"""
+        now = time.monotonic() if now is None else now
+        tokens, updated = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+
+        self._buckets[client] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class LoadShedder:
+    """
+    Global admission check against the inference backlog. load() returns
+    (queued images, estimated seconds until a new image is served); new
+    requests are shed while either is over its limit.
+
+    Requests admitted but still uploading or decoding have not reached
+    the batcher, so load() alone lets a burst through before any of it
+    is queued. in_flight counts admitted requests until their responses
+    complete, and each of them is taken to hold at least one image.
+    """
+
+    def __init__(self, load, max_wait_s, max_queued):
+        self.load = load
+        self.max_wait_s = max_wait_s
+        self.max_queued = max_queued
+        self.in_flight = 0
+
+    def backlog(self):
+        """(queued images, estimated seconds until a new image is served), admitted requests included"""
+        queued, wait = self.load()
+        images = max(queued, self.in_flight)
+        # load()'s wait grows with its queue; stretch it over the images not queued yet
+        return images, wait * (images + 1) / (queued + 1)
+
+    def check(self):
+        """None to admit, else the estimated seconds until the backlog clears"""
+        queued, wait = self.backlog()
+        if wait > self.max_wait_s or queued > self.max_queued:
+            return max(wait, 1.0)
+        return None
+
+
+class AdmissionControl:
+    """
+    ASGI middleware guarding the inference endpoints in paths. Before a
+    request's body is read it is refused with 429 if its client is over
+    its rate limit, or 503 if the inference backlog is too long, both
+    with Retry-After; everything else passes straight through.
+    on_shed(path, reason), if given, counts each refusal.
+    """
+
+    def __init__(self, app, paths, limiter=None, shedder=None, on_shed=None, trust_forwarded_for=False):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.limiter = limiter
+        self.shedder = shedder
+        self.on_shed = on_shed
+        self.trust_forwarded_for = trust_forwarded_for
+
+    def client_id(self, scope):
+        """The client's address, or the first X-Forwarded-For hop behind a trusted proxy"""
+        if self.trust_forwarded_for:
+            forwarded = dict(scope["headers"]).get(b"x-forwarded-for")
+            if forwarded:
+                return forwarded.split(b",")[0].strip().decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        # Shedding first, so a request refused for load does not spend its client's rate-limit token
+        refusal = None
+        if self.shedder is not None:
+            wait = self.shedder.check()
+            if wait is not None:
+                refusal = (503, "overloaded", "Server is busy, try again shortly", wait)
+        if refusal is None and self.limiter is not None:
+            wait = self.limiter.acquire(self.client_id(scope))
+            if wait > 0:
+                refusal = (429, "rate_limited", "Rate limit exceeded, try again later", wait)
+
+        if refusal is None:
+            if self.shedder is None:
+                await self.app(scope, receive, send)
+                return
+            self.shedder.in_flight += 1
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                self.shedder.in_flight -= 1
+            return
+
+        status, reason, error, wait = refusal
+        if self.on_shed is not None:
+            self.on_shed(scope["path"], reason)
+        response = JSONResponse(
+            {"success": False, "error": error},
+            status_code=status,
+            headers={"Retry-After": str(math.ceil(wait))}
+        )
+        await response(scope, receive, send)
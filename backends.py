@@ -0,0 +1,53 @@
+"""
+Interpreter backends for AgriVision Pro
+Picks the lightest installed TFLite runtime so serving never needs full TensorFlow
+"""
+
+import importlib
+
+# Backend name -> (module, attribute path) of its Interpreter class, lightest first
+BACKENDS = {
+    "tflite_runtime": ("tflite_runtime.interpreter", "Interpreter"),
+    "litert": ("ai_edge_litert.interpreter", "Interpreter"),
+    "tensorflow": ("tensorflow", "lite.Interpreter"),
+}
+
+_loaded = {}
+
+
+def load_backend(name="auto"):
+    """
+    Return (backend name, Interpreter class).
+
+    "auto" tries the standalone runtimes (tflite-runtime, then
+    ai-edge-litert) before falling back to full TensorFlow, which is only
+    imported if nothing lighter is installed. Any other name must be a key
+    of BACKENDS and is imported as-is.
+    """
+    names = list(BACKENDS) if name == "auto" else [name]
+    if any(n not in BACKENDS for n in names):
+        raise ValueError(f"Unknown interpreter backend '{name}', expected auto or one of {list(BACKENDS)}")
+
+    errors = []
+    for candidate in names:
+        if candidate in _loaded:
+            return candidate, _loaded[candidate]
+        module_name, attribute = BACKENDS[candidate]
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError as e:
+            errors.append(f"{candidate}: {e}")
+            continue
+        for part in attribute.split('.'):
+            module = getattr(module, part)
+        _loaded[candidate] = module
+        return candidate, module
+
+    raise ImportError("No TFLite interpreter backend available (" + "; ".join(errors) + "). "
+                      "Install tflite-runtime, ai-edge-litert or tensorflow.")
+
+
+def create_interpreter(model_path, num_threads=1, backend="auto"):
+    """Create an interpreter for model_path on the chosen backend"""
+    _, interpreter_class = load_backend(backend)
+    return interpreter_class(model_path=model_path, num_threads=num_threads)
@@ -0,0 +1,233 @@
+"""
+Dynamic micro-batching for AgriVision Pro
+Groups concurrent /predict images into one interpreter invoke
+"""
+
+import asyncio
+import time
+
+import numpy as np
+
+from interpreter_pool import invoke_batch
+from preprocessing import input_writer
+
+
+def batch_buckets(max_batch_size, sizes=None):
+    """
+    Batch sizes the pool keeps an allocated interpreter for: the given
+    sizes below max_batch_size (by default every power of two), plus
+    max_batch_size itself. Each batch is padded up to the next bucket, so
+    fewer buckets trade some padded rows for memory.
+    """
+    if sizes is None:
+        sizes = [2 ** i for i in range(max_batch_size.bit_length())]
+    return sorted({size for size in sizes if 1 <= size < max_batch_size} | {max_batch_size})
+
+
+class BatchStats:
+    """Running counters describing how well batches are being filled"""
+
+    def __init__(self, max_batch_size):
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self.images = 0
+        self.queue_delay_total = 0.0
+        self.queue_delay_max = 0.0
+
+    def record(self, batch_size, queue_delays):
+        self.batches += 1
+        self.images += batch_size
+        self.queue_delay_total += sum(queue_delays)
+        self.queue_delay_max = max(self.queue_delay_max, max(queue_delays))
+
+    def as_dict(self):
+        batches = max(self.batches, 1)
+        images = max(self.images, 1)
+        return {
+            "batches": self.batches,
+            "images": self.images,
+            "mean_batch_size": round(self.images / batches, 3),
+            "batch_fill_rate": round(self.images / (batches * self.max_batch_size), 3),
+            "mean_queue_delay_ms": round(self.queue_delay_total / images * 1000, 3),
+            "max_queue_delay_ms": round(self.queue_delay_max * 1000, 3)
+        }
+
+
+class MicroBatcher:
+    """
+    Async queue in front of an InterpreterPool created with batch_sizes,
+    e.g. batch_buckets(max_batch_size); those sizes are its buckets.
+
+    Requests submit one decoded uint8 image each. A collector task waits
+    for the first pending image, keeps gathering until the batch is full
+    or max_wait_ms has passed, then runs the whole batch in a single
+    invoke and resolves each request's future with its row of scores, or
+    with what postprocess(scores) returns for it when that is given.
+    At most one batch per pooled interpreter is in flight; while they are
+    all busy, new images keep piling into the next batch.
+
+    on_stage(stage, seconds), if given, is called with each image's
+    "queue_wait" and each batch's "normalize", "invoke" and "postprocess"
+    times; the last three are called from the interpreter's worker thread.
+    """
+
+    def __init__(self, pool, max_batch_size=8, max_wait_ms=10, on_stage=None, postprocess=None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if pool.batch_sizes is None or max(pool.batch_sizes) != max_batch_size:
+            raise ValueError(f"Interpreter pool needs batch_sizes up to max_batch_size {max_batch_size}")
+        buckets = sorted(pool.batch_sizes)
+
+        self.pool = pool
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.buckets = buckets
+        self.stats = BatchStats(max_batch_size)
+        self.on_stage = on_stage
+        # Runs on the whole batch's scores at once, returning one result per image
+        self.postprocess = postprocess
+        # Float models get normalized pixels, full-integer models raw or requantized uint8
+        self.write_input = input_writer(pool.input_details[0])
+        # Images submitted and not yet answered, and a moving average of invoke time per image
+        self.outstanding = 0
+        self.seconds_per_image = None
+        self._loop = None
+        self._queue = None
+        self._slots = None
+        self._collector = None
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Queues and semaphores are bound to the loop they are first used on
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.pool.size)
+            self._collector = None
+        if self._collector is None or self._collector.done():
+            self._collector = loop.create_task(self._collect())
+
+    async def submit(self, image_array):
+        """Queue one (H, W, C) uint8 image and wait for its prediction row"""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        self.outstanding += 1
+        try:
+            await self._queue.put((image_array, future, time.perf_counter()))
+            return await future
+        finally:
+            self.outstanding -= 1
+
+    def queue_depth(self):
+        """Number of images waiting to be batched"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def estimated_wait(self):
+        """
+        Seconds until an image submitted now would be answered: every
+        outstanding image at the recent invoke time per image, spread over
+        the pooled interpreters. 0 until a batch has been timed.
+        """
+        if self.seconds_per_image is None:
+            return 0.0
+        return (self.outstanding + 1) * self.seconds_per_image / self.pool.size
+
+    async def _collect(self):
+        while True:
+            pending = [await self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+
+            while len(pending) < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._slots.acquire()
+
+            # Images that arrived while waiting for a free interpreter join this batch
+            while len(pending) < self.max_batch_size and not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+
+            asyncio.get_running_loop().create_task(self._dispatch(pending))
+
+    async def _dispatch(self, pending):
+        try:
+            started = time.perf_counter()
+            queue_delays = [started - queued for _, _, queued in pending]
+            self.stats.record(len(pending), queue_delays)
+            if self.on_stage is not None:
+                for delay in queue_delays:
+                    self.on_stage("queue_wait", delay)
+
+            images = [image for image, _, _ in pending]
+            scores = await self.pool.run(self._run_batch, images)
+
+            for row, (_, future, _) in zip(scores, pending):
+                if not future.done():
+                    future.set_result(row)
+        except Exception as e:
+            for _, future, _ in pending:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
+
+    def warm_up(self, image_shape):
+        """
+        Run a synthetic batch of every bucket size through its interpreter
+        in every pool slot, so kernel preparation happens before the first
+        request rather than during it. Each bucket has its own interpreter,
+        so all of them stay warm afterwards. Blocking; call it before the
+        batcher starts serving.
+        """
+        for size in self.buckets:
+            images = [np.zeros(image_shape, dtype=np.uint8)] * size
+            self.pool.run_on_each(self._run_batch, images, False)
+
+    def _run_batch(self, interpreters, images, record=True):
+        """
+        Write uint8 images straight into the input tensor of the slot's
+        interpreter for the nearest bucket size, normalized or quantized to
+        its dtype and padded up to that size, and invoke once, then
+        postprocess the batch's scores. Runs on a pool worker thread.
+        """
+        size = next(b for b in self.buckets if b >= len(images))
+        interpreter = interpreters[size]
+        normalized = []
+
+        def fill(inputs):
+            started = time.perf_counter()
+            for i, image in enumerate(images):
+                self.write_input(image, inputs[i])
+            # Padding rows keep whatever an earlier batch left there; their scores are dropped
+            normalized.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        scores = invoke_batch(interpreter, size, fill, rows=len(images))
+        invoked = time.perf_counter()
+        if record:
+            per_image = (invoked - started) / len(images)
+            previous = self.seconds_per_image
+            self.seconds_per_image = per_image if previous is None else 0.8 * previous + 0.2 * per_image
+        if self.postprocess is not None:
+            scores = self.postprocess(scores)
+        if record and self.on_stage is not None:
+            self.on_stage("normalize", normalized[0])
+            self.on_stage("invoke", invoked - started - normalized[0])
+            if self.postprocess is not None:
+                self.on_stage("postprocess", time.perf_counter() - invoked)
+        return scores
+
+    async def stop(self):
+        """Cancel the collector task"""
+        if self._collector is not None:
+            self._collector.cancel()
+            try:
+                await self._collector
+            except asyncio.CancelledError:
+                pass
+            self._collector = None
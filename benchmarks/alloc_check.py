@@ -0,0 +1,102 @@
+"""
+AgriVision Pro - Per-request Allocation Check
+Measures the Python/NumPy bytes allocated by the inference step for one
+request and fails if they exceed a threshold. The previous path
+(divide, expand_dims, set_tensor, get_tensor) made several float32
+copies of the 224x224x3 input per request, over 1 MB at peak.
+
+Usage:
+    python benchmarks/alloc_check.py [--model models/agrivision_edge_model.tflite]
+                                     [--requests 50] [--max-bytes 65536]
+"""
+
+import argparse
+import os
+import sys
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import config
+from batching import MicroBatcher, batch_buckets
+from interpreter_pool import InterpreterPool
+
+
+def legacy_inference(interpreter, pixels):
+    """The copy-heavy inference step predict() used to run"""
+    image_array = np.array(pixels, dtype=np.float32)
+    image_array = image_array / 255.0
+    image_array = np.expand_dims(image_array, axis=0)
+    input_details = interpreter.get_input_details()
+    output_details = interpreter.get_output_details()
+    interpreter.set_tensor(input_details[0]['index'], image_array)
+    interpreter.invoke()
+    return interpreter.get_tensor(output_details[0]['index'])[0]
+
+
+def retained_per_request(fn, requests):
+    """Average bytes still held after each call of fn(), to catch leaks"""
+    fn()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(requests):
+        fn()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    growth = sum(stat.size_diff for stat in after.compare_to(before, 'filename') if stat.size_diff > 0)
+    return growth / requests
+
+
+def peak_per_request(fn):
+    """Peak traced memory during a single call of fn()"""
+    fn()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check bytes allocated per inference request")
+    parser.add_argument("--model", default=config.MODEL_PATH, help="TFLite model to load")
+    parser.add_argument("--requests", type=int, default=50, help="Requests to average over")
+    parser.add_argument("--max-bytes", type=int, default=64 * 1024,
+                        help="Largest acceptable peak allocation per request")
+    args = parser.parse_args()
+
+    pool = InterpreterPool(args.model, size=1, batch_sizes=batch_buckets(1))
+    batcher = MicroBatcher(pool, max_batch_size=1)
+    interpreters = pool._idle.get()
+    interpreter = interpreters[1]
+
+    height, width = pool.input_details[0]['shape'][1:3]
+    pixels = np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+    zero_copy = lambda: batcher._run_batch(interpreters, [pixels])
+    legacy = lambda: legacy_inference(interpreter, pixels)
+
+    legacy_peak = peak_per_request(legacy)
+    zero_copy_peak = peak_per_request(zero_copy)
+    retained = retained_per_request(zero_copy, args.requests)
+
+    print("=" * 60)
+    print("AgriVision Pro - Per-request Allocation Check")
+    print("=" * 60)
+    print(f"Legacy path peak:     {legacy_peak:>12,} bytes")
+    print(f"Zero-copy path peak:  {zero_copy_peak:>12,} bytes")
+    print(f"Retained per request: {retained:>12,.0f} bytes")
+    print(f"Threshold:            {args.max_bytes:>12,} bytes")
+    print("=" * 60)
+
+    if zero_copy_peak > args.max_bytes:
+        print("✗ Inference step allocates more than the threshold")
+        sys.exit(1)
+    print("✓ Inference step stays below the threshold")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+AgriVision Pro - Input Pipeline Benchmark
+Per-epoch wall time of the training input pipelines without the model:
+the notebook's ImageDataGenerator against train.py's tf.data pipeline
+(parallel decode, cache, batched augmentation, prefetch). The first
+tf.data epoch decodes and fills the cache; later epochs read the cache.
+
+Usage:
+    python benchmarks/input_pipeline_bench.py [--data-dir "dataset/plantvillage dataset/color"]
+        [--epochs 3] [--batch-size 32] [--cache-dir .cache/bench] [--json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dataset import DATA_DIR, served_class_names, split_files
+from train import BATCH_SIZE, IMG_SIZE, legacy_generators, make_dataset
+
+
+def time_epochs(epochs, run_epoch):
+    """Wall time of each of epochs calls to run_epoch, and the images it yielded"""
+    times = []
+    images = 0
+    for _ in range(epochs):
+        started = time.perf_counter()
+        images = run_epoch()
+        times.append(round(time.perf_counter() - started, 3))
+    return times, images
+
+
+def legacy_epoch(generator):
+    def run():
+        images = 0
+        for i in range(len(generator)):
+            images += len(generator[i][0])
+        generator.on_epoch_end()
+        return images
+    return run
+
+
+def tfdata_epoch(dataset):
+    def run():
+        return sum(len(images) for images, _ in dataset)
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the training input pipelines per epoch")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="PlantVillage class folders")
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--cache-dir", default=".cache/bench",
+                        help="Scratch on-disk cache for the tf.data run (cleared first)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    shutil.rmtree(args.cache_dir, ignore_errors=True)
+    os.makedirs(args.cache_dir)
+    cache_path = os.path.join(args.cache_dir, f"training_{IMG_SIZE[0]}x{IMG_SIZE[1]}")
+
+    num_classes = len(served_class_names())
+    legacy, _ = legacy_generators(args.data_dir, num_classes, args.batch_size)
+    dataset = make_dataset(split_files(args.data_dir, 'training'), num_classes, True,
+                           args.batch_size, cache_path)
+
+    results = {}
+    for name, run_epoch in [("legacy", legacy_epoch(legacy)), ("tfdata", tfdata_epoch(dataset))]:
+        times, images = time_epochs(args.epochs, run_epoch)
+        results[name] = {
+            "epoch_seconds": times,
+            "images_per_epoch": images,
+            "images_per_sec_first": round(images / times[0], 1),
+            "images_per_sec_cached": round(images / min(times[1:] or times), 1)
+        }
+    results["speedup_first_epoch"] = round(
+        results["legacy"]["epoch_seconds"][0] / results["tfdata"]["epoch_seconds"][0], 2
+    )
+    results["speedup_cached_epochs"] = round(
+        min(results["legacy"]["epoch_seconds"]) / min(results["tfdata"]["epoch_seconds"][1:] or [float('inf')]), 2
+    )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("=" * 60)
+    print("AgriVision Pro - Input Pipeline Benchmark")
+    print("=" * 60)
+    print(f"Images per epoch: {results['tfdata']['images_per_epoch']}")
+    print(f"{'Epoch':10}{'legacy (s)':>14}{'tf.data (s)':>14}")
+    for epoch, (old, new) in enumerate(zip(results["legacy"]["epoch_seconds"],
+                                           results["tfdata"]["epoch_seconds"]), 1):
+        print(f"{epoch:<10}{old:>14.3f}{new:>14.3f}")
+    print(f"First epoch speedup:  {results['speedup_first_epoch']}x")
+    print(f"Cached epoch speedup: {results['speedup_cached_epochs']}x")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+"""
+AgriVision Pro - Load Test
+Starts the server in a child process and drives /predict and
+/predict/batch at fixed concurrency levels with a seeded corpus of
+photos at realistic sizes, then reports throughput and p50/p95/p99
+latency per endpoint and concurrency. Throughput and latency count 200
+responses only, so a fast 429 or 503 does not look like a fast answer;
+the share of other responses is reported as the error rate. Load
+shedding and rate limiting are off unless --shed is given.
+
+When MODEL_PATH does not exist the server gets a stand-in: an untrained
+MobileNetV2 with the notebook's input shape and class count, converted
+like export_tflite.py does, so invoke cost matches the real model. It is
+cached in the temp directory between runs.
+
+Save a run with --output and pass it as --baseline to a later one to fail
+(exit 1) when p95 latency or throughput regresses by more than --tolerance,
+or the error rate rises by more than --error-tolerance.
+Client and server share the machine's CPUs; compare runs from the same host.
+
+Usage:
+    python benchmarks/load_test.py [--concurrency 1 8 32] [--requests 200] [--json]
+    python benchmarks/load_test.py --output before.json
+    python benchmarks/load_test.py --baseline before.json --set MAX_BATCH_SIZE=16
+"""
+
+import argparse
+import ast
+import http.client
+import io
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+import numpy as np
+from PIL import Image
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import config
+from cache import file_digest
+
+# Runs in the child process: apply the overrides, then serve main.app
+CHILD = r"""
+import sys
+sys.path.insert(0, {root!r})
+import config
+for key, value in {overrides!r}.items():
+    setattr(config, key, value)
+import uvicorn
+import main
+uvicorn.run(main.app, host="127.0.0.1", port={port!r}, log_level="warning")
+"""
+
+# Phone and drone photos are the common case; 256x256 is a PlantVillage-style crop
+PHOTO_SIZES = [(256, 256), (1024, 768), (2016, 1512), (4032, 3024)]
+STAND_IN_SIZE = (224, 224)
+
+
+def stand_in_model(size=STAND_IN_SIZE):
+    """Path of an untrained MobileNetV2 .tflite with the served input shape, built on first use"""
+    width, height = size
+    path = os.path.join(
+        tempfile.gettempdir(), f"agrivision_stand_in_{width}x{height}_{len(config.DISEASE_CLASSES)}.tflite"
+    )
+    if os.path.exists(path):
+        return path
+
+    import tensorflow as tf
+    from export_tflite import convert
+
+    print("Building stand-in model...", file=sys.stderr)
+    model = tf.keras.applications.MobileNetV2(
+        input_shape=(height, width, 3), weights=None, classes=len(config.DISEASE_CLASSES)
+    )
+    with open(path + ".tmp", 'wb') as f:
+        f.write(convert(model))
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def photo(size, seed):
+    """A JPEG with a photo's mix of smooth colour and fine texture, so it encodes to a realistic size"""
+    width, height = size
+    rng = np.random.default_rng(seed)
+    coarse = rng.integers(0, 256, (height // 64 + 2, width // 64 + 2, 3), dtype=np.uint8)
+    image = Image.fromarray(coarse).resize((width, height), Image.BICUBIC)
+    image = Image.blend(image, Image.effect_noise((width, height), 48).convert("RGB"), 0.15)
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def corpus(sizes, variants):
+    """(filename, bytes) for variants distinct photos at each size, the same on every run"""
+    return [
+        (f"{width}x{height}_{i}.jpg", photo((width, height), seed=i * 7919 + width))
+        for width, height in sizes
+        for i in range(variants)
+    ]
+
+
+def multipart(field, files):
+    """(content type, body) of a multipart/form-data upload of files under field"""
+    boundary = uuid.uuid4().hex
+    body = io.BytesIO()
+    for filename, contents in files:
+        body.write(f"--{boundary}\r\n".encode())
+        body.write(f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'.encode())
+        body.write(b"Content-Type: image/jpeg\r\n\r\n")
+        body.write(contents)
+        body.write(b"\r\n")
+    body.write(f"--{boundary}--\r\n".encode())
+    return f"multipart/form-data; boundary={boundary}", body.getvalue()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(overrides, port, timeout=180):
+    """Start the app in a child process and wait until /health/ready answers 200"""
+    code = CHILD.format(root=ROOT, overrides=overrides, port=port)
+    # The server's own output goes to stderr, keeping stdout for the report
+    server = subprocess.Popen([sys.executable, "-c", code], cwd=ROOT, stdout=sys.stderr)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode} before becoming ready")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            connection.request("GET", "/health/ready")
+            if connection.getresponse().status == 200:
+                return server
+        except OSError:
+            pass
+        time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError(f"Server not ready after {timeout} s")
+
+
+def drive(port, requests, concurrency, total):
+    """
+    Send total requests from concurrency closed-loop clients, each with its
+    own keep-alive connection. requests is a list of (path, content type,
+    body) taken round-robin. Returns ([(latency, status)], elapsed seconds).
+    """
+    responses = []
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def client():
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            path, content_type, body = requests[i % len(requests)]
+            started = time.perf_counter()
+            try:
+                connection.request("POST", path, body=body, headers={"Content-Type": content_type})
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException) as e:
+                status = type(e).__name__
+                connection.close()
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+            latency = time.perf_counter() - started
+            with lock:
+                responses.append((latency, status))
+        connection.close()
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return responses, time.perf_counter() - started
+
+
+def summarize(responses, elapsed, images_per_request):
+    """Throughput and latency of the 200 responses, and the share of everything else"""
+    statuses = {}
+    for _, status in responses:
+        statuses[status] = statuses.get(status, 0) + 1
+    ms = np.asarray([latency for latency, status in responses if status == 200]) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99]) if len(ms) else (np.nan,) * 3
+
+    def rounded(value):
+        return round(float(value), 2) if len(ms) else None
+
+    return {
+        "requests": len(responses),
+        "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        "error_rate": round(1 - len(ms) / len(responses), 4),
+        "requests_per_s": round(len(ms) / elapsed, 2),
+        "images_per_s": round(len(ms) * images_per_request / elapsed, 2),
+        "p50_ms": rounded(p50),
+        "p95_ms": rounded(p95),
+        "p99_ms": rounded(p99),
+        "mean_ms": rounded(ms.mean() if len(ms) else 0),
+        "max_ms": rounded(ms.max() if len(ms) else 0)
+    }
+
+
+def regressions(report, baseline, tolerance, error_tolerance):
+    """
+    Descriptions of every endpoint and concurrency slower or lower-throughput
+    than baseline by more than tolerance, or whose error rate is higher by
+    more than error_tolerance
+    """
+    before = {(run["endpoint"], run["concurrency"]): run for run in baseline["runs"]}
+    found = []
+    for run in report["runs"]:
+        old = before.get((run["endpoint"], run["concurrency"]))
+        if old is None:
+            continue
+        name = f"{run['endpoint']} x{run['concurrency']}"
+        if run["error_rate"] > old.get("error_rate", 0) + error_tolerance:
+            found.append(f"{name}: error rate {old.get('error_rate', 0):.2%} -> {run['error_rate']:.2%}")
+        if run["p95_ms"] is None or old.get("p95_ms") is None:
+            continue
+        if run["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+            found.append(f"{name}: p95 {old['p95_ms']} -> {run['p95_ms']} ms")
+        if run["images_per_s"] < old["images_per_s"] * (1 - tolerance):
+            found.append(f"{name}: throughput {old['images_per_s']} -> {run['images_per_s']} images/s")
+    return found
+
+
+def parse_override(text):
+    """KEY=VALUE, with VALUE as a Python literal"""
+    key, _, value = text.partition("=")
+    if not hasattr(config, key):
+        raise argparse.ArgumentTypeError(f"config has no {key}")
+    try:
+        return key, ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return key, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test /predict and /predict/batch on a local server")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and concurrency")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed requests before each measurement")
+    parser.add_argument("--batch-size", type=int, default=8, help="Images per /predict/batch request; 0 skips it")
+    parser.add_argument("--variants", type=int, default=4, help="Distinct photos per size")
+    parser.add_argument("--model", default=None, help="Model to serve (default MODEL_PATH, else a stand-in)")
+    parser.add_argument("--cache", action="store_true", help="Keep the prediction cache on")
+    parser.add_argument("--shed", action="store_true", help="Keep load shedding on")
+    parser.add_argument("--set", type=parse_override, action="append", default=[], metavar="KEY=VALUE",
+                        help="Override a config.py setting in the server")
+    parser.add_argument("--output", help="Also write the JSON report here")
+    parser.add_argument("--baseline", help="Earlier JSON report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression fraction")
+    parser.add_argument("--error-tolerance", type=float, default=0.01, help="Allowed error rate increase")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    model = args.model or config.MODEL_PATH
+    stand_in = args.model is None and not os.path.exists(os.path.join(ROOT, model))
+    if stand_in:
+        model = stand_in_model()
+    elif not os.path.exists(os.path.join(ROOT, model)):
+        parser.error(f"Model not found: {model}")
+
+    overrides = {
+        # Only the model under test: no registry versions, no reloads, no cached answers, no 429s or 503s
+        "MODEL_PATH": model,
+        "MODEL_REGISTRY_DIR": os.path.join(tempfile.gettempdir(), "agrivision_no_registry"),
+        "MODEL_VERSION": None,
+        "MODEL_WATCH_INTERVAL_S": 0,
+        "ENABLE_PREDICTION_CACHE": args.cache,
+        "ENABLE_RATE_LIMITING": False,
+        "ENABLE_LOAD_SHEDDING": args.shed,
+        **dict(args.set)
+    }
+
+    photos = corpus(PHOTO_SIZES, args.variants)
+    workloads = [("/predict", 1, [("/predict", *multipart("file", [item])) for item in photos])]
+    if args.batch_size > 0:
+        batches = [
+            [photos[(start + i) % len(photos)] for i in range(args.batch_size)]
+            for start in range(0, len(photos), args.batch_size)
+        ]
+        workloads.append(
+            ("/predict/batch", args.batch_size, [("/predict/batch", *multipart("files", batch)) for batch in batches])
+        )
+
+    port = free_port()
+    server = start_server(overrides, port)
+    runs = []
+    try:
+        for endpoint, images_per_request, requests in workloads:
+            for concurrency in args.concurrency:
+                drive(port, requests, concurrency, args.warmup)
+                responses, elapsed = drive(port, requests, concurrency, args.requests)
+                runs.append({
+                    "endpoint": endpoint,
+                    "concurrency": concurrency,
+                    **summarize(responses, elapsed, images_per_request)
+                })
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "numpy": np.__version__
+        },
+        "model": {"path": model, "stand_in": stand_in, "sha256": file_digest(os.path.join(ROOT, model))},
+        "settings": {
+            "requests": args.requests,
+            "photo_sizes": [f"{width}x{height}" for width, height in PHOTO_SIZES],
+            "photo_kb": round(sum(len(contents) for _, contents in photos) / len(photos) / 1024, 1),
+            "batch_size": args.batch_size,
+            "overrides": {key: value for key, value in overrides.items() if key != "MODEL_PATH"}
+        },
+        "runs": runs
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    found = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(report, json.load(f), args.tolerance, args.error_tolerance)
+        report["regressions"] = found
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print("=" * 60)
+        print("AgriVision Pro - Load Test")
+        print("=" * 60)
+        print(f"Model: {model}{' (stand-in)' if stand_in else ''}")
+        print(f"Photos: {', '.join(report['settings']['photo_sizes'])} "
+              f"(mean {report['settings']['photo_kb']} KB)")
+        print(f"{'Endpoint':16}{'Clients':>8}{'img/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  Statuses")
+        for run in runs:
+            statuses = " ".join(f"{status}:{count}" for status, count in run["statuses"].items())
+            latency = "".join(f"{run[key]:>9.1f}" if run[key] is not None else f"{'-':>9}"
+                              for key in ("p50_ms", "p95_ms", "p99_ms"))
+            print(f"{run['endpoint']:16}{run['concurrency']:>8}{run['images_per_s']:>9.1f}{latency}  {statuses}")
+        if args.baseline:
+            for regression in found:
+                print(f"✗ {regression}")
+            if not found:
+                print(f"✓ No regressions against {args.baseline}")
+        print("=" * 60)
+
+    if found:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
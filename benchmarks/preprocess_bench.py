@@ -0,0 +1,121 @@
+"""
+AgriVision Pro - Preprocessing Benchmark
+Compares the original decode/resize/normalize path with preprocessing.py
+
+Usage:
+    python benchmarks/preprocess_bench.py [--repeats 20] [--json]
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from preprocessing import decode_image, normalize_into
+
+IMG_SIZE = (224, 224)
+
+# (label, width, height, format) of typical uploads
+CASES = [
+    ("12MP phone JPEG", 4000, 3000, "JPEG"),
+    ("3MP JPEG", 2048, 1536, "JPEG"),
+    ("PlantVillage 256px JPEG", 256, 256, "JPEG"),
+    ("2MP PNG", 1600, 1200, "PNG"),
+]
+
+
+def synthetic_photo(width, height, fmt):
+    """Encode a smooth, photo-like test image so JPEG sizes are realistic"""
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    red = 127 + 100 * np.sin(x / 97.0) * np.cos(y / 53.0)
+    green = 150 + 80 * np.cos(x / 41.0 + y / 67.0)
+    blue = 90 + 60 * np.sin((x + y) / 131.0)
+    pixels = np.stack([red, green, blue], axis=-1)
+    pixels += np.random.default_rng(0).normal(0, 6, pixels.shape)
+    image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+    buffer = io.BytesIO()
+    if fmt == "JPEG":
+        image.save(buffer, fmt, quality=90)
+    else:
+        image.save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def original_path(contents):
+    """The preprocessing predict() used before preprocessing.py existed"""
+    image = Image.open(io.BytesIO(contents))
+    image = image.convert('RGB')
+    image = image.resize(IMG_SIZE)
+    image_array = np.array(image, dtype=np.float32)
+    image_array = image_array / 255.0
+    return np.expand_dims(image_array, axis=0)
+
+
+def fast_path(contents, buffer):
+    """Draft-mode decode, then normalize straight into a reused input buffer"""
+    normalize_into(decode_image(contents, IMG_SIZE), buffer[0])
+    return buffer
+
+
+def time_call(fn, repeats):
+    """Median wall time of fn() in milliseconds"""
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark image preprocessing paths")
+    parser.add_argument("--repeats", type=int, default=20, help="Timed runs per case")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    buffer = np.zeros((1, IMG_SIZE[1], IMG_SIZE[0], 3), dtype=np.float32)
+    results = []
+
+    for label, width, height, fmt in CASES:
+        contents = synthetic_photo(width, height, fmt)
+        original_ms = time_call(lambda: original_path(contents), args.repeats)
+        fast_ms = time_call(lambda: fast_path(contents, buffer), args.repeats)
+
+        # Draft decoding scales in the DCT domain, so pixels differ slightly
+        difference = np.abs(original_path(contents) - fast_path(contents, buffer)).mean()
+
+        results.append({
+            "case": label,
+            "upload_kb": round(len(contents) / 1024, 1),
+            "original_ms": round(original_ms, 3),
+            "fast_ms": round(fast_ms, 3),
+            "speedup": round(original_ms / fast_ms, 2),
+            "mean_abs_pixel_diff": round(float(difference), 5)
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("=" * 60)
+    print("AgriVision Pro - Preprocessing Benchmark")
+    print("=" * 60)
+    for result in results:
+        print(f"{result['case']} ({result['upload_kb']} KB)")
+        print(f"  original: {result['original_ms']:8.2f} ms")
+        print(f"  fast:     {result['fast_ms']:8.2f} ms  ({result['speedup']}x)")
+        print(f"  mean |diff|: {result['mean_abs_pixel_diff']}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
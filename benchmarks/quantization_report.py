@@ -0,0 +1,144 @@
+"""
+AgriVision Pro - Quantization Report
+Accuracy and latency of the full-integer INT8 edge model against the
+float edge model on the held-out validation split. Both models see the
+same decoded images; the INT8 model takes the raw uint8 pixels.
+
+Usage:
+    python benchmarks/quantization_report.py [--data-dir "dataset/plantvillage dataset/color"]
+        [--float-model models/agrivision_edge_model.tflite]
+        [--int8-model models/agrivision_edge_model_int8.tflite]
+        [--samples 1000] [--labels labels.json] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import config
+from backends import create_interpreter
+from dataset import DATA_DIR, sample_per_class, served_class_names, split_files
+from interpreter_pool import invoke_batch
+from preprocessing import decode_image, input_writer
+from registry import label_columns
+
+
+def load_images(items, size):
+    """Decode every held-out image once, to uint8 pixels at the model size"""
+    images = []
+    for path, _ in items:
+        with open(path, 'rb') as f:
+            images.append(decode_image(f.read(), size))
+    return images
+
+
+def evaluate(model_path, images, columns):
+    """Class scores for every image, one invoke each, and the per-image latencies"""
+    interpreter = create_interpreter(model_path, num_threads=config.INTERPRETER_THREADS,
+                                     backend=config.INTERPRETER_BACKEND)
+    interpreter.allocate_tensors()
+    input_detail = interpreter.get_input_details()[0]
+    write = input_writer(input_detail)
+
+    scores = []
+    latencies = []
+    for pixels in images:
+        started = time.perf_counter()
+        row = invoke_batch(interpreter, 1, lambda inputs: write(pixels, inputs[0]))[0]
+        latencies.append(time.perf_counter() - started)
+        scores.append(row if columns is None else row[columns])
+
+    return {
+        "input_dtype": np.dtype(input_detail['dtype']).name,
+        "scores": np.array(scores),
+        "latencies_ms": np.array(latencies) * 1000,
+        "size_mb": os.path.getsize(model_path) / 1024 / 1024
+    }
+
+
+def summarize(result, labels):
+    predicted = result["scores"].argmax(axis=1)
+    top5 = np.argsort(result["scores"], axis=1)[:, -5:]
+    latencies = result["latencies_ms"]
+    return {
+        "input_dtype": result["input_dtype"],
+        "size_mb": round(result["size_mb"], 2),
+        "top1_accuracy": round(float(np.mean(predicted == labels)), 4),
+        "top5_accuracy": round(float(np.mean([label in row for label, row in zip(labels, top5)])), 4),
+        "latency_mean_ms": round(float(latencies.mean()), 3),
+        "latency_p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "latency_p95_ms": round(float(np.percentile(latencies, 95)), 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the INT8 edge model with the float model")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="PlantVillage class folders")
+    parser.add_argument("--float-model", default=config.MODEL_PATH, help="Float (dynamic-range) edge model")
+    parser.add_argument("--int8-model", default=config.INT8_MODEL_PATH, help="Full-integer edge model")
+    parser.add_argument("--samples", type=int, default=1000, help="Held-out images to evaluate")
+    parser.add_argument("--labels", help="labels.json giving the models' output order")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    columns = None
+    if args.labels:
+        with open(args.labels) as f:
+            columns = label_columns(json.load(f), served_class_names())
+
+    items = sample_per_class(split_files(args.data_dir, subset="validation"), args.samples)
+    if not items:
+        raise SystemExit(f"No validation images found in {args.data_dir}")
+    labels = np.array([class_index for _, class_index in items])
+
+    probe = create_interpreter(args.float_model, backend=config.INTERPRETER_BACKEND)
+    height, width = probe.get_input_details()[0]['shape'][1:3]
+    images = load_images(items, (int(width), int(height)))
+
+    float_result = evaluate(args.float_model, images, columns)
+    int8_result = evaluate(args.int8_model, images, columns)
+
+    report = {
+        "images": len(items),
+        "float": summarize(float_result, labels),
+        "int8": summarize(int8_result, labels),
+        "top1_agreement": round(float(np.mean(
+            float_result["scores"].argmax(axis=1) == int8_result["scores"].argmax(axis=1)
+        )), 4),
+        "mean_abs_score_diff": round(float(np.abs(float_result["scores"] - int8_result["scores"]).mean()), 5)
+    }
+    report["speedup"] = round(report["float"]["latency_mean_ms"] / report["int8"]["latency_mean_ms"], 2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print("=" * 60)
+    print("AgriVision Pro - Quantization Report")
+    print("=" * 60)
+    print(f"Held-out images: {report['images']}")
+    print(f"{'':22}{'float':>12}{'int8':>12}")
+    for key, label in [
+        ("input_dtype", "Input dtype"),
+        ("size_mb", "Size (MB)"),
+        ("top1_accuracy", "Top-1 accuracy"),
+        ("top5_accuracy", "Top-5 accuracy"),
+        ("latency_mean_ms", "Mean latency (ms)"),
+        ("latency_p50_ms", "p50 latency (ms)"),
+        ("latency_p95_ms", "p95 latency (ms)")
+    ]:
+        print(f"{label:22}{report['float'][key]!s:>12}{report['int8'][key]!s:>12}")
+    print(f"Top-1 agreement:      {report['top1_agreement']}")
+    print(f"Mean |score diff|:    {report['mean_abs_score_diff']}")
+    print(f"Speedup:              {report['speedup']}x")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+AgriVision Pro - Response Serialization Benchmark
+Per-response cost of building a /predict body the old way (dict rebuilt
+from PLANT_DISEASES and encoded by JSONResponse) against splicing the
+per-request fields into pre-encoded fragments, and of postprocessing
+(top-k and the uncertain flag) one image at a time against once per batch.
+
+Usage:
+    python benchmarks/serialization_bench.py [--responses 20000] [--batch-size 8] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import config
+from main import PLANT_DISEASES, UNCERTAIN_BELOW, UNKNOWN_DISEASE
+from postprocessing import Postprocessor
+from responses import FastJSONResponse, ResponseFragments, orjson
+
+
+def sorted_top_k(predictions):
+    """Top-k classes by fully sorting one image's scores"""
+    ranked = np.argsort(predictions)[::-1][:config.TOP_K_PREDICTIONS]
+    return ranked, predictions[ranked]
+
+
+def original_response(predictions):
+    """How predict() built its response before the fragments existed"""
+    predicted_class = np.argmax(predictions)
+    confidence = float(predictions[predicted_class])
+    disease_info = PLANT_DISEASES.get(predicted_class, UNKNOWN_DISEASE)
+    ranked, scores = sorted_top_k(predictions)
+    return JSONResponse({
+        "success": True,
+        "class": int(predicted_class),
+        "confidence": float(confidence),
+        "uncertain": confidence < UNCERTAIN_BELOW,
+        "top_k": [
+            {"class": int(c), "full_name": PLANT_DISEASES[int(c)]["name"], "confidence": float(s)}
+            for c, s in zip(ranked, scores)
+        ],
+        "plant": disease_info["plant"],
+        "disease": disease_info["disease"],
+        "full_name": disease_info["name"],
+        "confidence_percentage": f"{confidence * 100:.2f}%",
+        "treatment": disease_info["treatment"]
+    })
+
+
+def fragment_response(fragments, prediction):
+    """The current path: per-request fields spliced into a pre-encoded fragment"""
+    body = fragments.render(
+        prediction.top_class, prediction.confidence, {"success": True},
+        top_k=(prediction.classes, prediction.confidences), uncertain=prediction.uncertain
+    )
+    return FastJSONResponse(body)
+
+
+def time_per_response(fn, rows):
+    """Mean microseconds per call of fn(row) over every row"""
+    for row in rows[:100]:
+        fn(row)  # warm-up
+    start = time.perf_counter()
+    for row in rows:
+        fn(row)
+    return (time.perf_counter() - start) / len(rows) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prediction response serialization")
+    parser.add_argument("--responses", type=int, default=20000, help="Responses to encode per path")
+    parser.add_argument("--batch-size", type=int, default=config.MAX_BATCH_SIZE, help="Images per postprocessed batch")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    # Softmax rows spread over all 38 classes
+    rng = np.random.default_rng(0)
+    logits = rng.normal(0, 3, (args.responses, len(PLANT_DISEASES))).astype(np.float32)
+    rows = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+
+    fragments = ResponseFragments(PLANT_DISEASES, UNKNOWN_DISEASE)
+    postprocess = Postprocessor(config.TOP_K_PREDICTIONS, uncertain_below=UNCERTAIN_BELOW)
+    batches = [rows[start:start + args.batch_size] for start in range(0, len(rows), args.batch_size)]
+    predictions = [prediction for batch in batches for prediction in postprocess(batch)]
+
+    # Both paths must describe the same prediction
+    for row, prediction in zip(rows[:200], predictions):
+        old = json.loads(original_response(row).body)
+        new = json.loads(fragment_response(fragments, prediction).body)
+        assert old == new, (old, new)
+
+    original_us = time_per_response(original_response, rows)
+    fragment_us = time_per_response(lambda prediction: fragment_response(fragments, prediction), predictions)
+    per_image_us = time_per_response(postprocess.one, rows)
+    batched_us = time_per_response(postprocess, batches) / args.batch_size
+
+    result = {
+        "responses": args.responses,
+        "json_backend": "orjson" if orjson is not None else "json",
+        "top_k": config.TOP_K_PREDICTIONS,
+        "original_us": round(original_us, 2),
+        "fragments_us": round(fragment_us, 2),
+        "speedup": round(original_us / fragment_us, 2),
+        "postprocess_per_image_us": round(per_image_us, 2),
+        "postprocess_batched_us": round(batched_us, 2),
+        "postprocess_speedup": round(per_image_us / batched_us, 2)
+    }
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print("=" * 60)
+    print("AgriVision Pro - Response Serialization Benchmark")
+    print("=" * 60)
+    print(f"JSON backend:        {result['json_backend']}")
+    print(f"Original response:   {result['original_us']:8.2f} µs")
+    print(f"Fragment response:   {result['fragments_us']:8.2f} µs  ({result['speedup']}x)")
+    print(f"Top-{result['top_k']} per image:     {result['postprocess_per_image_us']:8.2f} µs")
+    print(f"Top-{result['top_k']} per batch:     {result['postprocess_batched_us']:8.2f} µs per image  "
+          f"({result['postprocess_speedup']}x)")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
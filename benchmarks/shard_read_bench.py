@@ -0,0 +1,115 @@
+"""
+AgriVision Pro - Shard Read Benchmark
+Images/sec reading the dataset as the training and evaluation tools do:
+decoding the JPEG folder (one thread, and a thread pool) against reading
+the packed shards in order and in shuffled batches. Also times a full
+integrity check. Shards are read through the page cache, so run it
+twice to see warm-cache numbers.
+
+Usage:
+    python benchmarks/shard_read_bench.py [--data-dir "dataset/plantvillage dataset/color"]
+        [--shards dataset/shards] [--samples 2000] [--batch-size 32] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dataset import DATA_DIR, load_pixels, split_files
+from shards import ShardReader, pack, verify
+
+
+def images_per_sec(count, run):
+    started = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - started
+    return round(count / elapsed, 1), round(elapsed, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare shard reads with decoding the image folder")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="PlantVillage class folders")
+    parser.add_argument("--shards", help="Packed shards of data-dir (packed to a temporary directory if omitted)")
+    parser.add_argument("--samples", type=int, default=2000, help="Images to read per method")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    scratch = None
+    if not args.shards:
+        scratch = tempfile.TemporaryDirectory()
+        args.shards = scratch.name
+        pack(args.data_dir, args.shards)
+
+    reader = ShardReader(args.shards)
+    count = min(args.samples, len(reader))
+    paths = [path for path, _ in split_files(args.data_dir, subset="all")][:count]
+    size = reader.image_size
+    workers = os.cpu_count() or 1
+
+    def decode_serial():
+        for path in paths:
+            load_pixels(path, size)
+
+    def decode_pool():
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for _ in executor.map(lambda path: load_pixels(path, size), paths):
+                pass
+
+    def read_batches(shuffle):
+        def run():
+            read = 0
+            for pixels, _ in reader.batches(args.batch_size, shuffle=shuffle):
+                read += len(pixels)
+                if read >= count:
+                    break
+        return run
+
+    results = {"images": count, "image_size": list(size), "decode_workers": workers}
+    for name, run in [
+        ("folder_decode", decode_serial),
+        ("folder_decode_pool", decode_pool),
+        ("shards_sequential", read_batches(False)),
+        ("shards_shuffled", read_batches(True))
+    ]:
+        results[name] = dict(zip(("images_per_sec", "elapsed_s"), images_per_sec(count, run)))
+
+    started = time.perf_counter()
+    problems = verify(args.shards)
+    results["verify"] = {"elapsed_s": round(time.perf_counter() - started, 3), "problems": problems}
+    results["speedup_shuffled_vs_decode_pool"] = round(
+        results["shards_shuffled"]["images_per_sec"] / results["folder_decode_pool"]["images_per_sec"], 1
+    )
+    if scratch is not None:
+        del reader
+        scratch.cleanup()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("=" * 60)
+    print("AgriVision Pro - Shard Read Benchmark")
+    print("=" * 60)
+    print(f"Images: {count} at {size[0]}x{size[1]}")
+    for name, label in [
+        ("folder_decode", "Folder decode (1 thread)"),
+        ("folder_decode_pool", f"Folder decode ({workers} threads)"),
+        ("shards_sequential", "Shards, in order"),
+        ("shards_shuffled", "Shards, shuffled batches")
+    ]:
+        print(f"{label:30}{results[name]['images_per_sec']:>10} images/sec")
+    print(f"Shuffled shards vs decode:    {results['speedup_shuffled_vs_decode_pool']}x")
+    print(f"Integrity check:              {results['verify']['elapsed_s']} s, "
+          f"{'intact' if not problems else f'{len(problems)} problems'}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
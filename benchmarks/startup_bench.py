@@ -0,0 +1,107 @@
+"""
+AgriVision Pro - Startup Benchmark
+Cold-start import time and memory for each installed interpreter backend.
+Every backend is measured in a fresh Python process so nothing is shared.
+
+Usage:
+    python benchmarks/startup_bench.py [--model models/agrivision_edge_model.tflite] [--json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import config
+from backends import BACKENDS
+
+# Runs in the child process; prints one JSON object
+CHILD = r"""
+import json, sys, time
+sys.path.insert(0, {root!r})
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+baseline = rss_mb()
+start = time.perf_counter()
+from backends import load_backend
+load_backend({backend!r})
+imported = time.perf_counter()
+
+from backends import create_interpreter
+interpreter = create_interpreter({model!r}, backend={backend!r})
+interpreter.allocate_tensors()
+loaded = time.perf_counter()
+backend_rss = rss_mb()
+
+import config
+config.INTERPRETER_BACKEND = {backend!r}
+import main
+ready = time.perf_counter()
+
+print(json.dumps({{
+    "backend": {backend!r},
+    "import_s": round(imported - start, 3),
+    "interpreter_load_s": round(loaded - imported, 3),
+    "app_import_s": round(ready - loaded, 3),
+    "backend_rss_mb": round(backend_rss - baseline, 1),
+    "app_rss_mb": round(rss_mb(), 1),
+    "tensorflow_imported": "tensorflow" in sys.modules
+}}))
+"""
+
+
+def measure(backend, model):
+    """Start a fresh interpreter process and collect its startup numbers"""
+    code = CHILD.format(root=ROOT, backend=backend, model=model)
+    process = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True
+    )
+    lines = [line for line in process.stdout.splitlines() if line.startswith("{")]
+    if process.returncode != 0 or not lines:
+        error = (process.stderr.strip().splitlines() or ["failed"])[-1]
+        return {"backend": backend, "available": False, "error": error}
+    return {"available": True, **json.loads(lines[-1])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold start per interpreter backend")
+    parser.add_argument("--model", default=config.MODEL_PATH, help="TFLite model to load")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = [measure(backend, args.model) for backend in BACKENDS]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("=" * 60)
+    print("AgriVision Pro - Startup Benchmark")
+    print("=" * 60)
+    for result in results:
+        if not result["available"]:
+            print(f"✗ {result['backend']}: {result['error']}")
+            continue
+        print(f"✓ {result['backend']}")
+        print(f"  Backend import:      {result['import_s']:7.3f} s")
+        print(f"  Interpreter load:    {result['interpreter_load_s']:7.3f} s")
+        print(f"  App import:          {result['app_import_s']:7.3f} s")
+        print(f"  Backend RSS:         {result['backend_rss_mb']:7.1f} MB")
+        print(f"  App RSS:             {result['app_rss_mb']:7.1f} MB")
+        print(f"  TensorFlow imported: {result['tensorflow_imported']}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+AgriVision Pro - Tiling Benchmark
+Cost of cutting a high-resolution photo into model-sized tiles as strided
+views against copying each tile out, and tiles/sec when the tiles are
+classified one invoke each against in batches.
+
+Usage:
+    python benchmarks/tiling_bench.py [--megapixels 12] [--model models/agrivision_edge_model.tflite] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import config
+from backends import create_interpreter
+from interpreter_pool import invoke_batch
+from preprocessing import input_writer
+from tiling import tile_views
+
+
+def copied_tiles(pixels, grid):
+    """The same tiles as tile_views, each cropped out into one stacked array"""
+    (x0, y0), (step_x, step_y), (width, height) = grid.origin, grid.stride, grid.tile_size
+    return np.stack([
+        pixels[y0 + row * step_y:y0 + row * step_y + height, x0 + col * step_x:x0 + col * step_x + width]
+        for row in range(grid.rows)
+        for col in range(grid.cols)
+    ])
+
+
+def timed(function, repeat):
+    """(mean seconds, peak traced bytes) of function()"""
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat, peak
+
+
+def classify(interpreter, tiles, batch_size):
+    """Classify every tile of the view, batch_size per invoke; returns seconds"""
+    write = input_writer(interpreter.get_input_details()[0])
+    views = [tiles[row, col] for row in range(tiles.shape[0]) for col in range(tiles.shape[1])]
+
+    def fill_from(batch):
+        def fill(inputs):
+            for i, view in enumerate(batch):
+                write(view, inputs[i])
+        return fill
+
+    started = time.perf_counter()
+    for start in range(0, len(views), batch_size):
+        batch = views[start:start + batch_size]
+        invoke_batch(interpreter, batch_size, fill_from(batch), rows=len(batch))
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tiling views and batched tile inference")
+    parser.add_argument("--megapixels", type=float, default=12, help="Size of the synthetic photo")
+    parser.add_argument("--model", default=config.MODEL_PATH, help="TFLite model to classify tiles with")
+    parser.add_argument("--repeat", type=int, default=20, help="Repetitions of the tiling step")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    interpreter = create_interpreter(args.model, num_threads=config.INTERPRETER_THREADS,
+                                     backend=config.INTERPRETER_BACKEND)
+    interpreter.allocate_tensors()
+    height, width = interpreter.get_input_details()[0]['shape'][1:3]
+    tile_size = (int(width), int(height))
+
+    photo_width = int(round((args.megapixels * 1e6 * 4 / 3) ** 0.5))
+    photo_height = int(round(photo_width * 3 / 4))
+    pixels = np.random.default_rng(0).integers(0, 256, (photo_height, photo_width, 3), dtype=np.uint8)
+    tiles, grid = tile_views(pixels, tile_size, config.TILE_OVERLAP)
+
+    view_s, view_peak = timed(lambda: tile_views(pixels, tile_size, config.TILE_OVERLAP), args.repeat)
+    copy_s, copy_peak = timed(lambda: copied_tiles(pixels, grid), args.repeat)
+
+    # One throwaway pass per batch size so tensor resizing is not timed
+    count = grid.rows * grid.cols
+    invokes = {}
+    for batch_size in sorted({1, config.MAX_BATCH_SIZE}):
+        classify(interpreter, tiles[:1, :min(grid.cols, batch_size)], batch_size)
+        invokes[batch_size] = round(count / classify(interpreter, tiles, batch_size), 1)
+
+    results = {
+        "photo": f"{photo_width}x{photo_height}",
+        "tiles": count,
+        "grid": [grid.rows, grid.cols],
+        "stride": list(grid.stride),
+        "views_ms": round(view_s * 1000, 3),
+        "views_peak_kb": round(view_peak / 1024, 1),
+        "copies_ms": round(copy_s * 1000, 3),
+        "copies_peak_kb": round(copy_peak / 1024, 1),
+        "tiles_per_s": {str(batch_size): rate for batch_size, rate in invokes.items()}
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("=" * 60)
+    print("AgriVision Pro - Tiling Benchmark")
+    print("=" * 60)
+    print(f"Photo: {results['photo']}, {count} tiles of {tile_size[0]}x{tile_size[1]} "
+          f"({grid.rows}x{grid.cols}, stride {grid.stride[0]}x{grid.stride[1]})")
+    print(f"Strided views:   {results['views_ms']:10.3f} ms  peak {results['views_peak_kb']:10.1f} KB")
+    print(f"Copied tiles:    {results['copies_ms']:10.3f} ms  peak {results['copies_peak_kb']:10.1f} KB")
+    for batch_size, rate in invokes.items():
+        print(f"Batch size {batch_size:<3}   {rate:10.1f} tiles/s")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
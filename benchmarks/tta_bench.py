@@ -0,0 +1,118 @@
+"""
+AgriVision Pro - Test-Time Augmentation Benchmark
+What re-checking a low-confidence image costs: building its augmented
+copies with one gather against PIL transforms per copy, and classifying
+them in one batched invoke against one invoke each. Also projects the
+mean /predict inference time for a range of low-confidence shares.
+
+Usage:
+    python benchmarks/tta_bench.py [--model models/agrivision_edge_model.tflite] [--repeat 50] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import config
+from backends import create_interpreter
+from interpreter_pool import invoke_batch
+from preprocessing import input_writer
+from tta import TestTimeAugmenter
+
+
+def pil_variants(pixels, augmenter):
+    """The same copies made one at a time with PIL"""
+    image = Image.fromarray(pixels)
+    width, height = image.size
+    copies = []
+    for flip, degrees, zoom in augmenter.transforms:
+        copy = image.transpose(Image.FLIP_LEFT_RIGHT) if flip else image
+        if degrees:
+            copy = copy.rotate(-degrees, resample=Image.NEAREST)
+        if zoom != 1.0:
+            crop_w, crop_h = width / zoom, height / zoom
+            box = ((width - crop_w) / 2, (height - crop_h) / 2, (width + crop_w) / 2, (height + crop_h) / 2)
+            copy = copy.resize((width, height), Image.NEAREST, box=box)
+        copies.append(np.asarray(copy))
+    return np.stack(copies)
+
+
+def mean_seconds(function, repeat):
+    function()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark test-time augmentation")
+    parser.add_argument("--model", default=config.MODEL_PATH, help="TFLite model to classify with")
+    parser.add_argument("--repeat", type=int, default=50, help="Repetitions of each measurement")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    augmenter = TestTimeAugmenter(config.TTA_ANGLES, config.TTA_ZOOM)
+    interpreter = create_interpreter(args.model, num_threads=config.INTERPRETER_THREADS,
+                                     backend=config.INTERPRETER_BACKEND)
+    interpreter.allocate_tensors()
+    write = input_writer(interpreter.get_input_details()[0])
+    height, width = (int(d) for d in interpreter.get_input_details()[0]['shape'][1:3])
+    pixels = np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    variants = augmenter.variants(pixels)
+
+    def fill_with(images):
+        def fill(inputs):
+            for i, image in enumerate(images):
+                write(image, inputs[i])
+        return fill
+
+    gather_s = mean_seconds(lambda: augmenter.variants(pixels), args.repeat)
+    pil_s = mean_seconds(lambda: pil_variants(pixels, augmenter), args.repeat)
+    # Each invoke style keeps its own interpreter shape, so tensors are not resized while timing
+    single_s = mean_seconds(lambda: invoke_batch(interpreter, 1, fill_with([pixels])), args.repeat)
+    sequential_s = len(variants) * single_s
+    batched_s = mean_seconds(lambda: invoke_batch(interpreter, len(variants), fill_with(variants)), args.repeat)
+
+    tta_s = gather_s + batched_s
+    results = {
+        "copies": len(variants),
+        "gather_ms": round(gather_s * 1000, 3),
+        "pil_ms": round(pil_s * 1000, 3),
+        "single_invoke_ms": round(single_s * 1000, 3),
+        "sequential_invokes_ms": round(sequential_s * 1000, 3),
+        "batched_invoke_ms": round(batched_s * 1000, 3),
+        # Mean inference time per /predict image when this share of images falls under the threshold
+        "projected_mean_ms": {
+            f"{share:.2f}": round((single_s + share * tta_s) * 1000, 3) for share in (0.0, 0.05, 0.1, 0.25, 1.0)
+        }
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("=" * 60)
+    print("AgriVision Pro - Test-Time Augmentation Benchmark")
+    print("=" * 60)
+    print(f"Copies per image:       {len(variants)}")
+    print(f"Build copies (gather):  {results['gather_ms']:9.3f} ms")
+    print(f"Build copies (PIL):     {results['pil_ms']:9.3f} ms")
+    print(f"One image, one invoke:  {results['single_invoke_ms']:9.3f} ms")
+    print(f"Copies, one each:       {results['sequential_invokes_ms']:9.3f} ms")
+    print(f"Copies, one batch:      {results['batched_invoke_ms']:9.3f} ms")
+    print("Projected mean inference per image by low-confidence share:")
+    for share, ms in results["projected_mean_ms"].items():
+        print(f"  {share}: {ms:9.3f} ms")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
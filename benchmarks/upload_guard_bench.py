@@ -0,0 +1,112 @@
+"""
+AgriVision Pro - Upload Guard Benchmark
+What rejecting a bad upload costs compared with decoding a good one:
+time and peak memory of UploadPolicy.read() for junk bytes, a
+decompression bomb and an oversized file, against reading and decoding
+a normal photo.
+
+Usage:
+    python benchmarks/upload_guard_bench.py [--repeat 200] [--json]
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from PIL import Image
+from starlette.datastructures import UploadFile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import config
+from preprocessing import decode_image
+from uploads import UploadPolicy, UploadRejected
+
+
+def encode(image, image_format, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def uploads():
+    """(name, filename, bytes) for one good upload and each kind of bad one"""
+    photo = Image.effect_noise((2000, 1500), 64).convert("RGB")
+    good = encode(photo, "JPEG", quality=90)
+    return [
+        ("photo", "leaf.jpg", good),
+        ("junk", "leaf.jpg", os.urandom(len(good))),
+        ("bomb", "leaf.png", encode(Image.new("1", (20000, 20000)), "PNG")),
+        ("oversized", "leaf.jpg", good + bytes(config.MAX_FILE_SIZE_MB * 1024 * 1024))
+    ]
+
+
+async def handle(policy, filename, contents, size):
+    """Read an upload through the policy and decode it if accepted; returns the outcome"""
+    upload = UploadFile(io.BytesIO(contents), size=len(contents), filename=filename)
+    try:
+        accepted = await policy.read(upload)
+    except UploadRejected as e:
+        return f"{e.status_code} {e}"
+    decode_image(accepted, size)
+    return "decoded"
+
+
+def measure(policy, filename, contents, repeat):
+    size = (224, 224)
+    outcome = asyncio.run(handle(policy, filename, contents, size))
+
+    tracemalloc.start()
+    asyncio.run(handle(policy, filename, contents, size))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    async def run():
+        started = time.perf_counter()
+        for _ in range(repeat):
+            await handle(policy, filename, contents, size)
+        return (time.perf_counter() - started) / repeat
+
+    return {
+        "bytes": len(contents),
+        "outcome": outcome,
+        "ms": round(asyncio.run(run()) * 1000, 3),
+        "peak_kb": round(peak / 1024, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time upload rejection against decoding")
+    parser.add_argument("--repeat", type=int, default=200, help="Reads per upload kind")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    policy = UploadPolicy(
+        max_bytes=config.MAX_FILE_SIZE_MB * 1024 * 1024,
+        allowed_extensions=config.ALLOWED_IMAGE_EXTENSIONS,
+        max_pixels=config.MAX_IMAGE_PIXELS,
+        chunk_size=config.UPLOAD_CHUNK_KB * 1024
+    )
+    results = {name: measure(policy, filename, contents, args.repeat) for name, filename, contents in uploads()}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("=" * 60)
+    print("AgriVision Pro - Upload Guard Benchmark")
+    print("=" * 60)
+    print(f"{'Upload':12}{'Size (KB)':>11}{'Time (ms)':>11}{'Peak (KB)':>11}  Outcome")
+    for name, result in results.items():
+        print(f"{name:12}{result['bytes'] / 1024:>11.0f}{result['ms']:>11.3f}{result['peak_kb']:>11.0f}  "
+              f"{result['outcome']}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Prediction cache for AgriVision Pro
+Content-addressed LRU cache so re-uploaded photos skip decode and inference
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+
+
+def content_hash(contents):
+    """Fast 128-bit hash of the upload bytes"""
+    return hashlib.blake2b(contents, digest_size=16).digest()
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """
+    LRU cache of predictions keyed by (model digest, content_hash() of the upload).
+
+    Entries expire after ttl seconds and the least recently used entry is
+    evicted beyond max_entries. Only digests of the models currently being
+    served are cached; registering a new set drops every entry from models
+    that left it, so results from an old model are never served. It is
+    only used from the event loop, so no locking is needed.
+    """
+
+    def __init__(self, max_entries=1024, ttl=3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.model_digests = frozenset()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def set_models(self, digests):
+        """Cache results from these model digests only, dropping entries from any others"""
+        self.model_digests = frozenset(digests)
+        for key in [key for key in self._entries if key[0] not in self.model_digests]:
+            del self._entries[key]
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        prediction, expires = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return prediction
+
+    def put(self, key, prediction):
+        """Cache a prediction; it is shared between every request that hits it, so must not be mutated"""
+        if key[0] not in self.model_digests:
+            return  # Computed by a model that has since been replaced
+        self._entries[key] = (prediction, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "model_digests": sorted(digest[:12] for digest in self.model_digests)
+        }
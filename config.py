@@ -11,21 +11,51 @@ APP_DESCRIPTION = "Advanced crop disease detection using TensorFlow Lite and Pla
 # Server Settings
 HOST = "0.0.0.0"  # Listen on all interfaces
 PORT = 8000
+WORKERS = 1  # Server processes; each gets its own slice of the CPU cores
 DEBUG = False  # Set to True for development
 RELOAD = False  # Auto-reload on code changes (development only)
 
 # File Upload Settings
 MAX_FILE_SIZE_MB = 5  # Maximum upload size in MB
 ALLOWED_IMAGE_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif', 'bmp', 'webp'}
+MAX_BATCH_IMAGES = 500  # Maximum images per /predict/batch request or archive
+MAX_BATCH_UPLOAD_MB = 200  # Maximum /predict/batch request body in MB
+MAX_IMAGE_PIXELS = 40_000_000  # Width x height limit checked from the header before decoding
+UPLOAD_CHUNK_KB = 64  # Uploads are read in chunks of this size up to the limit
+MAX_TILED_FILE_SIZE_MB = 50  # Maximum /predict/tiled upload in MB (drone and field photos)
+MAX_TILED_IMAGE_PIXELS = 80_000_000  # Width x height limit for /predict/tiled uploads
 
 # Model Settings
 MODEL_PATH = "models/agrivision_edge_model.tflite"
+MODEL_REGISTRY_DIR = "models/registry"  # Versioned models: <version>/model.tflite plus optional labels.json
+MODEL_VERSION = None  # Pin a registry version; None serves the newest (MODEL_PATH if the registry is empty)
+MODEL_WATCH_INTERVAL_S = 30  # Seconds between registry checks for new versions; 0 disables
+CANARY_PERCENT = 0  # Share of uploads a newly loaded version serves before promotion; 0 swaps immediately
 # Note: Input shape is automatically detected from the model
 # Typical values: (1, 224, 224, 3) for 224x224 RGB images
 
+# Explainability (Grad-CAM) Settings
+KERAS_MODEL_PATH = "models/AgriVision_XAI_Model.h5"  # Keras model used for Grad-CAM
+GRADCAM_LAYER = "out_relu"  # Last convolutional layer of MobileNetV2
+EXPLAIN_TIMEOUT_MS = 1500  # Latency budget for one explanation
+EXPLAIN_MAX_PENDING = 4  # Explanations queued before /explain skips the heatmap
+EXPLAIN_OVERLAY_ALPHA = 0.4  # Heatmap opacity in the PNG overlay
+CAM_MODEL_PATH = "models/agrivision_cam_model.tflite"  # Two-output model from export_tflite.py, for MODEL_PATH
+CAM_HEAD_PATH = "models/agrivision_cam_head.npz"  # Classifier head weights from export_tflite.py, for MODEL_PATH
+CAM_POOL_SIZE = 2  # Interpreters serving /explain per model version with a CAM model
+INT8_MODEL_PATH = "models/agrivision_edge_model_int8.tflite"  # Full-integer model from export_tflite.py --int8
+
 # Inference Settings
-CONFIDENCE_THRESHOLD = 0.0  # Minimum confidence to display (0.0 to 1.0)
-TOP_K_PREDICTIONS = 1  # Number of top predictions to return
+CONFIDENCE_THRESHOLD = 0.0  # Minimum confidence to display (0.0 to 1.0); the top class is always shown
+TOP_K_PREDICTIONS = 3  # Number of top predictions to return in top_k
+ENABLE_TTA = False  # Re-check predictions under CONFIDENCE_WARNING_THRESHOLD on augmented copies of the image
+TTA_ANGLES = (-15, 15)  # Rotations in degrees, each with and without a horizontal flip (training used up to 20)
+TTA_ZOOM = 1.15  # Centre zoom for one more copy; 1.0 disables it (training used up to 1.2)
+
+# Prediction Cache Settings
+ENABLE_PREDICTION_CACHE = True  # Answer repeat uploads of the same image from memory
+PREDICTION_CACHE_SIZE = 4096  # Maximum cached predictions (LRU eviction)
+PREDICTION_CACHE_TTL_S = 3600  # Seconds before a cached prediction expires
 
 # Disease Classes (38 classes from PlantVillage)
 DISEASE_CLASSES = {
@@ -108,17 +138,36 @@ ENABLE_FILE_LOGGING = False
 # Performance Settings
 USE_GPU = False  # Set to True if you have CUDA-capable GPU
 NUM_THREADS = 4  # TensorFlow CPU thread count
+INTERPRETER_POOL_SIZE = NUM_THREADS  # Parallel TFLite interpreters serving /predict
+INTERPRETER_THREADS = 1  # Intra-op threads per pooled interpreter
+INTERPRETER_BACKEND = "auto"  # auto, tflite_runtime, litert or tensorflow
+MAX_BATCH_SIZE = 8  # Most images grouped into one interpreter invoke
+BATCH_BUCKETS = (1,)  # Smaller batch sizes given their own interpreter (and memory) per pool slot; others pad up
+BATCH_TIMEOUT_MS = 10  # Longest a request waits for its batch to fill
+BATCH_INFLIGHT_IMAGES = MAX_BATCH_SIZE * INTERPRETER_POOL_SIZE * 2  # Decoded images held per /predict/batch request
+TILE_OVERLAP = 0.25  # /predict/tiled: fraction of a tile shared with each neighbour
+TILE_MAX_PIXELS = 12_000_000  # /predict/tiled: larger images are scaled down to this many pixels before tiling
+TILE_MIN_CONFIDENCE = 0.5  # /predict/tiled: tiles below this (soil, sky, blur) are left out of the field counts
+TILED_MAX_CONCURRENT = 2  # /predict/tiled images decoded and classified at once
+ENABLE_WARMUP = True  # Run synthetic batches through every interpreter before reporting ready
+ENABLE_METRICS = True  # Prometheus metrics at /metrics
 
 # Security Settings
 VALIDATE_FILE_EXTENSION = True
-VALIDATE_FILE_MAGIC_BYTES = False  # Check file header instead of extension
+VALIDATE_FILE_MAGIC_BYTES = True  # Check file header instead of extension
 ENABLE_RATE_LIMITING = False
 RATE_LIMIT = 100  # Requests per hour
+RATE_LIMIT_BURST = 10  # Requests a client may send at once before the hourly rate applies
+TRUST_FORWARDED_FOR = False  # Rate-limit by X-Forwarded-For (only behind a proxy that sets it)
+ENABLE_LOAD_SHEDDING = True  # Answer inference requests with 503 while the backlog is too long
+MAX_QUEUE_WAIT_MS = 2000  # Shed when a new image's estimated wait for the model exceeds this
+MAX_QUEUED_IMAGES = 512  # Shed when more images than this (or admitted requests) are waiting for or in inference
+ADMIN_TOKEN = None  # Required in X-Admin-Token for /admin endpoints; None allows local clients only
 
 # UI Settings
 UI_THEME = "purple"  # Color theme for web interface
 SHOW_CONFIDENCE_THRESHOLD_WARNING = True  # Show warning for low confidence
-CONFIDENCE_WARNING_THRESHOLD = 0.5  # If confidence below this, show warning
+CONFIDENCE_WARNING_THRESHOLD = 0.5  # If confidence below this, show warning (responses set "uncertain")
 
 # API Settings
 API_PREFIX = "/api"  # API endpoint prefix (use "" for no prefix)
@@ -0,0 +1,115 @@
+"""
+Dataset access for AgriVision Pro
+The PlantVillage folder layout, class labels and the notebook's train/validation split
+"""
+
+import os
+import random
+import re
+
+import numpy as np
+
+import config
+from preprocessing import decode_image
+
+DATA_DIR = "dataset/plantvillage dataset/color"  # Where the notebook unpacks PlantVillage
+VALIDATION_SPLIT = 0.2  # Share of each class held out for validation, as in the notebook
+
+# File types flow_from_directory picks up
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.ppm', '.tif', '.tiff')
+
+
+def served_class_names():
+    """Class names in the index order the API serves (config.DISEASE_CLASSES)"""
+    return [config.DISEASE_CLASSES[i] for i in sorted(config.DISEASE_CLASSES)]
+
+
+def normalize_class_name(name):
+    """Lowercase, with each run of spaces and underscores as one '_' and no trailing '_'"""
+    return re.sub(r"[ _]+", "_", name.strip().lower()).rstrip("_")
+
+
+def class_indices(data_dir, class_names=None):
+    """
+    {folder name: served class index} for every class folder in data_dir.
+
+    Folders are matched to class names after normalize_class_name():
+    PlantVillage's folder names can differ from DISEASE_CLASSES in case,
+    in spaces versus underscores and in a trailing '_' (e.g. "Corn_(maize)
+    ___Common_rust_"). Their sorted order, which Keras uses for its class
+    indices, also differs from DISEASE_CLASSES for the two tomato viruses.
+    """
+    names = [normalize_class_name(name) for name in (class_names or served_class_names())]
+    folders = sorted(entry.name for entry in os.scandir(data_dir) if entry.is_dir())
+    unknown = [folder for folder in folders if normalize_class_name(folder) not in names]
+    if unknown:
+        raise ValueError(f"Class folders not in DISEASE_CLASSES: {unknown}")
+
+    indices = {folder: names.index(normalize_class_name(folder)) for folder in folders}
+    if len(set(indices.values())) < len(indices):
+        raise ValueError(f"Several class folders match the same class in {data_dir}")
+    return indices
+
+
+def split_files(data_dir=DATA_DIR, subset="validation", validation_split=VALIDATION_SPLIT, class_names=None):
+    """
+    (path, served class index) pairs for one subset of the dataset.
+
+    Split per class the way ImageDataGenerator(validation_split=...) does:
+    the first validation_split of each class folder's sorted files are
+    "validation", the rest "training", so this matches what the notebook
+    trained and validated on.
+    """
+    if subset not in ("training", "validation", "all"):
+        raise ValueError("subset must be training, validation or all")
+
+    items = []
+    for folder, class_index in class_indices(data_dir, class_names).items():
+        files = []
+        for root, _, names in sorted(os.walk(os.path.join(data_dir, folder))):
+            files.extend(
+                os.path.join(root, name) for name in sorted(names)
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+
+        cut = int(validation_split * len(files))
+        if subset == "validation":
+            files = files[:cut]
+        elif subset == "training":
+            files = files[cut:]
+        items.extend((path, class_index) for path in files)
+    return items
+
+
+def sample_per_class(items, limit, seed=0):
+    """Up to limit items, spread as evenly as possible over the classes"""
+    if limit is None or limit >= len(items):
+        return list(items)
+
+    by_class = {}
+    for item in items:
+        by_class.setdefault(item[1], []).append(item)
+    rng = random.Random(seed)
+    for members in by_class.values():
+        rng.shuffle(members)
+
+    sample = []
+    while len(sample) < limit:
+        for members in by_class.values():
+            if members and len(sample) < limit:
+                sample.append(members.pop())
+    return sample
+
+
+def load_pixels(path, size):
+    """
+    Decode one image file the way the server decodes uploads, to uint8
+    pixels of (width, height) size. Returns (pixels, True), or a blank
+    image and False if the file can't be decoded.
+    """
+    try:
+        with open(path, 'rb') as f:
+            return decode_image(f.read(), size), True
+    except Exception:
+        width, height = size
+        return np.zeros((height, width, 3), dtype=np.uint8), False
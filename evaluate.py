@@ -0,0 +1,268 @@
+"""
+AgriVision Pro - Offline Evaluation
+Streams a PlantVillage-style directory tree through the TFLite model
+main.py serves and writes accuracy, per-class precision/recall, the
+confusion matrix and throughput as JSON.
+
+Images are read and decoded in parallel by a tf.data pipeline (or a
+thread pool when TensorFlow is not installed) with the server's own
+decode_image, so the model sees exactly the pixels /predict would give
+it, or read already decoded from shards packed by shards.py. Decoded
+batches are prefetched while a pool of single-threaded interpreters,
+one per core, runs batched invokes.
+
+Usage:
+    python evaluate.py --data-dir "dataset/plantvillage dataset/color" --subset validation
+        [--model models/agrivision_edge_model.tflite] [--labels labels.json]
+        [--batch-size 32] [--output report.json]
+    python evaluate.py --shards dataset/shards --subset validation
+    python evaluate.py --subset validation --tta
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import config
+from dataset import DATA_DIR, load_pixels, served_class_names, split_files
+from interpreter_pool import InterpreterPool, invoke_batch
+from preprocessing import input_writer
+from registry import label_columns
+from shards import ShardReader
+from tta import TestTimeAugmenter, average_scores
+
+
+def tf_batches(paths, size, batch_size):
+    """Iterator of (pixels, decoded) batches from a parallel tf.data decode + prefetch pipeline"""
+    import tensorflow as tf
+
+    width, height = size
+
+    def load(path):
+        pixels, ok = tf.numpy_function(
+            lambda p: load_pixels(p.decode(), size), [path], [tf.uint8, tf.bool]
+        )
+        pixels.set_shape((height, width, 3))
+        return pixels, ok
+
+    dataset = (
+        tf.data.Dataset.from_tensor_slices(paths)
+        .map(load, num_parallel_calls=tf.data.AUTOTUNE, deterministic=True)
+        .batch(batch_size)
+        .prefetch(tf.data.AUTOTUNE)
+    )
+    return dataset.as_numpy_iterator()
+
+
+def thread_batches(paths, size, batch_size, workers, prefetch=4):
+    """Yield (pixels, decoded) batches decoded by a thread pool, keeping prefetch batches ahead"""
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="decode") as executor:
+        pending = deque()
+        starts = iter(range(0, len(paths), batch_size))
+
+        def submit_next():
+            start = next(starts, None)
+            if start is not None:
+                chunk = paths[start:start + batch_size]
+                pending.append([executor.submit(load_pixels, path, size) for path in chunk])
+
+        for _ in range(prefetch):
+            submit_next()
+        while pending:
+            results = [future.result() for future in pending.popleft()]
+            submit_next()
+            yield np.stack([pixels for pixels, _ in results]), np.array([ok for _, ok in results])
+
+
+def classification_report(labels, predicted, class_names):
+    """Accuracy, per-class precision/recall/F1 and the confusion matrix (rows: true class)"""
+    classes = len(class_names)
+    confusion = np.zeros((classes, classes), dtype=np.int64)
+    np.add.at(confusion, (labels, predicted), 1)
+
+    true_positives = np.diag(confusion)
+    support = confusion.sum(axis=1)
+    predicted_count = confusion.sum(axis=0)
+    precision = np.divide(true_positives, predicted_count, out=np.zeros(classes), where=predicted_count > 0)
+    recall = np.divide(true_positives, support, out=np.zeros(classes), where=support > 0)
+    f1 = np.divide(2 * precision * recall, precision + recall,
+                   out=np.zeros(classes), where=(precision + recall) > 0)
+
+    per_class = {
+        class_names[i]: {
+            "precision": round(float(precision[i]), 4),
+            "recall": round(float(recall[i]), 4),
+            "f1": round(float(f1[i]), 4),
+            "support": int(support[i])
+        }
+        for i in range(classes) if support[i] or predicted_count[i]
+    }
+    present = support > 0
+    return {
+        "accuracy": round(float(true_positives.sum() / max(len(labels), 1)), 4),
+        "macro_precision": round(float(precision[present].mean()), 4) if present.any() else 0.0,
+        "macro_recall": round(float(recall[present].mean()), 4) if present.any() else 0.0,
+        "per_class": per_class,
+        "confusion_matrix": confusion.tolist()
+    }
+
+
+def evaluate(model_path, items, batch_size, workers, columns=None, pipeline="auto", shards=None,
+             tta=None, tta_below=0.0):
+    """
+    Run every (path, class index) item through the model; returns (labels,
+    predicted, stats). With a ShardReader as shards, items are its images
+    and their pixels are read from the shards instead of decoded. With a
+    TestTimeAugmenter as tta, images whose top score is under tta_below
+    are classified again on its copies, as the server does.
+    """
+    pool = InterpreterPool(model_path, size=workers, num_threads=1, backend=config.INTERPRETER_BACKEND)
+    height, width = (int(d) for d in pool.input_details[0]['shape'][1:3])
+    write = input_writer(pool.input_details[0])
+    paths = [path for path, _ in items]
+
+    if shards is not None:
+        if shards.image_size != (width, height):
+            raise ValueError(f"Shards hold {shards.image_size} images, the model takes {(width, height)}")
+        pipeline = "shards"
+        batches = ((pixels, np.ones(len(pixels), dtype=bool)) for pixels, _ in shards.batches(batch_size))
+    elif pipeline == "auto":
+        try:
+            import tensorflow  # noqa: F401
+            pipeline = "tf.data"
+        except ImportError:
+            pipeline = "threads"
+    if pipeline == "tf.data":
+        batches = tf_batches(paths, (width, height), batch_size)
+    elif pipeline == "threads":
+        batches = thread_batches(paths, (width, height), batch_size, workers)
+
+    def invoke(interpreter, images, batch_size):
+        def fill(inputs):
+            for i, image in enumerate(images):
+                write(image, inputs[i])
+        return invoke_batch(interpreter, batch_size, fill, rows=len(images))
+
+    def run_batch(interpreter, pixels):
+        scores = invoke(interpreter, pixels, len(pixels))
+        if tta is None:
+            return scores
+
+        # Copies of every low-confidence image, invoked at the same batch size to avoid resizing
+        rows = np.flatnonzero(scores.max(axis=1) < tta_below)
+        if len(rows):
+            variants = np.concatenate([tta.variants(pixels[row]) for row in rows])
+            variant_scores = np.concatenate([
+                invoke(interpreter, variants[start:start + len(pixels)], len(pixels))
+                for start in range(0, len(variants), len(pixels))
+            ]).reshape(len(rows), len(tta), -1)
+            for row, copies in zip(rows, variant_scores):
+                scores[row] = average_scores(scores[row], copies)
+            augmented.append(len(rows))
+        return scores
+
+    started = time.perf_counter()
+    augmented = []
+    predicted = []
+    decoded = []
+    in_flight = deque()
+    try:
+        for pixels, ok in batches:
+            in_flight.append(pool.submit(run_batch, pixels))
+            decoded.append(ok)
+            # Keep every interpreter busy while the pipeline decodes ahead
+            while len(in_flight) > 2 * pool.size:
+                predicted.append(in_flight.popleft().result().argmax(axis=1))
+        while in_flight:
+            predicted.append(in_flight.popleft().result().argmax(axis=1))
+    finally:
+        pool.shutdown()
+    elapsed = time.perf_counter() - started
+
+    predicted = np.concatenate(predicted) if predicted else np.zeros(0, dtype=np.int64)
+    if columns is not None:
+        # Model output column -> served class index
+        predicted = np.argsort(columns)[predicted]
+    decoded = np.concatenate(decoded) if decoded else np.zeros(0, dtype=bool)
+    labels = np.array([class_index for _, class_index in items])
+
+    stats = {
+        "pipeline": pipeline,
+        "backend": pool.backend,
+        "interpreters": pool.size,
+        "batch_size": batch_size,
+        "elapsed_s": round(elapsed, 3),
+        "images_per_sec": round(len(items) / elapsed, 1) if elapsed else 0.0,
+        "decode_errors": int((~decoded).sum())
+    }
+    if tta is not None:
+        stats["tta_images"] = sum(augmented)
+    return labels[decoded], predicted[decoded], stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the served TFLite model on an image directory")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Directory with one folder per class")
+    parser.add_argument("--subset", default="all", choices=["all", "validation", "training"],
+                        help="Images to evaluate, split per class as in the notebook")
+    parser.add_argument("--model", default=config.MODEL_PATH, help="TFLite model to evaluate")
+    parser.add_argument("--labels", help="labels.json giving the model's output order")
+    parser.add_argument("--batch-size", type=int, default=32, help="Images per invoke")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Parallel interpreters")
+    parser.add_argument("--pipeline", default="auto", choices=["auto", "tf.data", "threads"],
+                        help="Decode pipeline (auto uses tf.data when TensorFlow is installed)")
+    parser.add_argument("--shards", help="Read pre-decoded images from this shard directory instead")
+    parser.add_argument("--tta", action="store_true",
+                        help="Re-check images under CONFIDENCE_WARNING_THRESHOLD with test-time augmentation")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    class_names = served_class_names()
+    columns = None
+    if args.labels:
+        with open(args.labels) as f:
+            columns = label_columns(json.load(f), class_names)
+
+    shards = None
+    if args.shards:
+        shards = ShardReader(args.shards, subset=args.subset, class_names=class_names)
+        items = list(zip(shards.paths, shards.labels))
+    else:
+        items = split_files(args.data_dir, subset=args.subset)
+    if not items:
+        sys.exit(f"No images found in {args.shards or args.data_dir}")
+    print(f"Evaluating {args.model} on {len(items)} images", file=sys.stderr)
+
+    tta = TestTimeAugmenter(config.TTA_ANGLES, config.TTA_ZOOM) if args.tta else None
+    labels, predicted, stats = evaluate(
+        args.model, items, args.batch_size, max(1, args.workers), columns, args.pipeline, shards,
+        tta, config.CONFIDENCE_WARNING_THRESHOLD
+    )
+
+    report = {
+        "model": args.model,
+        "data_dir": args.shards or args.data_dir,
+        "subset": args.subset,
+        "images": len(items),
+        **stats,
+        **classification_report(labels, predicted, class_names)
+    }
+
+    body = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(body + "\n")
+        print(f"✓ Accuracy {report['accuracy']}, {report['images_per_sec']} images/sec -> {args.output}",
+              file=sys.stderr)
+    else:
+        print(body)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Explainability (XAI) for AgriVision Pro
+Server-side Grad-CAM heatmaps and overlays, as in the training notebook
+"""
+
+import base64
+import io
+import os
+import threading
+
+import numpy as np
+from PIL import Image
+
+from interpreter_pool import InterpreterPool
+from preprocessing import normalize_into
+
+
+class GradCAMExplainer:
+    """
+    Grad-CAM over the Keras model the TFLite model was converted from.
+
+    TensorFlow and the .h5 model are loaded on first use, so the service
+    starts (and /predict works) without them. Heatmaps are computed on the
+    CPU for the class the served model predicted, from the same decoded
+    pixels that were classified.
+    """
+
+    def __init__(self, model_path, layer_name='out_relu'):
+        self.model_path = model_path
+        self.layer_name = layer_name
+        self._lock = threading.Lock()
+        self._gradcam = None
+
+    def _load(self):
+        with self._lock:
+            if self._gradcam is not None:
+                return self._gradcam
+
+            import tensorflow as tf
+
+            with tf.device('/CPU:0'):
+                model = tf.keras.models.load_model(self.model_path, compile=False)
+                grad_model = tf.keras.models.Model(
+                    model.inputs, [model.get_layer(self.layer_name).output, model.output]
+                )
+
+            @tf.function(reduce_retracing=True)
+            def gradcam(img_array, pred_index):
+                with tf.GradientTape() as tape:
+                    last_conv_layer_output, preds = grad_model(img_array, training=False)
+                    class_channel = preds[:, pred_index]
+
+                # Gradient of the predicted class wrt the output feature map
+                grads = tape.gradient(class_channel, last_conv_layer_output)
+                pooled_grads = tf.reduce_mean(grads, axis=(0, 1, 2))
+
+                # Weight the channels by "importance"
+                heatmap = last_conv_layer_output[0] @ pooled_grads[..., tf.newaxis]
+                return tf.squeeze(heatmap, axis=-1)
+
+            def run(img_array, pred_index):
+                with tf.device('/CPU:0'):
+                    return gradcam(tf.constant(img_array), tf.constant(pred_index)).numpy()
+
+            self._gradcam = run
+            return run
+
+    def heatmap(self, pixels, class_index):
+        """Grad-CAM heatmap in [0, 1] at the conv layer's resolution (7x7 for MobileNetV2)"""
+        img_array = np.empty((1,) + pixels.shape, dtype=np.float32)
+        normalize_into(pixels, img_array[0])
+        return normalize_heatmap(self._load()(img_array, class_index))
+
+
+def normalize_heatmap(heatmap):
+    """Clip negative evidence and scale the heatmap to [0, 1]"""
+    heatmap = np.maximum(heatmap, 0).astype(np.float32)
+    peak = heatmap.max()
+    return heatmap / peak if peak > 0 else heatmap
+
+
+def jet_colormap(values):
+    """Map values in [0, 1] to uint8 RGB using the 'jet' colormap from the notebook"""
+    values = np.clip(values, 0.0, 1.0)[..., np.newaxis]
+    red = np.clip(1.5 - np.abs(4.0 * values - 3.0), 0.0, 1.0)
+    green = np.clip(1.5 - np.abs(4.0 * values - 2.0), 0.0, 1.0)
+    blue = np.clip(1.5 - np.abs(4.0 * values - 1.0), 0.0, 1.0)
+    return (np.concatenate([red, green, blue], axis=-1) * 255).astype(np.uint8)
+
+
+def render_overlay(pixels, heatmap, alpha=0.4):
+    """
+    Blend a heatmap over the image it explains and return PNG bytes.
+    The heatmap is upsampled bicubically for the notebook's "melted" look.
+    """
+    height, width = pixels.shape[:2]
+    upsampled = Image.fromarray(heatmap.astype(np.float32)).resize((width, height), Image.BICUBIC)
+    colors = jet_colormap(np.asarray(upsampled)).astype(np.float32)
+
+    blended = pixels.astype(np.float32) * (1.0 - alpha) + colors * alpha
+    overlay = Image.fromarray(np.clip(blended, 0, 255).astype(np.uint8))
+
+    buffer = io.BytesIO()
+    overlay.save(buffer, format='PNG', optimize=False)
+    return buffer.getvalue()
+
+
+def encode_png(png_bytes):
+    """Base64-encode PNG bytes for embedding in a JSON response"""
+    return base64.b64encode(png_bytes).decode('ascii')
+
+
+class DenseHead:
+    """
+    NumPy copy of the classifier head that sits on top of the conv features:
+    global average pooling, a chain of Dense layers (ReLU or linear) and a
+    final softmax, as built in the training notebook. Weights come from the
+    .npz written by export_tflite.py.
+    """
+
+    def __init__(self, path):
+        with np.load(path) as weights:
+            count = int(weights['layers'])
+            self.kernels = [weights[f'kernel_{i}'] for i in range(count)]
+            self.biases = [weights[f'bias_{i}'] for i in range(count)]
+            self.activations = [str(a) for a in weights['activations']]
+
+    def class_gradient(self, features, class_index):
+        """
+        Gradient of the softmax score of class_index with respect to the
+        pooled features, by backpropagating through the head by hand.
+        """
+        hidden = [features.reshape(-1, features.shape[-1]).mean(axis=0)]
+        for kernel, bias, activation in zip(self.kernels[:-1], self.biases[:-1], self.activations[:-1]):
+            z = hidden[-1] @ kernel + bias
+            hidden.append(np.maximum(z, 0) if activation == 'relu' else z)
+
+        logits = hidden[-1] @ self.kernels[-1] + self.biases[-1]
+        probs = np.exp(logits - logits.max())
+        probs /= probs.sum()
+
+        # d softmax_c / d logits = p_c * (onehot_c - p)
+        grad = -probs[class_index] * probs
+        grad[class_index] += probs[class_index]
+        grad = self.kernels[-1] @ grad
+
+        for i in range(len(self.kernels) - 2, -1, -1):
+            if self.activations[i] == 'relu':
+                grad = grad * (hidden[i + 1] > 0)
+            grad = self.kernels[i] @ grad
+        return grad
+
+
+def class_activation_map(features, head, class_index):
+    """
+    Grad-CAM heatmap computed from the conv features alone, without autodiff.
+
+    After global average pooling every spatial position receives the same
+    gradient, 1/(H*W) times the gradient with respect to the pooled
+    features, so Grad-CAM's channel weights are exactly that pooled
+    gradient up to a positive scale that normalization removes.
+    """
+    weights = head.class_gradient(features, class_index)
+    return normalize_heatmap(features @ weights)
+
+
+class CAMExplainer:
+    """
+    Explanations from the two-output TFLite model written by export_tflite.py.
+
+    One forward pass yields both the class scores and the last conv layer's
+    activations; the heatmap is then a NumPy matrix product, so explaining
+    costs about as much as predicting.
+    """
+
+    def __init__(self, model_path, head_path, pool_size=1, num_threads=1, backend="auto"):
+        self.pool = InterpreterPool(model_path, size=pool_size, num_threads=num_threads, backend=backend)
+        self.head = DenseHead(head_path)
+
+        # Tell the outputs apart by rank: (1, H, W, C) features and (1, classes) scores
+        outputs = self.pool.output_details
+        self.features_index = next(o['index'] for o in outputs if len(o['shape']) == 4)
+        self.scores_index = next(o['index'] for o in outputs if len(o['shape']) == 2)
+        self.input_index = self.pool.input_details[0]['index']
+        input_shape = self.pool.input_details[0]['shape']
+        self.image_size = (int(input_shape[2]), int(input_shape[1]))  # (width, height) for decode_image
+        self.version = os.path.splitext(os.path.basename(model_path))[0]
+
+    def warm_up(self):
+        """Run one synthetic image through every interpreter (blocking)"""
+        width, height = self.image_size
+        self.pool.run_on_each(self._forward, np.zeros((height, width, 3), dtype=np.uint8))
+
+    def _forward(self, interpreter, pixels):
+        normalize_into(pixels, interpreter.tensor(self.input_index)()[0])
+        interpreter.invoke()
+        return interpreter.get_tensor(self.scores_index)[0], interpreter.get_tensor(self.features_index)[0]
+
+    def _explain(self, interpreter, pixels):
+        scores, features = self._forward(interpreter, pixels)
+        class_index = int(np.argmax(scores))
+        return scores, class_activation_map(features, self.head, class_index)
+
+    async def explain(self, pixels):
+        """Class scores and the heatmap for the top class, from one forward pass"""
+        return await self.pool.run(self._explain, pixels)
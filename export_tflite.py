@@ -0,0 +1,170 @@
+"""
+AgriVision Pro - TFLite Export
+Converts the trained Keras model (.h5) into the models main.py serves.
+This is the notebook's TFLiteConverter cell as a repeatable script.
+
+Writes:
+  - the edge model: class scores only, served by /predict
+  - the CAM model: out_relu activations and class scores as two outputs
+  - the CAM head: weights of the Dense layers after global average pooling,
+    which /explain uses to turn activations into heatmaps in NumPy
+  - with --int8, a full-integer edge model with uint8 input and output,
+    calibrated on images from the training split
+
+Usage:
+    python export_tflite.py --keras-model AgriVision_XAI_Model.h5
+    python export_tflite.py --int8 --calibration-dir "dataset/plantvillage dataset/color"
+"""
+
+import argparse
+import os
+
+import numpy as np
+import tensorflow as tf
+
+import config
+from dataset import DATA_DIR, sample_per_class, split_files
+from preprocessing import PIXEL_SCALE, decode_image
+from shards import ShardReader
+
+
+def convert(model):
+    """Convert a Keras model with the notebook's dynamic-range optimization"""
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    # Optimize for size (this is the Edge Computing magic)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    return converter.convert()
+
+
+def representative_dataset(data_dir, samples, size, shards=None):
+    """
+    Calibration images for full-integer quantization: up to samples images
+    from the training split, spread over the classes, preprocessed the way
+    the float model saw them in training (RGB resized, scaled to [0, 1]).
+    With a shard directory the images are read from it, already decoded.
+    """
+    if shards:
+        reader = ShardReader(shards, subset="training")
+        if reader.image_size != size:
+            raise ValueError(f"Shards hold {reader.image_size} images, the model takes {size}")
+        indices = [i for i, _ in sample_per_class(list(enumerate(reader.labels)), samples)]
+        load = reader.read
+    else:
+        items = sample_per_class(split_files(data_dir, subset="training"), samples)
+        indices = [path for path, _ in items]
+
+        def load(paths):
+            with open(paths[0], 'rb') as f:
+                return decode_image(f.read(), size)[np.newaxis]
+
+    if not indices:
+        raise ValueError(f"No calibration images found in {shards or data_dir}")
+    print(f"Calibrating on {len(indices)} images from {shards or data_dir}")
+
+    def generate():
+        for index in indices:
+            yield [load([index]) * PIXEL_SCALE]
+    return generate
+
+
+def convert_int8(model, dataset):
+    """
+    Convert a Keras model to a full-integer model: INT8 weights and
+    activations, with uint8 input and output tensors. Calibrating on
+    [0, 1] images gives the input a scale of 1/255 and zero point 0, so
+    the server can feed decoded pixels to it unchanged.
+    """
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.uint8
+    converter.inference_output_type = tf.uint8
+    return converter.convert()
+
+
+def head_layers(model, layer_name):
+    """
+    The layers between the feature layer and the output, checked to be the
+    GlobalAveragePooling2D -> Dense/Dropout -> Dense(softmax) head that
+    DenseHead in explain.py knows how to differentiate.
+    """
+    names = [layer.name for layer in model.layers]
+    layers = model.layers[names.index(layer_name) + 1:]
+
+    if not layers or not isinstance(layers[0], tf.keras.layers.GlobalAveragePooling2D):
+        raise ValueError(f"Expected GlobalAveragePooling2D right after '{layer_name}'")
+
+    dense = []
+    for layer in layers[1:]:
+        if isinstance(layer, tf.keras.layers.Dropout):
+            continue  # Inactive at inference time
+        if not isinstance(layer, tf.keras.layers.Dense):
+            raise ValueError(f"Unsupported layer in classifier head: {layer.name}")
+        dense.append(layer)
+
+    activations = [layer.get_config()['activation'] for layer in dense]
+    if activations[-1] != 'softmax' or any(a not in ('relu', 'linear') for a in activations[:-1]):
+        raise ValueError(f"Unsupported head activations: {activations}")
+    return dense
+
+
+def save_head(dense_layers, path):
+    """Save Dense kernels, biases and activations in the layout DenseHead reads"""
+    weights = {'layers': np.array(len(dense_layers))}
+    for i, layer in enumerate(dense_layers):
+        kernel, bias = layer.get_weights()
+        weights[f'kernel_{i}'] = kernel.astype(np.float32)
+        weights[f'bias_{i}'] = bias.astype(np.float32)
+    weights['activations'] = np.array([layer.get_config()['activation'] for layer in dense_layers])
+    np.savez(path, **weights)
+
+
+def write(path, contents):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(contents)
+    print(f"✓ Wrote {path} ({len(contents) / 1024 / 1024:.2f} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export AgriVision TFLite models")
+    parser.add_argument("--keras-model", default=config.KERAS_MODEL_PATH, help="Trained .h5 model")
+    parser.add_argument("--output", default=config.MODEL_PATH, help="Edge model for /predict")
+    parser.add_argument("--cam-output", default=config.CAM_MODEL_PATH, help="Two-output model for /explain")
+    parser.add_argument("--head-output", default=config.CAM_HEAD_PATH, help="Classifier head weights (.npz)")
+    parser.add_argument("--layer", default=config.GRADCAM_LAYER, help="Conv layer to explain")
+    parser.add_argument("--skip-cam", action="store_true", help="Only export the edge model")
+    parser.add_argument("--int8", action="store_true", help="Also export a full-integer INT8 edge model")
+    parser.add_argument("--int8-output", default=config.INT8_MODEL_PATH, help="Full-integer edge model")
+    parser.add_argument("--calibration-dir", default=DATA_DIR, help="PlantVillage class folders to calibrate on")
+    parser.add_argument("--calibration-shards", help="Calibrate on a shard directory packed by shards.py instead")
+    parser.add_argument("--calibration-samples", type=int, default=300, help="Calibration images to use")
+    args = parser.parse_args()
+
+    model = tf.keras.models.load_model(args.keras_model, compile=False)
+    print(f"Loaded {args.keras_model}")
+
+    write(args.output, convert(model))
+
+    if args.int8:
+        size = (int(model.input_shape[2]), int(model.input_shape[1]))
+        dataset = representative_dataset(args.calibration_dir, args.calibration_samples, size,
+                                         args.calibration_shards)
+        write(args.int8_output, convert_int8(model, dataset))
+
+    if args.skip_cam:
+        return
+
+    dense_layers = head_layers(model, args.layer)
+    cam_model = tf.keras.models.Model(
+        model.inputs, [model.get_layer(args.layer).output, model.output]
+    )
+    write(args.cam_output, convert(cam_model))
+
+    save_head(dense_layers, args.head_output)
+    print(f"✓ Wrote {args.head_output} ({len(dense_layers)} Dense layers)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Interpreter pool for AgriVision Pro
+Keeps several TFLite interpreters so overlapping requests run in parallel
+"""
+
+import asyncio
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from backends import create_interpreter, load_backend
+
+
+class InterpreterPool:
+    """
+    A fixed set of TFLite interpreters served by a worker thread pool.
+
+    A TFLite interpreter is not safe to share between threads, so every
+    worker checks one out, runs its job and hands it back. Inference runs
+    in the executor, keeping the event loop free for other requests.
+
+    With batch_sizes, each of the size slots is instead a {batch size:
+    interpreter} dict with one interpreter per size, its input resized and
+    allocated once here, so switching batch size never reallocates tensors.
+    Every interpreter is a full copy in memory: besides its tensor arena,
+    XNNPACK packs its own copy of the weights, so for MobileNetV2 each
+    batch-1 interpreter adds about 15 MB and each batch-8 one about 55 MB.
+    Keep batch_sizes short.
+    """
+
+    def __init__(self, model_path, size, num_threads=1, backend="auto", batch_sizes=None):
+        if size < 1:
+            raise ValueError("Interpreter pool size must be at least 1")
+
+        self.model_path = model_path
+        self.size = size
+        self.batch_sizes = tuple(batch_sizes) if batch_sizes is not None else None
+        self.backend, _ = load_backend(backend)
+        self._idle = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="tflite")
+
+        for _ in range(size):
+            if self.batch_sizes is None:
+                interpreter = create_interpreter(model_path, num_threads=num_threads, backend=self.backend)
+                interpreter.allocate_tensors()
+                self._idle.put(interpreter)
+            else:
+                self._idle.put({
+                    batch_size: self._allocated(batch_size, num_threads) for batch_size in self.batch_sizes
+                })
+
+        # All interpreters share the same model, so any of them describes it
+        sample = self._idle.queue[0]
+        if self.batch_sizes is not None:
+            sample = sample[self.batch_sizes[0]]
+        self.input_details = sample.get_input_details()
+        self.output_details = sample.get_output_details()
+
+    def _allocated(self, batch_size, num_threads):
+        """A new interpreter with its input's batch dimension resized to batch_size"""
+        interpreter = create_interpreter(self.model_path, num_threads=num_threads, backend=self.backend)
+        input_detail = interpreter.get_input_details()[0]
+        shape = list(input_detail['shape'])
+        shape[0] = batch_size
+        interpreter.resize_tensor_input(input_detail['index'], shape)
+        interpreter.allocate_tensors()
+        return interpreter
+
+    def _run(self, fn, *args):
+        """Check out an interpreter, run fn(interpreter, *args) and return it to the pool"""
+        interpreter = self._idle.get()
+        try:
+            return fn(interpreter, *args)
+        finally:
+            self._idle.put(interpreter)
+
+    def busy(self):
+        """Number of interpreters currently checked out"""
+        return self.size - self._idle.qsize()
+
+    def run_on_each(self, fn, *args):
+        """
+        Run fn(interpreter, *args) on every interpreter in turn, on the
+        calling thread, and return the results. Waits until the whole pool
+        is idle, so it is meant for setup work such as warm-up.
+        """
+        interpreters = [self._idle.get() for _ in range(self.size)]
+        try:
+            return [fn(interpreter, *args) for interpreter in interpreters]
+        finally:
+            for interpreter in interpreters:
+                self._idle.put(interpreter)
+
+    def submit(self, fn, *args):
+        """Run fn(interpreter, *args) on a worker thread; returns a concurrent.futures.Future"""
+        return self._executor.submit(self._run, fn, *args)
+
+    async def run(self, fn, *args):
+        """Run fn(interpreter, *args) on a worker thread without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._run, fn, *args)
+
+    def shutdown(self):
+        """Stop the worker threads once queued jobs have finished"""
+        self._executor.shutdown(wait=True)
+
+
+def invoke_batch(interpreter, batch_size, fill, rows=None):
+    """
+    Run one invoke over a batch written in place into the input tensor.
+
+    The input's batch dimension is resized first if it differs from the
+    last call on this interpreter. fill(inputs) receives a NumPy view of the
+    interpreter's own input tensor and writes the batch straight into it,
+    so no intermediate batch array or set_tensor copy is needed. The first
+    rows output rows (all by default) are copied out of the output tensor,
+    which the next invoke overwrites; quantized outputs are dequantized to
+    float32 on the way out.
+
+    Views into interpreter memory must not outlive this call: invoke and
+    allocate_tensors refuse to run while any are still referenced.
+    """
+    input_detail = interpreter.get_input_details()[0]
+    output_detail = interpreter.get_output_details()[0]
+
+    if input_detail['shape'][0] != batch_size:
+        shape = list(input_detail['shape'])
+        shape[0] = batch_size
+        interpreter.resize_tensor_input(input_detail['index'], shape)
+        interpreter.allocate_tensors()
+
+    fill(interpreter.tensor(input_detail['index'])())
+    interpreter.invoke()
+
+    scores = interpreter.tensor(output_detail['index'])()
+    if scores.dtype.kind == 'f':
+        return scores[:rows].copy()
+    scale, zero_point = output_detail['quantization']
+    return (scores[:rows].astype(np.float32) - zero_point) * np.float32(scale)
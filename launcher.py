@@ -0,0 +1,174 @@
+"""
+Multi-process launcher for AgriVision Pro
+Runs several uvicorn workers on one socket with CPU budgets that never oversubscribe the machine
+"""
+
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+# Set by the launcher in each worker before main.py is imported
+WORKER_CPUS_ENV = "AGRIVISION_WORKER_CPUS"
+
+
+def available_cpus():
+    """CPU ids this process may run on"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def in_worker():
+    """True in a worker process started by serve(), which shares its listening socket with the others"""
+    return WORKER_CPUS_ENV in os.environ
+
+
+def worker_cpu_count():
+    """CPUs this worker may use: its launcher budget, or every available CPU"""
+    return int(os.environ.get(WORKER_CPUS_ENV, 0)) or len(available_cpus())
+
+
+def interpreter_budget(pool_size, threads_per_interpreter):
+    """
+    Shrink the interpreter pool so pool size x intra-op threads fits this
+    worker's CPUs; with several workers the totals then never exceed the
+    cores of the machine.
+    """
+    fits = max(1, worker_cpu_count() // max(1, threads_per_interpreter))
+    return min(pool_size, fits)
+
+
+def cpu_slices(cpus, workers):
+    """
+    Split CPU ids into one disjoint, contiguous slice per worker, the first
+    len(cpus) % workers slices one CPU larger. Raises ValueError when there
+    are fewer CPUs than workers, as the slices would have to overlap.
+    """
+    if not 1 <= workers <= len(cpus):
+        raise ValueError(f"Cannot give {workers} workers disjoint slices of {len(cpus)} CPUs")
+    per_worker, extra = divmod(len(cpus), workers)
+    slices = []
+    start = 0
+    for i in range(workers):
+        end = start + per_worker + (1 if i < extra else 0)
+        slices.append(cpus[start:end])
+        start = end
+    return slices
+
+
+def run_worker(app, fd, cpus, log_level="info"):
+    """Serve app on an inherited listening socket, pinned to cpus"""
+    # Pin before importing the app so every thread it starts inherits the mask
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    os.environ[WORKER_CPUS_ENV] = str(len(cpus))
+
+    import uvicorn
+
+    sock = socket.socket(fileno=fd)
+    server = uvicorn.Server(uvicorn.Config(app, log_level=log_level))
+    server.run(sockets=[sock])
+
+
+def serve(app, host, port, workers=1, log_level="info"):
+    """
+    Serve app with the given number of worker processes. app is an ASGI
+    app or a "module:attribute" string; workers > 1 needs the string.
+
+    The parent binds the socket once and every worker accepts on it. Each
+    worker is pinned to its own slice of the CPUs. All of them open the
+    model by path, which TFLite memory-maps, so the weights sit once in the
+    page cache however many workers there are. Workers that die are
+    restarted until the launcher receives SIGINT or SIGTERM. workers is
+    capped at the available CPUs so no two workers share a core.
+    """
+    import uvicorn
+
+    if workers > 1 and os.name == "nt":
+        print("Multiple workers need POSIX socket inheritance; starting a single worker")
+        workers = 1
+    cpus = available_cpus()
+    if workers > len(cpus):
+        print(f"{workers} workers requested but only {len(cpus)} CPUs are available; starting {len(cpus)}")
+        workers = len(cpus)
+    if workers <= 1:
+        uvicorn.run(app, host=host, port=port, log_level=log_level)
+        return
+
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    slices = cpu_slices(cpus, workers)
+    processes = [None] * workers
+    stopping = False
+
+    # Workers are fresh interpreters that import the app by name, so the
+    # launching script is never re-executed and the model loads once each
+    env = dict(os.environ)
+    for variable in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        env.setdefault(variable, "1")
+
+    def start(i):
+        command = [
+            sys.executable, "-m", "launcher", app,
+            "--fd", str(sock.fileno()),
+            "--cpus", ",".join(map(str, slices[i])),
+            "--log-level", log_level
+        ]
+        process = subprocess.Popen(
+            command, cwd=os.path.dirname(os.path.abspath(__file__)), env=env, pass_fds=[sock.fileno()]
+        )
+        processes[i] = process
+        print(f"Started worker {i} (pid {process.pid}) on CPUs {slices[i]}")
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for i in range(workers):
+        start(i)
+
+    try:
+        while not stopping:
+            for i, process in enumerate(processes):
+                if process.poll() is not None:
+                    print(f"Worker {i} exited with code {process.returncode}, restarting")
+                    start(i)
+            time.sleep(0.5)
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run AgriVision Pro with config.WORKERS worker processes")
+    parser.add_argument("app", nargs="?", default="main:app", help="ASGI app as module:attribute")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: config.WORKERS)")
+    parser.add_argument("--fd", type=int, help=argparse.SUPPRESS)  # Worker mode, set by serve()
+    parser.add_argument("--cpus", help=argparse.SUPPRESS)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    if args.fd is not None:
+        run_worker(args.app, args.fd, [int(cpu) for cpu in args.cpus.split(",")], args.log_level)
+    else:
+        # Unlike `python main.py`, the supervisor never loads the model itself
+        import config
+        serve(args.app, config.HOST, config.PORT, args.workers or config.WORKERS, args.log_level)
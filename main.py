@@ -1,12 +1,28 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse, FileResponse
-import tensorflow as tf
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse, Response
 import numpy as np
 from PIL import Image
-import io
+import asyncio
+import time
 import os
-from pathlib import Path
+import io
+from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from preprocessing import open_image, resize_image
+from responses import FastJSONResponse, ResponseFragments, dumps
+from cache import PredictionCache, content_hash
+from explain import encode_png, render_overlay
+from admission import AdmissionControl, LoadShedder, RateLimiter
+from uploads import RequestTooLarge, UploadLimit, UploadPolicy, UploadRejected, is_archive, iter_archive_images
+from registry import ModelRegistry
+from postprocessing import Postprocessor
+from tiling import field_counts, tile_views, working_size
+from tta import TestTimeAugmenter, average_scores
+from metrics import CONTENT_TYPE, MetricSet, RequestTimer
+from launcher import in_worker, interpreter_budget, serve
 
 app = FastAPI(title="AgriVision Pro - Plant Disease Detection")
 
@@ -518,29 +534,449 @@ PLANT_DISEASES = {
     }
 }
 
-# Load the TFLite model
-MODEL_PATH = "models/agrivision_edge_model.tflite"
+UNKNOWN_DISEASE = {
+    "name": "Unknown",
+    "plant": "Unknown",
+    "disease": "Unknown",
+    "treatment": ["Unable to determine treatment"]
+}
 
-try:
-    interpreter = tf.lite.Interpreter(model_path=MODEL_PATH)
-    interpreter.allocate_tensors()
-    
-    input_details = interpreter.get_input_details()
-    output_details = interpreter.get_output_details()
-    
-    input_shape = input_details[0]['shape']
-    IMG_HEIGHT = input_shape[1]
-    IMG_WIDTH = input_shape[2]
-    
-    print(f"Model loaded successfully. Input shape: {input_shape}")
-except Exception as e:
-    print(f"Error loading model: {e}")
-    interpreter = None
+# Disease metadata is JSON-encoded once; responses only splice in per-request fields
+response_fragments = ResponseFragments(PLANT_DISEASES, UNKNOWN_DISEASE)
+
+# Predictions below this top confidence are flagged "uncertain" so the client can ask for a retake
+UNCERTAIN_BELOW = config.CONFIDENCE_WARNING_THRESHOLD if config.SHOW_CONFIDENCE_THRESHOLD_WARNING else 0.0
+
+# Model versions postprocess per batch; this one is for TTA's averaged scores, already in served order
+postprocess_scores = Postprocessor(config.TOP_K_PREDICTIONS, config.CONFIDENCE_THRESHOLD, UNCERTAIN_BELOW)
+# Flipped, rotated and zoomed copies for predictions under CONFIDENCE_WARNING_THRESHOLD
+test_time_augmenter = TestTimeAugmenter(config.TTA_ANGLES, config.TTA_ZOOM) if config.ENABLE_TTA else None
+
+# Where inference time goes, exposed at /metrics
+metrics = MetricSet()
+stage_seconds = metrics.histogram(
+    "agrivision_stage_seconds", "Time spent in each stage of the inference path", labels=("stage",)
+)
+request_seconds = metrics.histogram(
+    "agrivision_request_seconds", "Request latency until response headers", labels=("endpoint", "status")
+)
+predictions_total = metrics.counter(
+    "agrivision_predictions_total", "Predictions served, by predicted class", labels=("class", "model_version")
+)
+tta_total = metrics.counter(
+    "agrivision_tta_total", "Low-confidence predictions re-checked with test-time augmentation",
+    labels=("outcome",)
+)
+errors_total = metrics.counter(
+    "agrivision_errors_total", "Failed requests and batch images, by error type", labels=("endpoint", "type")
+)
+shed_total = metrics.counter(
+    "agrivision_shed_total", "Requests refused by admission control", labels=("endpoint", "reason")
+)
+# Oversized request bodies are refused before they are parsed or spooled
+MULTIPART_OVERHEAD = 64 * 1024
+app.add_middleware(
+    UploadLimit,
+    max_bytes=config.MAX_FILE_SIZE_MB * 1024 * 1024 + MULTIPART_OVERHEAD,
+    path_limits={
+        "/predict/batch": config.MAX_BATCH_UPLOAD_MB * 1024 * 1024,
+        "/predict/tiled": config.MAX_TILED_FILE_SIZE_MB * 1024 * 1024 + MULTIPART_OVERHEAD
+    },
+    on_reject=lambda path: errors_total.inc(path, "RequestTooLarge")
+)
+
+def inference_load():
+    """(Images waiting for or in inference, estimated seconds before a new one is answered)"""
+    batchers = [model.batcher for model in registry.versions()]
+    queued = sum(batcher.outstanding for batcher in batchers)
+    return queued, max((batcher.estimated_wait() for batcher in batchers), default=0.0)
+
+load_shedder = LoadShedder(
+    inference_load, config.MAX_QUEUE_WAIT_MS / 1000, config.MAX_QUEUED_IMAGES
+) if config.ENABLE_LOAD_SHEDDING else None
+
+def current_load():
+    """inference_load(), with requests admitted but not yet queued when load shedding counts them"""
+    return load_shedder.backlog() if load_shedder is not None else inference_load()
+
+# Over-limit clients get 429 and, while the backlog is too long, everyone gets 503, before the body is read
+app.add_middleware(
+    AdmissionControl,
+    paths={"/predict", "/predict/batch", "/predict/tiled", "/explain"},
+    limiter=RateLimiter(config.RATE_LIMIT, config.RATE_LIMIT_BURST) if config.ENABLE_RATE_LIMITING else None,
+    shedder=load_shedder,
+    on_shed=lambda path, reason: shed_total.inc(path, reason),
+    trust_forwarded_for=config.TRUST_FORWARDED_FOR
+)
+if config.ENABLE_METRICS:
+    app.add_middleware(RequestTimer, histogram=request_seconds)
+
+@app.exception_handler(RequestTooLarge)
+async def request_too_large(request: Request, exc: RequestTooLarge):
+    """Answer bodies cut off by UploadLimit in the same shape as other errors"""
+    return JSONResponse({"success": False, "error": exc.detail}, status_code=413)
+
+# Every image is size-capped, sniffed and header-checked before it is decoded
+upload_policy = UploadPolicy(
+    max_bytes=config.MAX_FILE_SIZE_MB * 1024 * 1024,
+    allowed_extensions=config.ALLOWED_IMAGE_EXTENSIONS,
+    max_pixels=config.MAX_IMAGE_PIXELS,
+    check_magic=config.VALIDATE_FILE_MAGIC_BYTES,
+    check_extension=config.VALIDATE_FILE_EXTENSION,
+    chunk_size=config.UPLOAD_CHUNK_KB * 1024
+)
+# Field and drone photos for /predict/tiled may be larger
+tiled_upload_policy = UploadPolicy(
+    max_bytes=config.MAX_TILED_FILE_SIZE_MB * 1024 * 1024,
+    allowed_extensions=config.ALLOWED_IMAGE_EXTENSIONS,
+    max_pixels=config.MAX_TILED_IMAGE_PIXELS,
+    check_magic=config.VALIDATE_FILE_MAGIC_BYTES,
+    check_extension=config.VALIDATE_FILE_EXTENSION,
+    chunk_size=config.UPLOAD_CHUNK_KB * 1024
+)
+# Each tiled image holds up to TILE_MAX_PIXELS decoded pixels while its tiles are classified
+tiled_slots = asyncio.Semaphore(config.TILED_MAX_CONCURRENT)
+HEALTHY_CLASSES = np.array(["healthy" in config.DISEASE_CLASSES[i] for i in sorted(config.DISEASE_CLASSES)])
+
+# Repeat uploads of the same photo skip decode and inference
+prediction_cache = None
+if config.ENABLE_PREDICTION_CACHE:
+    prediction_cache = PredictionCache(
+        max_entries=config.PREDICTION_CACHE_SIZE,
+        ttl=config.PREDICTION_CACHE_TTL_S
+    )
+
+def models_changed(registry):
+    """Keep the prediction cache to the model versions now being served"""
+    if prediction_cache is not None:
+        prediction_cache.set_models(registry.digests())
+
+# Load the TFLite model from the versioned registry (or MODEL_PATH) into a pool of interpreters
+MODEL_PATH = config.MODEL_PATH
+
+registry = ModelRegistry(
+    config.MODEL_REGISTRY_DIR,
+    MODEL_PATH,
+    class_names=[config.DISEASE_CLASSES[i] for i in sorted(config.DISEASE_CLASSES)],
+    pinned=config.MODEL_VERSION,
+    canary_percent=config.CANARY_PERCENT,
+    on_change=models_changed,
+    warm_up=config.ENABLE_WARMUP,
+    fallback_cam=(config.CAM_MODEL_PATH, config.CAM_HEAD_PATH),
+    fallback_keras=config.KERAS_MODEL_PATH,
+    gradcam_layer=config.GRADCAM_LAYER,
+    pool_size=interpreter_budget(config.INTERPRETER_POOL_SIZE, config.INTERPRETER_THREADS),
+    num_threads=config.INTERPRETER_THREADS,
+    backend=config.INTERPRETER_BACKEND,
+    max_batch_size=config.MAX_BATCH_SIZE,
+    batch_sizes=config.BATCH_BUCKETS,
+    max_wait_ms=config.BATCH_TIMEOUT_MS,
+    on_stage=lambda stage, seconds: stage_seconds.observe(seconds, stage),
+    top_k=config.TOP_K_PREDICTIONS,
+    min_confidence=config.CONFIDENCE_THRESHOLD,
+    uncertain_below=UNCERTAIN_BELOW,
+    cam_pool_size=config.CAM_POOL_SIZE
+)
+
+def load_model():
+    """Load the initial model version, unless one is already loaded (blocking)"""
+    if registry.stable is not None:
+        return
+    try:
+        model = registry.load()
+        print(f"Model loaded successfully. Version: {model.version}, input size: {model.image_size}, "
+              f"interpreters: {model.pool.size}, backend: {model.pool.backend}")
+    except Exception as e:
+        print(f"Error loading model: {e}")
+
+registry_watcher = None
+warmup_task = None
+shutting_down = False
+
+metrics.gauge(
+    "agrivision_queue_depth", "Images waiting to be batched",
+    lambda: {(model.version,): model.batcher.queue_depth() for model in registry.versions()},
+    labels=("model_version",)
+)
+metrics.gauge(
+    "agrivision_interpreters_busy", "Pooled interpreters running a batch",
+    lambda: {(model.version,): model.pool.busy() for model in registry.versions()},
+    labels=("model_version",)
+)
+metrics.gauge(
+    "agrivision_pool_utilization", "Fraction of pooled interpreters running a batch",
+    lambda: {(model.version,): model.pool.busy() / model.pool.size for model in registry.versions()},
+    labels=("model_version",)
+)
+metrics.gauge(
+    "agrivision_estimated_wait_seconds", "Estimated wait before a new image is answered, used for load shedding",
+    lambda: current_load()[1]
+)
+metrics.gauge("agrivision_ready", "1 when the service is ready for traffic", lambda: int(is_ready()))
+
+# Versions without a CAM companion are explained by Grad-CAM on their own Keras model, which runs on its own thread
+# so it never holds up /predict. Each version's Keras model is loaded on its first /explain request.
+explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gradcam")
+explain_pending = 0
+
+def explain_finished(job):
+    """Release an explainer slot once a Grad-CAM job ends, even after a timeout"""
+    global explain_pending
+    explain_pending -= 1
 
 # Mount static files
 if os.path.exists("static"):
     app.mount("/static", StaticFiles(directory="static"), name="static")
 
+def describe_prediction(prediction):
+    """Turn one Prediction into the response fields for that image, as a dict"""
+    predicted_class = prediction.top_class
+    confidence = prediction.confidence
+    
+    # Get disease information
+    disease_info = PLANT_DISEASES.get(predicted_class, UNKNOWN_DISEASE)
+    
+    return {
+        "class": predicted_class,
+        "confidence": confidence,
+        "confidence_percentage": f"{confidence * 100:.2f}%",
+        "uncertain": prediction.uncertain,
+        **({"tta_views": prediction.views} if prediction.views > 1 else {}),
+        "top_k": [
+            {
+                "class": int(class_index),
+                "full_name": PLANT_DISEASES.get(int(class_index), UNKNOWN_DISEASE)["name"],
+                "confidence": float(score)
+            }
+            for class_index, score in zip(prediction.classes, prediction.confidences)
+        ],
+        "plant": disease_info["plant"],
+        "disease": disease_info["disease"],
+        "full_name": disease_info["name"],
+        "treatment": disease_info["treatment"]
+    }
+
+def render_prediction(prediction, extra=None):
+    """Encode one Prediction as a JSON response body from the pre-encoded fragments"""
+    if prediction.views > 1:
+        extra = {**(extra or {}), "tta_views": prediction.views}
+    return response_fragments.render(
+        prediction.top_class,
+        prediction.confidence,
+        extra,
+        top_k=(prediction.classes, prediction.confidences),
+        uncertain=prediction.uncertain
+    )
+
+def decode_timed(contents, size):
+    """Decode and resize image bytes, recording each stage"""
+    with stage_seconds.time("decode"):
+        image = open_image(contents, size)
+    with stage_seconds.time("resize"):
+        return resize_image(image, size)
+
+async def decode_upload(contents, size):
+    """Decode raw image bytes to model-sized uint8 pixels off the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, decode_timed, contents, size)
+
+async def augment_prediction(model, pixels, prediction):
+    """
+    Re-check a low-confidence prediction on augmented copies of its image.
+    The copies reach the micro-batcher together, so they share one invoke;
+    their class scores are averaged with the original's.
+    """
+    with stage_seconds.time("tta"):
+        loop = asyncio.get_running_loop()
+        variants = await loop.run_in_executor(None, test_time_augmenter.variants, pixels)
+        results = await asyncio.gather(*(model.predict(variant) for variant in variants))
+    
+    augmented = postprocess_scores.one(average_scores(prediction.scores, [result.scores for result in results]))
+    tta_total.inc("changed" if augmented.top_class != prediction.top_class else "confirmed")
+    return augmented._replace(views=len(results) + 1)
+
+async def classify_image(contents):
+    """
+    Prediction and model version for raw image bytes, answering repeat
+    uploads from the prediction cache and decoding the rest for the next
+    micro-batch of whichever model version the upload is routed to.
+    With ENABLE_TTA, low-confidence predictions are re-checked on augmented
+    copies before they are cached.
+    """
+    upload_hash = content_hash(contents)
+    with registry.acquire(upload_hash) as model:
+        key = (model.digest, upload_hash)
+        cached = prediction_cache.get(key) if prediction_cache is not None else None
+        if cached is None:
+            pixels = await decode_upload(contents, model.image_size)
+            prediction = await model.predict(pixels)
+            if test_time_augmenter is not None and prediction.confidence < config.CONFIDENCE_WARNING_THRESHOLD:
+                prediction = await augment_prediction(model, pixels, prediction)
+    
+    if cached is not None:
+        prediction = cached
+    elif prediction_cache is not None:
+        prediction_cache.put(key, prediction)
+    predictions_total.inc(config.DISEASE_CLASSES.get(prediction.top_class, "Unknown"), model.version)
+    return prediction, model.version
+
+def format_explanation(pixels, heatmap, method, output):
+    """Render a heatmap in the requested formats"""
+    explanation = {"method": method, "layer": config.GRADCAM_LAYER}
+    
+    if output in ("grid", "both"):
+        explanation["grid"] = np.round(heatmap, 4).tolist()
+    if output in ("png", "both"):
+        overlay = render_overlay(pixels, heatmap, alpha=config.EXPLAIN_OVERLAY_ALPHA)
+        explanation["overlay_png"] = encode_png(overlay)
+    
+    return explanation
+
+def build_explanation(gradcam, pixels, column, output):
+    """Compute a Grad-CAM heatmap for a model output column and render it (runs on the Grad-CAM thread)"""
+    heatmap = gradcam.heatmap(pixels, column)
+    return format_explanation(pixels, heatmap, "grad-cam", output)
+
+async def iter_batch_upload(files):
+    """
+    Yield (filename, source) pairs from a list of images or a single
+    archive; source is an archive member's bytes or an unread UploadFile
+    """
+    if len(files) == 1 and is_archive(files[0].filename):
+        # Archive members are read one at a time from the spooled upload. Listing,
+        # seeking and decompressing block, so each step runs off the event loop.
+        members = iter_archive_images(
+            files[0].filename,
+            files[0].file,
+            config.ALLOWED_IMAGE_EXTENSIONS,
+            max_images=config.MAX_BATCH_IMAGES,
+            max_member_bytes=config.MAX_FILE_SIZE_MB * 1024 * 1024
+        )
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                item = await loop.run_in_executor(None, next, members, None)
+                if item is None:
+                    return
+                yield item
+        finally:
+            try:
+                members.close()
+            except ValueError:
+                pass  # Cancelled mid-read: still running on its thread, and closed once collected
+    
+    for file in files:
+        yield file.filename, file
+
+async def read_batch_item(filename, source):
+    """Validated bytes of one batch image, read now if it is still an UploadFile"""
+    if isinstance(source, bytes):
+        return upload_policy.check(filename, source)
+    with stage_seconds.time("read_upload"):
+        return await upload_policy.read(source)
+
+def decode_tiled(contents, tile_size):
+    """(original size, pixels) of an upload decoded at its tiling resolution"""
+    with Image.open(io.BytesIO(contents)) as image:
+        original_size = image.size
+    return original_size, decode_timed(contents, working_size(original_size, tile_size, config.TILE_MAX_PIXELS))
+
+async def classify_tiles(model, tiles):
+    """
+    Predictions for every tile of a (rows, cols, height, width, 3) view, row by
+    row. Tiles go to the micro-batcher a few full batches at a time, so a
+    large image never floods the queue ahead of other requests.
+    """
+    views = [tiles[row, col] for row in range(tiles.shape[0]) for col in range(tiles.shape[1])]
+    chunk = model.batcher.max_batch_size * model.pool.size
+    predictions = []
+    for start in range(0, len(views), chunk):
+        predictions.extend(await asyncio.gather(*(model.predict(view) for view in views[start:start + chunk])))
+    return predictions
+
+def describe_field(predictions, grid):
+    """Per-tile grid and field-level counts for the tiles of one image, laid out as grid"""
+    rows, cols = grid.rows, grid.cols
+    classes = np.array([prediction.top_class for prediction in predictions])
+    confidences = np.array([prediction.confidence for prediction in predictions])
+    uncertain = confidences < config.TILE_MIN_CONFIDENCE
+    counts, mean_confidence = field_counts(classes, confidences, uncertain, len(HEALTHY_CLASSES))
+    
+    confident = int(counts.sum())
+    diseased = int(counts[~HEALTHY_CLASSES].sum())
+    return {
+        "grid": {
+            "rows": rows,
+            "cols": cols,
+            "tile_size": list(grid.tile_size),
+            "origin": list(grid.origin),
+            "stride": list(grid.stride),
+            "classes": classes.reshape(rows, cols).tolist(),
+            "confidences": np.round(confidences, 4).reshape(rows, cols).tolist(),
+            "uncertain": uncertain.reshape(rows, cols).tolist()
+        },
+        "field": {
+            "tiles": len(predictions),
+            "uncertain_tiles": len(predictions) - confident,
+            "healthy_tiles": confident - diseased,
+            "diseased_tiles": diseased,
+            "diseased_fraction": round(diseased / confident, 4) if confident else None,
+            "classes": [
+                {
+                    "class": int(class_index),
+                    "full_name": PLANT_DISEASES.get(int(class_index), UNKNOWN_DISEASE)["name"],
+                    "healthy": bool(HEALTHY_CLASSES[class_index]),
+                    "tiles": int(counts[class_index]),
+                    "fraction": round(counts[class_index] / confident, 4),
+                    "mean_confidence": round(float(mean_confidence[class_index]), 4)
+                }
+                for class_index in np.argsort(-counts, kind='stable')[:np.count_nonzero(counts)]
+            ]
+        }
+    }
+
+async def classify_batch(files):
+    """
+    Classify every image in a batch upload, yielding (index, JSON bytes) per
+    image as soon as it is ready. At most BATCH_INFLIGHT_IMAGES images are
+    read and decoded at once, so memory stays flat however large the batch.
+    """
+    async def classify_item(index, filename, source):
+        try:
+            prediction, version = await classify_image(await read_batch_item(filename, source))
+            extra = {"index": index, "filename": filename, "success": True, "model_version": version}
+            with stage_seconds.time("serialize"):
+                return index, render_prediction(prediction, extra)
+        except Exception as e:
+            errors_total.inc("/predict/batch", type(e).__name__)
+            return index, dumps({"index": index, "filename": filename, "success": False, "error": str(e)})
+    
+    pending = set()
+    index = 0
+    async for filename, source in iter_batch_upload(files):
+        if len(pending) >= config.BATCH_INFLIGHT_IMAGES:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+        pending.add(asyncio.ensure_future(classify_item(index, filename, source)))
+        index += 1
+    
+    if index == 0:
+        raise ValueError("No images found in upload")
+    
+    for task in asyncio.as_completed(pending):
+        yield await task
+
+async def stream_batch(files):
+    """Emit batch results as NDJSON, one line per image in completion order"""
+    try:
+        async for _, body in classify_batch(files):
+            yield body + b"\n"
+    except Exception as e:
+        errors_total.inc("/predict/batch", type(e).__name__)
+        # The response has already started, so report the failure in-band
+        yield dumps({"success": False, "error": str(e)}) + b"\n"
+
 @app.get("/")
 async def root():
     """Serve the main HTML page"""
@@ -552,78 +988,337 @@ async def predict(file: UploadFile = File(...)):
     Predict plant disease from uploaded image
     """
     try:
-        if interpreter is None:
+        if registry.stable is None:
             raise HTTPException(status_code=500, detail="Model not loaded")
         
-        # Read and process image
-        contents = await file.read()
-        image = Image.open(io.BytesIO(contents))
+        with stage_seconds.time("read_upload"):
+            contents = await upload_policy.read(file)
+        prediction, version = await classify_image(contents)
         
-        # Preprocess image
-        image = image.convert('RGB')
-        image = image.resize((IMG_WIDTH, IMG_HEIGHT))
-        image_array = np.array(image, dtype=np.float32)
+        with stage_seconds.time("serialize"):
+            return FastJSONResponse(render_prediction(prediction, {"success": True, "model_version": version}))
         
-        # Normalize if needed (adjust based on your model training)
-        image_array = image_array / 255.0
+    except Exception as e:
+        errors_total.inc("/predict", type(e).__name__)
+        return JSONResponse({
+            "success": False,
+            "error": str(e)
+        }, status_code=e.status_code if isinstance(e, UploadRejected) else 400)
+
+@app.post("/predict/batch")
+async def predict_batch(files: List[UploadFile] = File(...), stream: bool = False):
+    """
+    Predict plant diseases for many images in one request.
+    Accepts several image files or a single zip/tar archive of images.
+    With ?stream=true, results are streamed back as NDJSON as each image
+    is classified instead of in one JSON document at the end.
+    """
+    try:
+        if registry.stable is None:
+            raise HTTPException(status_code=500, detail="Model not loaded")
         
-        # Add batch dimension
-        image_array = np.expand_dims(image_array, axis=0)
+        if len(files) > config.MAX_BATCH_IMAGES:
+            raise ValueError(f"At most {config.MAX_BATCH_IMAGES} images per batch")
         
-        # Run inference
-        interpreter.set_tensor(input_details[0]['index'], image_array)
-        interpreter.invoke()
-        output_data = interpreter.get_tensor(output_details[0]['index'])
+        if stream:
+            return StreamingResponse(stream_batch(files), media_type="application/x-ndjson")
         
-        # Get prediction
-        predictions = output_data[0]
-        predicted_class = np.argmax(predictions)
-        confidence = float(predictions[predicted_class])
+        results = [result async for result in classify_batch(files)]
+        results.sort(key=lambda result: result[0])
         
-        # Get disease information
-        disease_info = PLANT_DISEASES.get(predicted_class, {
-            "name": "Unknown",
-            "plant": "Unknown",
-            "disease": "Unknown",
-            "treatment": ["Unable to determine treatment"]
-        })
+        # Splice the already-encoded per-image objects into one document
+        body = (
+            b'{"success":true,"count":' + str(len(results)).encode("ascii")
+            + b',"results":[' + b",".join(body for _, body in results) + b"]}"
+        )
+        return FastJSONResponse(body)
         
+    except Exception as e:
+        errors_total.inc("/predict/batch", type(e).__name__)
         return JSONResponse({
+            "success": False,
+            "error": str(e)
+        }, status_code=400)
+
+@app.post("/predict/tiled")
+async def predict_tiled(file: UploadFile = File(...)):
+    """
+    Classify a high-resolution field or drone photo tile by tile.
+    The image is cut into overlapping model-sized tiles, scaled down first
+    if it is over TILE_MAX_PIXELS; every tile is classified in batched
+    invokes. Returns a per-tile class grid and field-level counts per
+    class, leaving out tiles under TILE_MIN_CONFIDENCE.
+    """
+    try:
+        if registry.stable is None:
+            raise HTTPException(status_code=500, detail="Model not loaded")
+        
+        with stage_seconds.time("read_upload"):
+            contents = await tiled_upload_policy.read(file)
+        
+        async with tiled_slots:
+            with registry.acquire(content_hash(contents)) as model:
+                started = time.perf_counter()
+                loop = asyncio.get_running_loop()
+                original_size, pixels = await loop.run_in_executor(None, decode_tiled, contents, model.image_size)
+                tiles, grid = tile_views(pixels, model.image_size, config.TILE_OVERLAP)
+                predictions = await classify_tiles(model, tiles)
+                elapsed = time.perf_counter() - started
+        
+        return FastJSONResponse({
             "success": True,
-            "class": int(predicted_class),
-            "confidence": float(confidence),
-            "plant": disease_info["plant"],
-            "disease": disease_info["disease"],
-            "full_name": disease_info["name"],
-            "confidence_percentage": f"{confidence * 100:.2f}%",
-            "treatment": disease_info["treatment"]
+            "model_version": model.version,
+            "image_size": list(original_size),
+            "tiled_size": [pixels.shape[1], pixels.shape[0]],
+            **describe_field(predictions, grid),
+            "elapsed_ms": round(elapsed * 1000, 1)
         })
         
     except Exception as e:
+        errors_total.inc("/predict/tiled", type(e).__name__)
         return JSONResponse({
             "success": False,
             "error": str(e)
-        }, status_code=400)
+        }, status_code=e.status_code if isinstance(e, UploadRejected) else 400)
+
+@app.post("/explain")
+async def explain(file: UploadFile = File(...), output: str = "both"):
+    """
+    Predict plant disease and explain it with a Grad-CAM heatmap.
+    output selects a base64 PNG overlay ("png"), the low-res heatmap
+    grid ("grid") or both. Uses the serving version's two-output CAM model
+    when it has one, otherwise Grad-CAM on that version's Keras model. If the
+    version has neither, or Grad-CAM misses its latency budget, the prediction
+    is still returned, with explanation null and explanation_error set.
+    """
+    global explain_pending
+    
+    try:
+        if registry.stable is None:
+            raise HTTPException(status_code=500, detail="Model not loaded")
+        if output not in ("png", "grid", "both"):
+            raise ValueError("output must be one of: png, grid, both")
+        
+        # Decode once; the same pixels are classified and explained
+        with stage_seconds.time("read_upload"):
+            contents = await upload_policy.read(file)
+        
+        with registry.acquire(content_hash(contents)) as model:
+            pixels = await decode_upload(contents, model.image_size)
+            if model.cam is not None:
+                # One forward pass of the version's two-output model gives scores and heatmap
+                started = time.perf_counter()
+                scores, heatmap = await model.cam.explain(pixels)
+                loop = asyncio.get_running_loop()
+                explanation = await loop.run_in_executor(
+                    None, format_explanation, pixels, heatmap, "cam", output
+                )
+                explanation["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                return FastJSONResponse({
+                    "success": True,
+                    "model_version": model.version,
+                    **describe_prediction(model.postprocess.one(scores)),
+                    "explanation": explanation
+                })
+            prediction = await model.predict(pixels)
+        result = {"model_version": model.version, **describe_prediction(prediction)}
+        
+        explanation = None
+        error = None
+        if model.gradcam is None:
+            error = f"Model version {model.version} has no CAM model or Keras model to explain with"
+        elif explain_pending >= config.EXPLAIN_MAX_PENDING:
+            error = "Explainer is busy, try again shortly"
+        else:
+            explain_pending += 1
+            started = time.perf_counter()
+            loop = asyncio.get_running_loop()
+            job = loop.run_in_executor(
+                explain_executor, build_explanation, model.gradcam, pixels,
+                model.output_column(result["class"]), output
+            )
+            job.add_done_callback(explain_finished)
+            try:
+                explanation = await asyncio.wait_for(
+                    asyncio.shield(job), timeout=config.EXPLAIN_TIMEOUT_MS / 1000
+                )
+                explanation["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            except asyncio.TimeoutError:
+                error = f"Explanation exceeded the {config.EXPLAIN_TIMEOUT_MS} ms budget"
+            except Exception as e:
+                error = str(e)
+        
+        response = {"success": True, **result, "explanation": explanation}
+        if error is not None:
+            response["explanation_error"] = error
+        return FastJSONResponse(response)
+        
+    except Exception as e:
+        errors_total.inc("/explain", type(e).__name__)
+        return JSONResponse({
+            "success": False,
+            "error": str(e)
+        }, status_code=e.status_code if isinstance(e, UploadRejected) else 400)
+
+def is_ready():
+    """Ready for traffic: a warmed-up model is loaded and the server is not shutting down"""
+    return registry.stable is not None and registry.stable.warm and not shutting_down
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "model_loaded": interpreter is not None,
-        "total_classes": len(PLANT_DISEASES)
+        "model_loaded": registry.stable is not None,
+        "ready": is_ready(),
+        "backend": registry.stable.pool.backend if registry.stable is not None else None,
+        "model_version": registry.stable.version if registry.stable is not None else None,
+        "canary_version": registry.canary.version if registry.canary is not None else None,
+        "warmup_s": registry.stable.warmup_s if registry.stable is not None else None,
+        "total_classes": len(PLANT_DISEASES),
+        "batching": registry.stable.batcher.stats.as_dict() if registry.stable is not None else None,
+        "load": dict(zip(("queued_images", "estimated_wait_s"), current_load())),
+        "cache": prediction_cache.stats() if prediction_cache is not None else None
     }
 
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is up and its event loop is responding"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness probe: 503 until the model is loaded and warmed up, and again while shutting down"""
+    if not is_ready():
+        return JSONResponse({"status": "not ready"}, status_code=503)
+    return {"status": "ready", "model_version": registry.stable.version}
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus metrics: per-stage latency histograms, prediction and error counters, pool gauges"""
+    if not config.ENABLE_METRICS:
+        return JSONResponse({"success": False, "error": "Metrics are disabled"}, status_code=404)
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
+
+def admin_allowed(request):
+    """Admin endpoints need ADMIN_TOKEN in X-Admin-Token, or a local client when no token is set"""
+    if config.ADMIN_TOKEN:
+        return request.headers.get("x-admin-token") == config.ADMIN_TOKEN
+    return request.client is not None and request.client.host in ("127.0.0.1", "::1", "localhost")
+
+@app.get("/admin/models")
+async def list_models(request: Request):
+    """Model versions being served and available in the registry"""
+    if not admin_allowed(request):
+        return JSONResponse({"success": False, "error": "Forbidden"}, status_code=403)
+    return {"success": True, **registry.describe()}
+
+@app.post("/admin/models/reload")
+async def reload_model(request: Request, version: Optional[str] = None, canary_percent: Optional[int] = None):
+    """
+    Load a model version (the newest in the registry by default) while the
+    current one keeps serving, then swap it in. With canary_percent above
+    zero it serves that share of uploads next to the stable version.
+    """
+    if not admin_allowed(request):
+        return JSONResponse({"success": False, "error": "Forbidden"}, status_code=403)
+    try:
+        return {"success": True, **await registry.reload(version, canary_percent)}
+    except Exception as e:
+        return JSONResponse({
+            "success": False,
+            "error": str(e)
+        }, status_code=400)
+
+@app.post("/admin/models/promote")
+async def promote_model(request: Request):
+    """Make the canary version the stable one"""
+    if not admin_allowed(request):
+        return JSONResponse({"success": False, "error": "Forbidden"}, status_code=403)
+    try:
+        return {"success": True, **registry.promote()}
+    except Exception as e:
+        return JSONResponse({
+            "success": False,
+            "error": str(e)
+        }, status_code=400)
+
+@app.post("/admin/models/rollback")
+async def rollback_model(request: Request):
+    """Stop serving the canary version"""
+    if not admin_allowed(request):
+        return JSONResponse({"success": False, "error": "Forbidden"}, status_code=403)
+    try:
+        return {"success": True, **registry.rollback()}
+    except Exception as e:
+        return JSONResponse({
+            "success": False,
+            "error": str(e)
+        }, status_code=400)
+
+@app.on_event("startup")
+async def startup():
+    """
+    Load and warm up the model, then watch the model registry for new
+    versions. Loading happens here rather than at import, so the
+    launcher's supervisor process, which imports this module but never
+    serves, holds no model. A launcher worker shares one socket with the
+    others, so a load balancer cannot route around it while it is cold:
+    it warms up before uvicorn starts accepting. A single server warms
+    up in the background and reports readiness on /health/ready.
+    """
+    global registry_watcher, warmup_task
+    await asyncio.get_running_loop().run_in_executor(None, load_model)
+    if in_worker():
+        await warm_up()
+    else:
+        warmup_task = asyncio.get_running_loop().create_task(warm_up())
+    if config.MODEL_WATCH_INTERVAL_S > 0:
+        registry_watcher = asyncio.get_running_loop().create_task(
+            registry.watch(config.MODEL_WATCH_INTERVAL_S)
+        )
+
+async def warm_up():
+    """
+    Run synthetic batches through every interpreter so the first real
+    requests don't pay for kernel initialization; /health/ready reports
+    ready once this is done.
+    """
+    loop = asyncio.get_running_loop()
+    if registry.stable is not None and not registry.stable.warm:
+        if config.ENABLE_WARMUP:
+            try:
+                await loop.run_in_executor(None, registry.stable.warm_up)
+                print(f"Model warmed up in {registry.stable.warmup_s} s")
+            except Exception as e:
+                print(f"Error warming up model: {e}")
+        else:
+            registry.stable.warm = True
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop the registry watcher, the model versions and the explainer threads"""
+    global shutting_down
+    shutting_down = True
+    if warmup_task is not None:
+        warmup_task.cancel()
+    if registry_watcher is not None:
+        registry_watcher.cancel()
+    await registry.close()
+    explain_executor.shutdown(wait=False)
+
 if __name__ == "__main__":
-    import uvicorn
     print("\n" + "="*60)
     print("🌿 AgriVision Pro - Starting...")
     print("="*60)
-    print("📱 Web Interface: http://localhost:8000")
-    print("📚 API Docs: http://localhost:8000/docs")
-    print("🔍 Health Check: http://localhost:8000/health")
+    print(f"📱 Web Interface: http://localhost:{config.PORT}")
+    print(f"📚 API Docs: http://localhost:{config.PORT}/docs")
+    print(f"🔍 Health Check: http://localhost:{config.PORT}/health")
+    print(f"⚙️  Workers: {config.WORKERS}")
     print("="*60 + "\n")
     
-    # host="0.0.0.0" listens on all interfaces but use localhost to access
-    # For network access from other machines, change host to your machine IP
-    uvicorn.run(app, host="127.0.0.1", port=8000)
+    # config.HOST="0.0.0.0" listens on all interfaces; use localhost to access
+    # With WORKERS > 1 each worker process is pinned to its own CPU slice
+    # Worker processes import the app by name; a single process reuses this one.
+    # Either way the model loads in the startup hook, never in this supervisor.
+    serve(app if config.WORKERS <= 1 else "main:app", host=config.HOST, port=config.PORT, workers=config.WORKERS)
@@ -0,0 +1,86 @@
+"""
+Prediction postprocessing for AgriVision Pro
+Top-k classes and confidence gating computed once per batch of class scores
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+
+class Prediction(NamedTuple):
+    """One image's class scores and what the response reports about them"""
+    scores: np.ndarray  # All class scores, in the served class order
+    classes: np.ndarray  # Top classes, most confident first
+    confidences: np.ndarray  # Their scores
+    uncertain: bool  # Top confidence below the warning threshold: ask for a retake
+    views: int = 1  # Images whose scores were averaged: above 1 after test-time augmentation
+
+    @property
+    def top_class(self):
+        return int(self.classes[0])
+
+    @property
+    def confidence(self):
+        return float(self.confidences[0])
+
+
+def top_k(scores, k):
+    """
+    The k highest scores in each row of a (n, classes) array, as (classes,
+    confidences) arrays of shape (n, k), most confident first.
+
+    argpartition finds each row's top k in linear time; only those k are
+    then sorted, instead of sorting every class score.
+    """
+    scores = np.asarray(scores)
+    k = min(k, scores.shape[-1])
+    if k < scores.shape[-1]:
+        candidates = np.argpartition(scores, -k, axis=-1)[..., -k:]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[-1]), scores.shape)
+    candidate_scores = np.take_along_axis(scores, candidates, axis=-1)
+    order = np.argsort(-candidate_scores, axis=-1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=-1), np.take_along_axis(candidate_scores, order, axis=-1)
+
+
+class Postprocessor:
+    """
+    Turns a batch of raw model scores into one Prediction per image.
+
+    columns, if given, reorders the model's outputs into the served class
+    order first (see registry.label_columns). Beyond the top class, top-k
+    entries scoring under min_confidence are dropped; a top confidence
+    under uncertain_below flags the prediction as uncertain. The returned
+    arrays are read-only views of the batch's, so they can be cached and
+    shared between requests.
+    """
+
+    def __init__(self, k=1, min_confidence=0.0, uncertain_below=0.0, columns=None):
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        self.k = k
+        self.min_confidence = min_confidence
+        self.uncertain_below = uncertain_below
+        self.columns = columns
+
+    def __call__(self, scores):
+        scores = np.asarray(scores)
+        if self.columns is not None:
+            scores = scores[:, self.columns]
+        classes, confidences = top_k(scores, self.k)
+        uncertain = confidences[:, 0] < self.uncertain_below
+        # Always report the top class; drop the runners-up below min_confidence
+        shown = (confidences >= self.min_confidence).sum(axis=1)
+        shown = np.maximum(shown, 1)
+
+        for array in (scores, classes, confidences):
+            array.flags.writeable = False
+        return [
+            Prediction(scores[i], classes[i, :shown[i]], confidences[i, :shown[i]], bool(uncertain[i]))
+            for i in range(len(scores))
+        ]
+
+    def one(self, scores):
+        """The Prediction for a single row of scores"""
+        return self([scores])[0]
@@ -0,0 +1,83 @@
+"""
+Image preprocessing for AgriVision Pro
+Fast decode to model resolution and in-place normalization or quantization
+"""
+
+import io
+
+import numpy as np
+from PIL import Image
+
+PIXEL_SCALE = np.float32(1.0 / 255.0)
+
+
+def open_image(contents, size):
+    """
+    Decode image bytes into an RGB PIL image, at least (width, height) size
+    when it is larger than that.
+
+    JPEGs are decoded in draft mode, which lets libjpeg scale the image
+    down by 1/2, 1/4 or 1/8 during decoding, to the smallest size that is
+    still at least the target. A 12 MP phone photo is then only decoded
+    at ~0.75 MP before the final resize.
+    """
+    image = Image.open(io.BytesIO(contents))
+
+    if image.format == 'JPEG':
+        image.draft('RGB', size)
+
+    return image.convert('RGB')
+
+
+def resize_image(image, size):
+    """Resize an RGB PIL image to (width, height) and return it as a uint8 array"""
+    if image.size != size:
+        image = image.resize(size)
+    return np.asarray(image)
+
+
+def decode_image(contents, size):
+    """
+    Decode image bytes into a (height, width, 3) uint8 array of the given
+    (width, height) size.
+    """
+    return resize_image(open_image(contents, size), size)
+
+
+def normalize_into(pixels, out):
+    """
+    Scale uint8 pixels to [0, 1] floats, writing straight into out.
+    out is typically one row of an interpreter's input tensor, so no
+    intermediate float array is allocated.
+    """
+    np.multiply(pixels, PIXEL_SCALE, out=out)
+    return out
+
+
+def input_writer(input_detail):
+    """
+    Return write(pixels, out) that fills one row of a model's input tensor
+    from uint8 pixels, whatever the model's input dtype.
+
+    Float models get pixels / 255 via normalize_into. Full-integer models
+    take quantized input: with scale 1/255 and zero point 0 (what an INT8
+    export calibrated on [0, 1] images gets for a uint8 input) the raw
+    pixels already are that input and are copied straight in. Any other
+    quantization is applied through a 256-entry lookup table, so no float
+    image is ever built.
+    """
+    dtype = np.dtype(input_detail['dtype'])
+    if dtype.kind == 'f':
+        return normalize_into
+
+    scale, zero_point = input_detail['quantization']
+    if not scale:
+        raise ValueError(f"Input of dtype {dtype} has no quantization parameters")
+
+    levels = np.arange(256, dtype=np.float64) * (1.0 / 255.0) / scale + zero_point
+    info = np.iinfo(dtype)
+    table = np.clip(np.round(levels), info.min, info.max).astype(dtype)
+
+    if dtype == np.uint8 and np.array_equal(table, np.arange(256, dtype=np.uint8)):
+        return lambda pixels, out: np.copyto(out, pixels)
+    return lambda pixels, out: np.take(table, pixels, out=out)
@@ -0,0 +1,378 @@
+"""
+Model registry for AgriVision Pro
+Versioned TFLite models that are loaded, canaried and swapped without a restart
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from batching import MicroBatcher, batch_buckets
+from cache import file_digest
+from dataset import normalize_class_name
+from explain import CAMExplainer, GradCAMExplainer
+from interpreter_pool import InterpreterPool
+from postprocessing import Postprocessor
+
+# Each registry version is a directory holding these files
+MODEL_FILE = "model.tflite"
+LABELS_FILE = "labels.json"
+# Optional two-output model and classifier head from export_tflite.py, for /explain
+CAM_MODEL_FILE = "cam_model.tflite"
+CAM_HEAD_FILE = "cam_head.npz"
+# Optional Keras model the version was converted from, for Grad-CAM when it has no CAM model
+KERAS_MODEL_FILE = "model.h5"
+
+
+def version_key(name):
+    """Natural sort key, so v10 sorts after v9"""
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", name)]
+
+
+def label_columns(labels, class_names):
+    """
+    Output column for each served class index, matching label names as
+    normalize_class_name() does (so PlantVillage folder names work), or
+    None when the model already uses the served order. labels is a list
+    in output order or a {"index": name} dict.
+    """
+    if isinstance(labels, dict):
+        labels = [labels[key] for key in sorted(labels, key=int)]
+    names = [normalize_class_name(name) for name in labels]
+    served = [normalize_class_name(name) for name in class_names]
+    if sorted(names) != sorted(served):
+        raise ValueError("Label map does not list exactly the served disease classes")
+    columns = np.array([names.index(name) for name in served])
+    return None if np.array_equal(columns, np.arange(len(columns))) else columns
+
+
+class ModelVersion:
+    """
+    One loaded model version: its interpreter pool, micro-batcher and the
+    column order that maps its outputs onto the served class indices.
+    cam_paths, (model, head), names the version's CAM companion; when both
+    files exist it is loaded as cam, warmed and shut down with the version.
+    keras_path names the Keras model the version was converted from; when
+    it exists, gradcam explains this version's predictions with Grad-CAM.
+
+    Requests hold a version through ModelRegistry.acquire(), which counts
+    them in inflight; a retired version is only shut down once that count
+    drops to zero, so requests already routed to it finish normally.
+    """
+
+    def __init__(self, version, model_path, class_names, labels_path=None, pool_size=1,
+                 num_threads=1, backend="auto", max_batch_size=8, max_wait_ms=10, on_stage=None,
+                 top_k=1, min_confidence=0.0, uncertain_below=0.0, cam_paths=None, cam_pool_size=1,
+                 batch_sizes=None, keras_path=None, gradcam_layer='out_relu'):
+        self.version = version
+        self.model_path = model_path
+        self.pool = InterpreterPool(model_path, size=pool_size, num_threads=num_threads, backend=backend,
+                                    batch_sizes=batch_buckets(max_batch_size, batch_sizes))
+        self.inflight = 0
+        self.warm = False
+        self.warmup_s = None
+
+        input_shape = self.pool.input_details[0]['shape']
+        self.image_size = (int(input_shape[2]), int(input_shape[1]))  # (width, height) for decode_image
+
+        outputs = int(self.pool.output_details[0]['shape'][-1])
+        if outputs != len(class_names):
+            self.pool.shutdown()
+            raise ValueError(f"Model {version} has {outputs} outputs, expected {len(class_names)} classes")
+
+        # Identifies what this version computes: the weights plus the label map
+        self.digest = file_digest(model_path)
+        self.columns = None
+        if labels_path is not None and os.path.exists(labels_path):
+            with open(labels_path, 'rb') as f:
+                labels = f.read()
+            self.columns = label_columns(json.loads(labels), class_names)
+            self.digest = hashlib.sha256(self.digest.encode("ascii") + labels).hexdigest()
+
+        # Label map and top-k run once per batch, on the interpreter's thread
+        self.postprocess = Postprocessor(top_k, min_confidence, uncertain_below, columns=self.columns)
+        self.batcher = MicroBatcher(
+            pool=self.pool, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms, on_stage=on_stage,
+            postprocess=self.postprocess
+        )
+
+        # Its scores come out in this version's column order, so self.postprocess applies to them too
+        self.cam = None
+        if cam_paths is not None and all(os.path.exists(path) for path in cam_paths):
+            try:
+                self.cam = CAMExplainer(*cam_paths, pool_size=cam_pool_size, num_threads=num_threads,
+                                        backend=backend)
+                if self.cam.image_size != self.image_size:
+                    raise ValueError(f"CAM model of {version} takes {self.cam.image_size} images, "
+                                     f"expected {self.image_size}")
+            except Exception:
+                self.pool.shutdown()
+                if self.cam is not None:
+                    self.cam.pool.shutdown()
+                raise
+
+        # Has the same outputs as the .tflite, so output_column() maps served classes onto it as well
+        self.gradcam = None
+        if keras_path is not None and os.path.exists(keras_path):
+            self.gradcam = GradCAMExplainer(keras_path, layer_name=gradcam_layer)
+
+    def warm_up(self):
+        """Run synthetic batches of every bucket size through every interpreter, and the CAM model (blocking)"""
+        started = time.perf_counter()
+        width, height = self.image_size
+        self.batcher.warm_up((height, width, 3))
+        if self.cam is not None:
+            self.cam.warm_up()
+        self.warmup_s = round(time.perf_counter() - started, 3)
+        self.warm = True
+
+    def output_column(self, class_index):
+        """The model output column holding served class class_index"""
+        return int(self.columns[class_index]) if self.columns is not None else class_index
+
+    async def predict(self, pixels):
+        """The Prediction for one decoded uint8 image, scores in the served class order"""
+        return await self.batcher.submit(pixels)
+
+    async def close(self, poll_s=0.05):
+        """Wait for requests still using this version, then stop its batcher and pools"""
+        while self.inflight > 0:
+            await asyncio.sleep(poll_s)
+        await self.batcher.stop()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.pool.shutdown)
+        if self.cam is not None:
+            await loop.run_in_executor(None, self.cam.pool.shutdown)
+
+    def describe(self):
+        return {
+            "version": self.version,
+            "digest": self.digest[:12],
+            "backend": self.pool.backend,
+            "interpreters": self.pool.size,
+            "inflight": self.inflight,
+            "cam": self.cam is not None,
+            "grad_cam": self.gradcam is not None,
+            "warm": self.warm,
+            "warmup_s": self.warmup_s
+        }
+
+
+class ModelRegistry:
+    """
+    The model versions being served: a stable one and, optionally, a canary.
+
+    directory holds one sub-directory per version containing model.tflite
+    and, if its outputs are not in the served class order, labels.json;
+    cam_model.tflite and cam_head.npz next to them explain that version,
+    or else model.h5 through Grad-CAM. Without any versions there,
+    fallback_path is served as a single version named after the file,
+    explained by fallback_cam (model, head) or fallback_keras if given. New versions are loaded on an executor
+    thread while the current ones keep serving, then swapped in with a
+    single assignment on the event loop. With canary_percent > 0 a new
+    version is served next to the stable one until promoted or rolled back.
+    canary_percent is the default share; reload() can override it per canary.
+    With warm_up, reloaded versions are warmed before they take traffic;
+    the initial version from load() is left for the caller to warm.
+
+    on_change() is called after every swap, e.g. to update the prediction
+    cache with the digests now being served.
+    """
+
+    def __init__(self, directory, fallback_path, class_names, pinned=None, canary_percent=0,
+                 on_change=None, warm_up=True, fallback_cam=None, fallback_keras=None, **version_options):
+        self.directory = directory
+        self.fallback_path = fallback_path
+        self.fallback_cam = fallback_cam
+        self.fallback_keras = fallback_keras
+        self.class_names = class_names
+        self.pinned = pinned
+        self.canary_percent = canary_percent
+        self.on_change = on_change
+        self.warm_up = warm_up
+        self.version_options = version_options
+        self.stable = None
+        self.canary = None
+        self.canary_share = 0
+        self.failed = {}
+        self._reloading = False
+        self._retiring = set()
+
+    def available(self):
+        """{version: directory} for every complete version in the registry, oldest first"""
+        if not os.path.isdir(self.directory):
+            return {}
+        versions = [
+            name for name in os.listdir(self.directory)
+            if os.path.isfile(os.path.join(self.directory, name, MODEL_FILE))
+        ]
+        return {name: os.path.join(self.directory, name) for name in sorted(versions, key=version_key)}
+
+    def _target(self, version=None):
+        """(version, model path, labels path, CAM paths, Keras path) to load: the requested, pinned or newest version"""
+        available = self.available()
+        version = version or self.pinned
+        if version is not None:
+            if version not in available:
+                raise ValueError(f"Model version '{version}' not found in {self.directory}")
+        elif available:
+            version = list(available)[-1]
+        else:
+            name = os.path.splitext(os.path.basename(self.fallback_path))[0]
+            return name, self.fallback_path, None, self.fallback_cam, self.fallback_keras
+        directory = available[version]
+        cam_paths = (os.path.join(directory, CAM_MODEL_FILE), os.path.join(directory, CAM_HEAD_FILE))
+        return (version, os.path.join(directory, MODEL_FILE), os.path.join(directory, LABELS_FILE), cam_paths,
+                os.path.join(directory, KERAS_MODEL_FILE))
+
+    def _load(self, version, model_path, labels_path, cam_paths, keras_path):
+        return ModelVersion(version, model_path, self.class_names, labels_path, cam_paths=cam_paths,
+                            keras_path=keras_path, **self.version_options)
+
+    def _load_warm(self, version, model_path, labels_path, cam_paths, keras_path):
+        model = self._load(version, model_path, labels_path, cam_paths, keras_path)
+        if self.warm_up:
+            model.warm_up()
+        return model
+
+    def load(self):
+        """Load the initial stable version (blocking; used at startup)"""
+        self.stable = self._load(*self._target())
+        self._changed()
+        return self.stable
+
+    def versions(self):
+        """The loaded versions, stable first"""
+        return [model for model in (self.stable, self.canary) if model is not None]
+
+    def digests(self):
+        return [model.digest for model in self.versions()]
+
+    @contextmanager
+    def acquire(self, route_hash=None):
+        """
+        Hold the version that should serve one request. The canary gets
+        canary_share percent of uploads, chosen from the upload's content hash
+        so the same photo is always served by the same version.
+        """
+        model = self.stable
+        if self.canary is not None and route_hash is not None:
+            if int.from_bytes(route_hash[:2], "big") % 100 < self.canary_share:
+                model = self.canary
+        if model is None:
+            raise RuntimeError("Model not loaded")
+
+        model.inflight += 1
+        try:
+            yield model
+        finally:
+            model.inflight -= 1
+
+    async def reload(self, version=None, canary_percent=None):
+        """
+        Load a version (the newest by default) in the background and swap
+        it in as the stable version, or as the canary if canary_percent is
+        above zero. The version it replaces is retired once idle.
+        """
+        percent = self.canary_percent if canary_percent is None else canary_percent
+        if not 0 <= percent <= 100:
+            raise ValueError("canary_percent must be between 0 and 100")
+        if self._reloading:
+            raise RuntimeError("A model reload is already in progress")
+        self._reloading = True
+        try:
+            target = self._target(version)
+            if target[0] in [model.version for model in self.versions()]:
+                return self.describe()
+
+            loop = asyncio.get_running_loop()
+            try:
+                loaded = await loop.run_in_executor(None, self._load_warm, *target)
+            except Exception as e:
+                self.failed[target[0]] = str(e)
+                raise
+            self.failed.pop(target[0], None)
+
+            if percent > 0 and self.stable is not None:
+                self._retire(self.canary)
+                self.canary, self.canary_share = loaded, percent
+            else:
+                self._retire(self.stable)
+                self.stable = loaded
+            self._changed()
+            return self.describe()
+        finally:
+            self._reloading = False
+
+    def promote(self):
+        """Make the canary the stable version"""
+        if self.canary is None:
+            raise ValueError("No canary version to promote")
+        self._retire(self.stable)
+        self.stable, self.canary = self.canary, None
+        self._changed()
+        return self.describe()
+
+    def rollback(self):
+        """Stop serving the canary"""
+        if self.canary is None:
+            raise ValueError("No canary version to roll back")
+        self._retire(self.canary)
+        self.canary = None
+        self._changed()
+        return self.describe()
+
+    async def watch(self, interval_s):
+        """Poll the registry directory and load new versions as they appear"""
+        while True:
+            await asyncio.sleep(interval_s)
+            if self.pinned is not None or self._reloading:
+                continue
+            available = self.available()
+            if not available:
+                continue
+            newest = list(available)[-1]
+            if newest in self.failed or newest in [model.version for model in self.versions()]:
+                continue
+            try:
+                self._report(await self.reload())
+            except Exception as e:
+                print(f"Error loading model version {newest}: {e}")
+
+    def _report(self, state):
+        canary = state["canary"]
+        print(f"Serving model version {state['stable']['version']}"
+              + (f", canary {canary['version']} at {state['canary_percent']}%" if canary else ""))
+
+    def _retire(self, model):
+        if model is not None:
+            task = asyncio.get_running_loop().create_task(model.close())
+            self._retiring.add(task)
+            task.add_done_callback(self._retiring.discard)
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change(self)
+
+    async def close(self):
+        """Shut down every loaded and retiring version"""
+        for model in self.versions():
+            await model.close()
+        if self._retiring:
+            await asyncio.gather(*self._retiring, return_exceptions=True)
+        self.stable = self.canary = None
+
+    def describe(self):
+        return {
+            "stable": self.stable.describe() if self.stable is not None else None,
+            "canary": self.canary.describe() if self.canary is not None else None,
+            "canary_percent": self.canary_share if self.canary is not None else 0,
+            "available": list(self.available()),
+            "failed": self.failed
+        }
@@ -0,0 +1,102 @@
+"""
+Response serialization for AgriVision Pro
+Pre-encoded disease metadata and a fast JSON response class
+"""
+
+import json
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up; the standard library is the fallback
+    orjson = None
+
+
+def dumps(content):
+    """Encode content as compact UTF-8 JSON bytes, using orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse that serializes with orjson when available and passes
+    already-encoded bytes bodies through untouched.
+    """
+
+    def render(self, content):
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+class ResponseFragments:
+    """
+    The static part of every prediction response, encoded once at startup.
+
+    A class's plant, disease, full name and treatment list never change, so
+    they are serialized to a JSON fragment per class up front. A response
+    is then a few bytes of per-request fields spliced in front of that
+    fragment, without building or encoding the treatment list again.
+    """
+
+    def __init__(self, diseases, unknown):
+        self._fragments = {
+            class_index: self._encode(info) for class_index, info in diseases.items()
+        }
+        self._unknown = self._encode(unknown)
+        # Top-k entries: everything up to the confidence value
+        self._ranked = {
+            class_index: self._encode_ranked(class_index, info) for class_index, info in diseases.items()
+        }
+        self._unknown_info = unknown
+
+    @staticmethod
+    def _encode(info):
+        body = dumps({
+            "plant": info["plant"],
+            "disease": info["disease"],
+            "full_name": info["name"],
+            "treatment": info["treatment"]
+        })
+        return body[1:-1]  # Strip the braces so it can be spliced into an object
+
+    @staticmethod
+    def _encode_ranked(class_index, info):
+        return dumps({"class": class_index, "full_name": info["name"]})[:-1] + b',"confidence":'
+
+    def _render_ranked(self, classes, confidences):
+        entries = []
+        for class_index, confidence in zip(classes, confidences):
+            prefix = self._ranked.get(int(class_index))
+            if prefix is None:
+                prefix = self._encode_ranked(int(class_index), self._unknown_info)
+            entries.append(prefix + repr(float(confidence)).encode("ascii") + b"}")
+        return b'"top_k":[' + b",".join(entries) + b"],"
+
+    def render(self, class_index, confidence, extra=None, top_k=None, uncertain=None):
+        """
+        Encode one prediction as a JSON object. extra holds any other
+        per-request fields (success, filename, ...) and is written first.
+        top_k, if given, is a (classes, confidences) pair listed as the
+        prediction's top_k entries; uncertain adds the low-confidence flag.
+        """
+        confidence = float(confidence)
+        fields = (
+            f'"class":{int(class_index)},"confidence":{confidence!r},'
+            f'"confidence_percentage":"{confidence * 100:.2f}%",'
+        ).encode("ascii")
+        if uncertain is not None:
+            fields += b'"uncertain":true,' if uncertain else b'"uncertain":false,'
+        if top_k is not None:
+            fields += self._render_ranked(*top_k)
+
+        head = dumps(extra)[1:-1] + b"," if extra else b""
+        return b"{" + head + fields + self._fragments.get(class_index, self._unknown) + b"}"
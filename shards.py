@@ -0,0 +1,224 @@
+"""
+Dataset shards for AgriVision Pro
+PlantVillage decoded once into memory-mapped uint8 shards with an index, for decode-free random access
+
+A shard directory holds:
+  - shard-NNNNN.npy: (count, height, width, 3) uint8 images, decoded and
+    resized with the server's decode_image
+  - items.npz: per image, its served class index and whether it is in the
+    notebook's validation split
+  - index.json: image size, class names, source paths and the sha256 of
+    every other file, written last so a half-packed directory never opens
+
+Usage:
+    python shards.py pack --data-dir "dataset/plantvillage dataset/color" --output dataset/shards
+    python shards.py verify dataset/shards
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from cache import file_digest
+from dataset import DATA_DIR, load_pixels, served_class_names, split_files
+
+FORMAT_VERSION = 1
+INDEX_FILE = "index.json"
+ITEMS_FILE = "items.npz"
+SHARD_SIZE = 2048  # Images per shard, ~300 MB at 224x224
+IMAGE_SIZE = (224, 224)
+
+
+def shard_name(number):
+    return f"shard-{number:05d}.npy"
+
+
+def pack(data_dir, output, size=IMAGE_SIZE, shard_size=SHARD_SIZE, workers=None):
+    """
+    Decode every image under data_dir into shards in output. Images that
+    fail to decode are left out and listed in the index. Returns the index.
+    """
+    items = split_files(data_dir, subset="all")
+    if not items:
+        raise ValueError(f"No images found in {data_dir}")
+    validation = {path for path, _ in split_files(data_dir, subset="validation")}
+
+    os.makedirs(output, exist_ok=True)
+    if os.path.exists(os.path.join(output, INDEX_FILE)):
+        os.remove(os.path.join(output, INDEX_FILE))
+
+    width, height = size
+    paths, labels, held_out, skipped, shards = [], [], [], [], []
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        for start in range(0, len(items), shard_size):
+            chunk = items[start:start + shard_size]
+            decoded = list(executor.map(lambda item: load_pixels(item[0], size), chunk))
+            kept = [(item, pixels) for item, (pixels, ok) in zip(chunk, decoded) if ok]
+            skipped.extend(item[0] for item, (_, ok) in zip(chunk, decoded) if not ok)
+            if not kept:
+                continue
+
+            name = shard_name(len(shards))
+            images = np.lib.format.open_memmap(
+                os.path.join(output, name), mode='w+', dtype=np.uint8, shape=(len(kept), height, width, 3)
+            )
+            for i, (_, pixels) in enumerate(kept):
+                images[i] = pixels
+            images.flush()
+            del images
+
+            for (path, class_index), _ in kept:
+                paths.append(os.path.relpath(path, data_dir))
+                labels.append(class_index)
+                held_out.append(path in validation)
+            shards.append({"file": name, "count": len(kept), "sha256": file_digest(os.path.join(output, name))})
+            print(f"  {name}: {len(kept)} images ({len(paths)}/{len(items)})", file=sys.stderr)
+
+    np.savez(os.path.join(output, ITEMS_FILE),
+             labels=np.array(labels, dtype=np.int16), validation=np.array(held_out, dtype=bool))
+
+    index = {
+        "format": FORMAT_VERSION,
+        "image_size": [width, height],
+        "count": len(paths),
+        "class_names": served_class_names(),
+        "shards": shards,
+        "items": {"file": ITEMS_FILE, "sha256": file_digest(os.path.join(output, ITEMS_FILE))},
+        "paths": paths,
+        "skipped": skipped
+    }
+    with open(os.path.join(output, INDEX_FILE), 'w') as f:
+        json.dump(index, f)
+    return index
+
+
+def verify(directory):
+    """
+    Check a shard directory against its index: every file present, of the
+    recorded sha256, with the recorded shape. Returns a list of problems,
+    empty when the shards are intact.
+    """
+    with open(os.path.join(directory, INDEX_FILE)) as f:
+        index = json.load(f)
+
+    problems = []
+    width, height = index["image_size"]
+    for entry in index["shards"] + [index["items"]]:
+        path = os.path.join(directory, entry["file"])
+        if not os.path.exists(path):
+            problems.append(f"{entry['file']}: missing")
+        elif file_digest(path) != entry["sha256"]:
+            problems.append(f"{entry['file']}: checksum mismatch")
+        elif entry["file"] != ITEMS_FILE:
+            shape = np.load(path, mmap_mode='r').shape
+            if shape != (entry["count"], height, width, 3):
+                problems.append(f"{entry['file']}: shape {shape}, expected {(entry['count'], height, width, 3)}")
+
+    if sum(entry["count"] for entry in index["shards"]) != index["count"] or len(index["paths"]) != index["count"]:
+        problems.append("index: image counts do not add up")
+    return problems
+
+
+class ShardReader:
+    """
+    Random access to one subset ("training", "validation" or "all") of a
+    shard directory. Shards are memory-mapped, so reading an image is a
+    copy out of the page cache rather than a JPEG decode.
+    """
+
+    def __init__(self, directory, subset="all", class_names=None):
+        if subset not in ("training", "validation", "all"):
+            raise ValueError("subset must be training, validation or all")
+
+        with open(os.path.join(directory, INDEX_FILE)) as f:
+            index = json.load(f)
+        if index["format"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported shard format {index['format']} in {directory}")
+        if index["class_names"] != (class_names or served_class_names()):
+            raise ValueError(f"Shards in {directory} were packed for different class names")
+
+        self.directory = directory
+        self.image_size = tuple(index["image_size"])
+        self.shards = [np.load(os.path.join(directory, entry["file"]), mmap_mode='r') for entry in index["shards"]]
+        counts = np.array([entry["count"] for entry in index["shards"]])
+        self.starts = np.concatenate([[0], np.cumsum(counts)])
+
+        items = np.load(os.path.join(directory, ITEMS_FILE))
+        if subset == "all":
+            self.positions = np.arange(index["count"])
+        else:
+            self.positions = np.flatnonzero(items["validation"] == (subset == "validation"))
+        self.labels = items["labels"][self.positions].astype(np.int64)
+        self.paths = [index["paths"][i] for i in self.positions]
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, i):
+        """(pixels, served class index) of the subset's i-th image"""
+        position = self.positions[i]
+        shard = np.searchsorted(self.starts, position, side='right') - 1
+        return np.array(self.shards[shard][position - self.starts[shard]]), self.labels[i]
+
+    def read(self, indices, out=None):
+        """
+        Pixels of the subset's images at indices as one (n, height, width, 3)
+        batch, in the order given. Reads are grouped per shard.
+        """
+        indices = np.asarray(indices)
+        width, height = self.image_size
+        if out is None:
+            out = np.empty((len(indices), height, width, 3), dtype=np.uint8)
+        positions = self.positions[indices]
+        shards = np.searchsorted(self.starts, positions, side='right') - 1
+        for shard in np.unique(shards):
+            rows = np.flatnonzero(shards == shard)
+            offsets = positions[rows] - self.starts[shard]
+            order = np.argsort(offsets)  # Ascending offsets read the mapping front to back
+            out[rows[order]] = self.shards[shard][offsets[order]]
+        return out
+
+    def batches(self, batch_size, shuffle=False, seed=0):
+        """Yield (pixels, labels) batches over the subset, optionally in a seeded random order"""
+        order = np.random.default_rng(seed).permutation(len(self)) if shuffle else np.arange(len(self))
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            yield self.read(indices), self.labels[indices]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack PlantVillage into memory-mapped shards, or verify them")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    pack_parser = commands.add_parser("pack", help="Decode an image folder into shards")
+    pack_parser.add_argument("--data-dir", default=DATA_DIR, help="PlantVillage class folders")
+    pack_parser.add_argument("--output", default="dataset/shards", help="Shard directory to write")
+    pack_parser.add_argument("--size", type=int, nargs=2, default=IMAGE_SIZE, metavar=("WIDTH", "HEIGHT"))
+    pack_parser.add_argument("--shard-size", type=int, default=SHARD_SIZE, help="Images per shard")
+
+    verify_parser = commands.add_parser("verify", help="Check shards against their index")
+    verify_parser.add_argument("directory", help="Shard directory")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        started = time.perf_counter()
+        index = pack(args.data_dir, args.output, tuple(args.size), args.shard_size)
+        print(f"✓ Packed {index['count']} images into {len(index['shards'])} shards in {args.output} "
+              f"({time.perf_counter() - started:.1f} s, {len(index['skipped'])} skipped)")
+        return
+
+    problems = verify(args.directory)
+    for problem in problems:
+        print(f"✗ {problem}")
+    if problems:
+        sys.exit(1)
+    print(f"✓ {args.directory} is intact")
+
+
+if __name__ == "__main__":
+    main()
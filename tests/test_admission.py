@@ -0,0 +1,90 @@
+"""
+Tests for admission control: per-client token buckets and load shedding
+"""
+
+import asyncio
+
+import pytest
+
+from admission import AdmissionControl, LoadShedder, RateLimiter
+
+
+def test_burst_is_allowed_then_refused_until_a_token_refills():
+    limiter = RateLimiter(rate_per_hour=3600, burst=3)
+    assert [limiter.acquire("a", now=0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire("a", now=0.0) == pytest.approx(1.0)
+    assert limiter.acquire("a", now=0.5) == pytest.approx(0.5)
+    assert limiter.acquire("a", now=1.5) == 0.0
+
+
+def test_clients_have_separate_buckets():
+    limiter = RateLimiter(rate_per_hour=3600, burst=1)
+    assert limiter.acquire("a", now=0.0) == 0.0
+    assert limiter.acquire("a", now=0.0) > 0
+    assert limiter.acquire("b", now=0.0) == 0.0
+
+
+def test_least_recently_seen_client_is_forgotten_beyond_max_clients():
+    limiter = RateLimiter(rate_per_hour=1, burst=1, max_clients=2)
+    for client in ("a", "b", "c"):
+        limiter.acquire(client, now=0.0)
+    assert len(limiter) == 2
+    # a was forgotten, so it gets a full bucket back
+    assert limiter.acquire("a", now=0.0) == 0.0
+    assert limiter.acquire("c", now=0.0) > 0
+
+
+def test_invalid_limits_are_rejected():
+    with pytest.raises(ValueError):
+        RateLimiter(rate_per_hour=0, burst=1)
+    with pytest.raises(ValueError):
+        RateLimiter(rate_per_hour=10, burst=0)
+
+
+def test_shedder_admits_until_the_queue_or_wait_is_over_its_limit():
+    load = [(0, 0.0)]
+    shedder = LoadShedder(lambda: load[0], max_wait_s=2.0, max_queued=10)
+    assert shedder.check() is None
+    load[0] = (11, 0.5)
+    assert shedder.check() == 1.0
+    load[0] = (3, 4.0)
+    assert shedder.check() == 4.0
+
+
+def test_shedder_counts_admitted_requests_not_yet_queued():
+    shedder = LoadShedder(lambda: (1, 0.2), max_wait_s=100.0, max_queued=4)
+    shedder.in_flight = 4
+    assert shedder.backlog() == (4, pytest.approx(0.5))
+    assert shedder.check() is None
+    shedder.in_flight = 5
+    assert shedder.check() is not None
+
+
+def admit(middleware, client="a"):
+    """Send one POST /predict through middleware and return the response status"""
+    scope = {"type": "http", "method": "POST", "path": "/predict", "headers": [], "client": (client, 1234)}
+    sent = []
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(AdmissionControl(app, ["/predict"], **middleware)(scope, receive, send))
+    return sent[0]["status"]
+
+
+def test_shed_requests_do_not_spend_rate_limit_tokens():
+    load = [(100, 10.0)]
+    limiter = RateLimiter(rate_per_hour=1, burst=1)
+    shedder = LoadShedder(lambda: load[0], max_wait_s=1.0, max_queued=10)
+    middleware = {"limiter": limiter, "shedder": shedder}
+    assert [admit(middleware) for _ in range(3)] == [503, 503, 503]
+    load[0] = (0, 0.0)
+    assert admit(middleware) == 200
+    assert admit(middleware) == 429
@@ -0,0 +1,72 @@
+"""
+Allocation check for the inference step, run in-process against a stub interpreter
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from batching import MicroBatcher
+from benchmarks.alloc_check import legacy_inference, peak_per_request, retained_per_request
+
+MAX_BYTES = 64 * 1024
+
+
+class StubInterpreter:
+    """A float32 TFLite interpreter whose tensors are NumPy arrays; invoke copies a pixel into every score"""
+
+    def __init__(self, batch_size=1, size=224, classes=38):
+        self.tensors = (
+            np.zeros((batch_size, size, size, 3), dtype=np.float32),
+            np.zeros((batch_size, classes), dtype=np.float32)
+        )
+
+    def _details(self, index):
+        tensor = self.tensors[index]
+        return [{"index": index, "shape": np.array(tensor.shape), "dtype": tensor.dtype, "quantization": (0.0, 0)}]
+
+    def get_input_details(self):
+        return self._details(0)
+
+    def get_output_details(self):
+        return self._details(1)
+
+    def tensor(self, index):
+        return lambda: self.tensors[index]
+
+    def set_tensor(self, index, value):
+        np.copyto(self.tensors[index], value)
+
+    def get_tensor(self, index):
+        return self.tensors[index].copy()
+
+    def invoke(self):
+        inputs, scores = self.tensors
+        scores[:] = inputs[:, 0, 0, :1]
+
+
+def stub_batcher():
+    interpreter = StubInterpreter()
+    pool = SimpleNamespace(
+        size=1, batch_sizes=(1,),
+        input_details=interpreter.get_input_details(), output_details=interpreter.get_output_details()
+    )
+    return MicroBatcher(pool, max_batch_size=1), interpreter
+
+
+def test_inference_step_writes_normalized_pixels_into_the_input_tensor():
+    batcher, interpreter = stub_batcher()
+    pixels = np.random.default_rng(0).integers(0, 256, (224, 224, 3), dtype=np.uint8)
+    scores = batcher._run_batch({1: interpreter}, [pixels])
+    np.testing.assert_allclose(interpreter.tensors[0][0], pixels / 255.0, rtol=1e-6)
+    np.testing.assert_allclose(scores, np.full((1, 38), pixels[0, 0, 0] / 255.0), rtol=1e-6)
+
+
+def test_inference_step_stays_below_the_allocation_threshold():
+    batcher, interpreter = stub_batcher()
+    pixels = np.random.default_rng(0).integers(0, 256, (224, 224, 3), dtype=np.uint8)
+    zero_copy = lambda: batcher._run_batch({1: interpreter}, [pixels])
+    assert peak_per_request(zero_copy) < MAX_BYTES
+    assert retained_per_request(zero_copy, 20) < 1024
+    # The copy-heavy step it replaced is well over the threshold
+    assert peak_per_request(lambda: legacy_inference(interpreter, pixels)) > 1024 * 1024
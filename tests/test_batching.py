@@ -0,0 +1,29 @@
+"""
+Tests for the micro-batcher's bucket sizes
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from batching import MicroBatcher, batch_buckets
+
+
+def test_default_buckets_are_powers_of_two_up_to_the_max():
+    assert batch_buckets(8) == [1, 2, 4, 8]
+    assert batch_buckets(6) == [1, 2, 4, 6]
+    assert batch_buckets(1) == [1]
+
+
+def test_configured_buckets_always_end_at_the_max():
+    assert batch_buckets(8, (1,)) == [1, 8]
+    assert batch_buckets(8, (4, 1, 4)) == [1, 4, 8]
+    assert batch_buckets(8, (0, 8, 16)) == [8]
+
+
+def test_batcher_needs_a_pool_with_buckets_up_to_its_max():
+    pool = SimpleNamespace(size=1, batch_sizes=(1, 4))
+    with pytest.raises(ValueError):
+        MicroBatcher(pool, max_batch_size=8)
+    with pytest.raises(ValueError):
+        MicroBatcher(SimpleNamespace(size=1, batch_sizes=None), max_batch_size=1)
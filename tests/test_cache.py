@@ -0,0 +1,58 @@
+"""
+Tests for PredictionCache: expiry, LRU eviction and model changes
+"""
+
+import pytest
+
+import cache
+from cache import PredictionCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A controllable time.monotonic for the cache module"""
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_ttl(clock):
+    predictions = PredictionCache(max_entries=4, ttl=10)
+    predictions.set_models(["m1"])
+    predictions.put(("m1", b"a"), "first")
+    clock[0] += 9
+    assert predictions.get(("m1", b"a")) == "first"
+    clock[0] += 2
+    assert predictions.get(("m1", b"a")) is None
+    assert predictions.stats()["entries"] == 0
+    assert (predictions.hits, predictions.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    predictions = PredictionCache(max_entries=2, ttl=60)
+    predictions.set_models(["m1"])
+    predictions.put(("m1", b"a"), "a")
+    predictions.put(("m1", b"b"), "b")
+    assert predictions.get(("m1", b"a")) == "a"  # b is now the least recently used
+    predictions.put(("m1", b"c"), "c")
+    assert predictions.get(("m1", b"b")) is None
+    assert predictions.get(("m1", b"a")) == "a"
+    assert predictions.get(("m1", b"c")) == "c"
+    assert predictions.evictions == 1
+
+
+def test_changing_models_drops_entries_from_models_no_longer_served(clock):
+    predictions = PredictionCache()
+    predictions.set_models(["m1", "m2"])
+    predictions.put(("m1", b"a"), "old")
+    predictions.put(("m2", b"a"), "kept")
+    predictions.set_models(["m2"])
+    assert predictions.get(("m1", b"a")) is None
+    assert predictions.get(("m2", b"a")) == "kept"
+
+
+def test_results_from_a_replaced_model_are_not_cached(clock):
+    predictions = PredictionCache()
+    predictions.set_models(["m2"])
+    predictions.put(("m1", b"a"), "stale")
+    assert predictions.stats()["entries"] == 0
@@ -0,0 +1,46 @@
+"""
+Tests for dataset: matching PlantVillage class folders to the served classes
+"""
+
+import pytest
+
+from dataset import class_indices, normalize_class_name
+
+CLASSES = ["Apple___Apple_scab", "Corn_(maize)___Common_rust_", "Tomato___Tomato_mosaic_virus"]
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("Apple___Apple_scab", "apple_apple_scab"),
+    ("Corn_(maize)___Common_rust_", "corn_(maize)_common_rust"),
+    ("corn_(maize) common rust", "corn_(maize)_common_rust"),
+    ("  Tomato _ Healthy__ ", "tomato_healthy"),
+])
+def test_normalize_class_name(name, expected):
+    assert normalize_class_name(name) == expected
+
+
+def make_folders(root, names):
+    for name in names:
+        (root / name).mkdir()
+    (root / "README.txt").write_text("not a class")
+
+
+def test_folders_map_to_served_indices_whatever_their_spelling(tmp_path):
+    make_folders(tmp_path, ["Tomato___Tomato_mosaic_virus", "apple___apple scab", "Corn_(maize)___Common_rust"])
+    assert class_indices(str(tmp_path), CLASSES) == {
+        "Corn_(maize)___Common_rust": 1,
+        "Tomato___Tomato_mosaic_virus": 2,
+        "apple___apple scab": 0,
+    }
+
+
+def test_unknown_folders_are_rejected(tmp_path):
+    make_folders(tmp_path, ["Apple___Apple_scab", "Banana___healthy"])
+    with pytest.raises(ValueError, match="Banana___healthy"):
+        class_indices(str(tmp_path), CLASSES)
+
+
+def test_two_folders_for_one_class_are_rejected(tmp_path):
+    make_folders(tmp_path, ["Apple___Apple_scab", "apple___apple_scab_"])
+    with pytest.raises(ValueError):
+        class_indices(str(tmp_path), CLASSES)
@@ -0,0 +1,55 @@
+"""
+Tests for postprocessing: top-k selection and confidence gating
+"""
+
+import numpy as np
+import pytest
+
+from postprocessing import Postprocessor, top_k
+
+
+def test_top_k_orders_each_row_most_confident_first():
+    scores = np.array([[0.1, 0.5, 0.3, 0.1], [0.6, 0.05, 0.15, 0.2]], dtype=np.float32)
+    classes, confidences = top_k(scores, 2)
+    assert classes.tolist() == [[1, 2], [0, 3]]
+    np.testing.assert_allclose(confidences, [[0.5, 0.3], [0.6, 0.2]])
+
+
+def test_top_k_caps_k_at_the_class_count():
+    classes, confidences = top_k(np.array([[0.2, 0.8]]), 5)
+    assert classes.tolist() == [[1, 0]]
+    np.testing.assert_allclose(confidences, [[0.8, 0.2]])
+
+
+def test_postprocessor_reorders_columns_into_served_order():
+    # The model lists the classes in reverse
+    postprocess = Postprocessor(k=1, columns=np.array([2, 1, 0]))
+    prediction = postprocess.one(np.array([0.1, 0.3, 0.6]))
+    assert prediction.top_class == 0
+    np.testing.assert_allclose(prediction.scores, [0.6, 0.3, 0.1])
+
+
+def test_postprocessor_drops_runners_up_below_min_confidence_but_keeps_the_top_class():
+    postprocess = Postprocessor(k=3, min_confidence=0.5)
+    confident, unsure = postprocess(np.array([[0.1, 0.2, 0.7], [0.3, 0.35, 0.35]]))
+    assert confident.classes.tolist() == [2]
+    assert len(unsure.classes) == 1
+    assert unsure.confidence == pytest.approx(0.35)
+
+
+def test_postprocessor_flags_low_top_confidence_as_uncertain():
+    postprocess = Postprocessor(k=1, uncertain_below=0.5)
+    confident, unsure = postprocess(np.array([[0.1, 0.1, 0.8], [0.4, 0.35, 0.25]]))
+    assert not confident.uncertain
+    assert unsure.uncertain
+
+
+def test_postprocessor_returns_read_only_arrays():
+    prediction = Postprocessor(k=2).one(np.array([0.2, 0.8]))
+    with pytest.raises(ValueError):
+        prediction.scores[0] = 1.0
+
+
+def test_postprocessor_rejects_k_below_one():
+    with pytest.raises(ValueError):
+        Postprocessor(k=0)
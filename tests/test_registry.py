@@ -0,0 +1,34 @@
+"""
+Tests for registry.label_columns: mapping a model's outputs onto the served classes
+"""
+
+import numpy as np
+import pytest
+
+from registry import label_columns
+
+SERVED = ["Apple___Apple_scab", "Corn_(maize)___Common_rust_", "Tomato___healthy"]
+
+
+def test_served_order_needs_no_reordering():
+    assert label_columns(SERVED, SERVED) is None
+
+
+def test_reversed_labels_map_each_served_class_to_its_output_column():
+    columns = label_columns(SERVED[::-1], SERVED)
+    np.testing.assert_array_equal(columns, [2, 1, 0])
+
+
+def test_labels_as_index_dict_are_read_in_output_order():
+    labels = {"0": SERVED[2], "1": SERVED[0], "2": SERVED[1]}
+    np.testing.assert_array_equal(label_columns(labels, SERVED), [1, 2, 0])
+
+
+def test_folder_style_names_match_after_normalization():
+    labels = ["tomato___healthy", "apple___apple scab", "Corn_(maize)___Common_rust"]
+    np.testing.assert_array_equal(label_columns(labels, SERVED), [1, 2, 0])
+
+
+def test_labels_that_do_not_list_the_served_classes_are_rejected():
+    with pytest.raises(ValueError):
+        label_columns(SERVED[:2] + ["Grape___healthy"], SERVED)
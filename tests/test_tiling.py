@@ -0,0 +1,68 @@
+"""
+Tests for tiling: overlapping strided tile views and field-level counts
+"""
+
+import numpy as np
+import pytest
+
+from tiling import axis_layout, field_counts, tile_views, working_size
+
+
+@pytest.fixture
+def pixels():
+    return np.random.default_rng(0).integers(0, 256, (500, 700, 3), dtype=np.uint8)
+
+
+def test_tiles_are_views_matching_the_crops_at_their_grid_positions(pixels):
+    tiles, grid = tile_views(pixels, (224, 224), overlap=0.25)
+    assert tiles.shape == (grid.rows, grid.cols, 224, 224, 3)
+    assert np.shares_memory(tiles, pixels)
+
+    (x0, y0), (step_x, step_y) = grid.origin, grid.stride
+    for row in range(grid.rows):
+        for col in range(grid.cols):
+            y, x = y0 + row * step_y, x0 + col * step_x
+            np.testing.assert_array_equal(tiles[row, col], pixels[y:y + 224, x:x + 224])
+
+
+def test_tiles_cover_the_image_and_overlap_by_at_least_the_requested_share(pixels):
+    tiles, grid = tile_views(pixels, (224, 224), overlap=0.25)
+    (x0, y0), (step_x, step_y) = grid.origin, grid.stride
+    assert step_x <= 168 and step_y <= 168
+    # Fewer than one pixel per tile is left uncovered at each end
+    assert x0 < grid.cols and 700 - (x0 + (grid.cols - 1) * step_x + 224) <= grid.cols
+    assert y0 < grid.rows and 500 - (y0 + (grid.rows - 1) * step_y + 224) <= grid.rows
+
+
+def test_image_the_size_of_one_tile_is_a_single_tile():
+    tiles, grid = tile_views(np.zeros((224, 224, 3), dtype=np.uint8), (224, 224))
+    assert (grid.rows, grid.cols) == (1, 1)
+
+
+def test_image_smaller_than_a_tile_or_bad_overlap_is_rejected(pixels):
+    with pytest.raises(ValueError):
+        tile_views(pixels[:100], (224, 224))
+    with pytest.raises(ValueError):
+        tile_views(pixels, (224, 224), overlap=1.0)
+
+
+def test_axis_layout_spreads_tiles_evenly():
+    assert axis_layout(224, 224, 168) == (0, 224, 1)
+    offset, step, count = axis_layout(1000, 224, 168)
+    assert count == 6 and step <= 168
+    assert offset + step * (count - 1) + 224 <= 1000
+
+
+def test_working_size_scales_down_to_max_pixels_but_keeps_one_tile():
+    width, height = working_size((4000, 3000), (224, 224), 1_200_000)
+    assert width * height <= 1_200_000 * 1.01
+    assert working_size((300, 100), (224, 224), 1_000_000) == (672, 224)
+
+
+def test_field_counts_leave_out_uncertain_tiles():
+    counts, mean_confidence = field_counts(
+        classes=[1, 1, 2, 0], confidences=[0.9, 0.7, 0.8, 0.3], uncertain=[False, False, False, True],
+        num_classes=3
+    )
+    assert counts.tolist() == [0, 2, 1]
+    np.testing.assert_allclose(mean_confidence, [0.0, 0.8, 0.8])
@@ -0,0 +1,47 @@
+"""
+Tests for test-time augmentation: augmented copies and score averaging
+"""
+
+import numpy as np
+import pytest
+
+# Imported under another name so pytest does not collect it as a test class
+from tta import TestTimeAugmenter as Augmenter, average_scores
+
+
+@pytest.fixture
+def pixels():
+    return np.random.default_rng(0).integers(0, 256, (32, 48, 3), dtype=np.uint8)
+
+
+def test_copies_follow_the_configured_transforms(pixels):
+    augmenter = Augmenter(angles=(-15, 15), zoom=1.15, flip=True)
+    assert len(augmenter) == 6
+    variants = augmenter.variants(pixels)
+    assert variants.shape == (6, 32, 48, 3)
+    assert variants.dtype == np.uint8
+
+
+def test_flip_copy_is_the_mirrored_image(pixels):
+    augmenter = Augmenter(angles=(), zoom=1.0, flip=True)
+    (flipped,) = augmenter.variants(pixels)
+    np.testing.assert_array_equal(flipped, pixels[:, ::-1])
+
+
+def test_zoom_copy_is_drawn_from_the_centre_of_the_image(pixels):
+    augmenter = Augmenter(angles=(), zoom=2.0, flip=False)
+    (zoomed,) = augmenter.variants(pixels)
+    source_rows, source_cols = np.divmod(augmenter.index_map(32, 48)[0], 48)
+    assert 7 <= source_rows.min() and source_rows.max() <= 24
+    assert 11 <= source_cols.min() and source_cols.max() <= 36
+    np.testing.assert_array_equal(zoomed[16, 24], pixels[16, 24])
+
+
+def test_index_maps_are_computed_once_per_size(pixels):
+    augmenter = Augmenter()
+    assert augmenter.index_map(32, 48) is augmenter.index_map(32, 48)
+
+
+def test_average_scores_weighs_the_original_like_each_copy():
+    averaged = average_scores([1.0, 0.0], [[0.0, 1.0], [0.5, 0.5]])
+    np.testing.assert_allclose(averaged, [0.5, 0.5])
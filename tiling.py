@@ -0,0 +1,84 @@
+"""
+Tiled inference for AgriVision Pro
+High-resolution field and drone photos cut into overlapping model-sized tiles as strided views
+"""
+
+import math
+from typing import NamedTuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class TileGrid(NamedTuple):
+    """Where the tiles of one image sit, in working-resolution pixels"""
+    rows: int
+    cols: int
+    origin: tuple  # (x, y) of the top-left tile
+    stride: tuple  # (x, y) step between neighbouring tiles
+    tile_size: tuple  # (width, height) of each tile
+
+
+def axis_layout(length, tile, max_stride):
+    """
+    (offset, step, count) for tiles of tile pixels along an axis of length
+    pixels, at most max_stride apart. The step is a whole number of pixels
+    so the tiles stay a strided view; the fewer than count pixels this
+    leaves uncovered are split between both ends.
+    """
+    if length <= tile:
+        return 0, tile, 1
+    count = math.ceil((length - tile) / max_stride) + 1
+    step = (length - tile) // (count - 1)
+    offset = (length - tile - step * (count - 1)) // 2
+    return offset, step, count
+
+
+def working_size(size, tile_size, max_pixels):
+    """
+    (width, height) to tile an image of the given size at: scaled down to
+    at most max_pixels, which bounds the decoded image's memory and the
+    tile count, and up if needed so both sides hold at least one tile.
+    """
+    width, height = size
+    tile_width, tile_height = tile_size
+    scale = min(1.0, math.sqrt(max_pixels / (width * height)))
+    scale = max(scale, tile_width / width, tile_height / height)
+    return max(tile_width, round(width * scale)), max(tile_height, round(height * scale))
+
+
+def tile_views(pixels, tile_size, overlap=0.25):
+    """
+    Cut (height, width, 3) pixels into tiles of tile_size overlapping their
+    neighbours by about overlap of a tile. Returns (tiles, grid), where
+    tiles is a (rows, cols, tile_height, tile_width, 3) view into pixels:
+    no tile is copied until it is written into the interpreter's input.
+    """
+    if not 0 <= overlap < 1:
+        raise ValueError("overlap must be in [0, 1)")
+    tile_width, tile_height = tile_size
+    height, width = pixels.shape[:2]
+    if width < tile_width or height < tile_height:
+        raise ValueError(f"Image is {width}x{height}, smaller than one {tile_width}x{tile_height} tile")
+
+    offset_x, step_x, cols = axis_layout(width, tile_width, max(1, round(tile_width * (1 - overlap))))
+    offset_y, step_y, rows = axis_layout(height, tile_height, max(1, round(tile_height * (1 - overlap))))
+
+    # (positions_y, positions_x, 3, tile_height, tile_width), then every step-th position
+    windows = sliding_window_view(pixels[offset_y:, offset_x:], (tile_height, tile_width), axis=(0, 1))
+    tiles = windows[::step_y, ::step_x][:rows, :cols].transpose(0, 1, 3, 4, 2)
+    return tiles, TileGrid(rows, cols, (offset_x, offset_y), (step_x, step_y), (tile_width, tile_height))
+
+
+def field_counts(classes, confidences, uncertain, num_classes):
+    """
+    Aggregate per-tile top classes into field-level counts. Uncertain tiles
+    (soil, sky, blur) are left out. Returns (tiles per class, mean
+    confidence per class), both of length num_classes.
+    """
+    confident = ~np.asarray(uncertain, dtype=bool)
+    kept = np.asarray(classes)[confident]
+    counts = np.bincount(kept, minlength=num_classes)
+    totals = np.bincount(kept, weights=np.asarray(confidences)[confident], minlength=num_classes)
+    mean_confidence = np.divide(totals, counts, out=np.zeros(num_classes), where=counts > 0)
+    return counts, mean_confidence
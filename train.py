@@ -0,0 +1,324 @@
+"""
+AgriVision Pro - Training
+The notebook's MobileNetV2 transfer-learning run as a repeatable script,
+fed by a tf.data pipeline instead of ImageDataGenerator.
+
+The pipeline decodes images in parallel with the server's decode_image,
+caches the resized uint8 images on disk after the first epoch, shuffles,
+augments each batch with a single resampling (flip, rotation and zoom,
+as in the notebook) and prefetches, so later epochs never touch a JPEG.
+Class indices follow config.DISEASE_CLASSES and the split is the
+notebook's 80/20 per class. Every epoch's wall time is printed and
+saved with the training history. With --shards it reads images packed
+by shards.py and skips decoding and caching altogether.
+
+Usage:
+    python train.py [--data-dir "dataset/plantvillage dataset/color"] [--epochs 10]
+        [--cache-dir .cache/tfdata] [--pipeline tfdata|legacy] [--output models/AgriVision_XAI_Model.h5]
+    python train.py --shards dataset/shards
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+import config
+from dataset import DATA_DIR, VALIDATION_SPLIT, class_indices, load_pixels, served_class_names, split_files
+from preprocessing import PIXEL_SCALE
+from shards import ShardReader
+
+IMG_SIZE = (224, 224)
+BATCH_SIZE = 32
+SHUFFLE_BUFFER = 4096  # Cached images shuffled per epoch
+
+
+def build_model(num_classes, weights='imagenet'):
+    """MobileNetV2 base (frozen) with the notebook's GAP -> Dense(128) -> Dropout -> softmax head"""
+    base_model = tf.keras.applications.MobileNetV2(
+        weights=weights,
+        include_top=False,
+        input_shape=IMG_SIZE + (3,)
+    )
+    base_model.trainable = False
+
+    x = tf.keras.layers.GlobalAveragePooling2D()(base_model.output)
+    x = tf.keras.layers.Dense(128, activation='relu')(x)
+    x = tf.keras.layers.Dropout(0.2)(x)
+    predictions = tf.keras.layers.Dense(num_classes, activation='softmax')(x)
+
+    model = tf.keras.models.Model(inputs=base_model.input, outputs=predictions)
+    model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+    return model
+
+
+def random_transforms(images, seed, rotation=20, zoom=0.2):
+    """
+    The notebook's augmentation (horizontal flip, rotation up to 20°, zoom
+    up to 20%) for a whole batch as one projective transform per image, so
+    each batch is resampled once instead of once per augmentation layer.
+    seed is a stateless [2] seed; edges are filled with the nearest pixel.
+    """
+    count = tf.shape(images)[0]
+    height = tf.cast(tf.shape(images)[1], tf.float32)
+    width = tf.cast(tf.shape(images)[2], tf.float32)
+
+    draws = tf.random.stateless_uniform((count, 3), seed=seed, minval=-1.0, maxval=1.0)
+    angle = draws[:, 0] * (rotation * math.pi / 180)
+    scale = 1.0 + draws[:, 1] * zoom
+    flip = tf.where(draws[:, 2] < 0, -1.0, 1.0)
+
+    # Output pixel -> input pixel: scale * rotate * flip about the image centre
+    cos, sin = tf.cos(angle) * scale, tf.sin(angle) * scale
+    cx, cy = (width - 1) / 2, (height - 1) / 2
+    a0, a1, b0, b1 = cos * flip, -sin, sin * flip, cos
+    zeros = tf.zeros_like(a0)
+    transforms = tf.stack([
+        a0, a1, cx - a0 * cx - a1 * cy,
+        b0, b1, cy - b0 * cx - b1 * cy,
+        zeros, zeros
+    ], axis=1)
+
+    return tf.raw_ops.ImageProjectiveTransformV3(
+        images=images, transforms=transforms, output_shape=tf.shape(images)[1:3],
+        fill_value=0.0, interpolation="BILINEAR", fill_mode="NEAREST"
+    )
+
+
+def make_dataset(items, num_classes, training, batch_size=BATCH_SIZE, cache_path=None, seed=0):
+    """
+    tf.data pipeline over (path, class index) items yielding
+    (float images in [0, 1], one-hot labels) batches.
+
+    Decoding runs in parallel and the resized uint8 images are cached, on
+    disk at cache_path or in memory when it is None, so only the first
+    epoch decodes. Training batches are shuffled and augmented per batch.
+    """
+    width, height = IMG_SIZE
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(items)) if training else np.arange(len(items))
+    paths = [items[i][0] for i in order]
+    labels = [items[i][1] for i in order]
+
+    def load(path, label):
+        pixels, _ = tf.numpy_function(
+            lambda p: load_pixels(p.decode(), IMG_SIZE), [path], [tf.uint8, tf.bool]
+        )
+        pixels.set_shape((height, width, 3))
+        return pixels, label
+
+    dataset = (
+        tf.data.Dataset.from_tensor_slices((paths, labels))
+        .map(load, num_parallel_calls=tf.data.AUTOTUNE)
+    )
+    dataset = dataset.cache(cache_path) if cache_path else dataset.cache()
+
+    if training:
+        dataset = dataset.shuffle(SHUFFLE_BUFFER, seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size, num_parallel_calls=tf.data.AUTOTUNE)
+
+    return augmented(dataset, num_classes, training, seed)
+
+
+def shard_dataset(reader, num_classes, training, batch_size=BATCH_SIZE, seed=0):
+    """
+    The same batches as make_dataset, read from a ShardReader (see
+    shards.py): images come pre-decoded from memory-mapped shards, so no
+    epoch decodes and no cache is needed.
+    """
+    width, height = reader.image_size
+    if (width, height) != IMG_SIZE:
+        raise ValueError(f"Shards hold {reader.image_size} images, training uses {IMG_SIZE}")
+
+    def read(indices):
+        return reader.read(indices), reader.labels[indices]
+
+    def load(indices):
+        pixels, labels = tf.numpy_function(read, [indices], [tf.uint8, tf.int64])
+        pixels.set_shape((None, height, width, 3))
+        labels.set_shape((None,))
+        return pixels, labels
+
+    dataset = tf.data.Dataset.range(len(reader))
+    if training:
+        dataset = dataset.shuffle(len(reader), seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size).map(load, num_parallel_calls=tf.data.AUTOTUNE)
+    return augmented(dataset, num_classes, training, seed)
+
+
+def augmented(dataset, num_classes, training, seed):
+    """Batches of uint8 pixels and class indices -> float images (augmented when training), one-hot labels"""
+
+    def prepare(pixels, label, augment_seed=None):
+        images = tf.cast(pixels, tf.float32) * PIXEL_SCALE
+        if augment_seed is not None:
+            images = random_transforms(images, augment_seed)
+        return images, tf.one_hot(label, num_classes)
+
+    if training:
+        # A fresh stateless seed per batch, different every epoch but reproducible from seed
+        seeds = tf.data.Dataset.random(seed, rerandomize_each_iteration=True).batch(2)
+        dataset = tf.data.Dataset.zip((dataset, seeds)).map(
+            lambda batch, augment_seed: prepare(*batch, augment_seed), num_parallel_calls=tf.data.AUTOTUNE
+        )
+    else:
+        dataset = dataset.map(prepare, num_parallel_calls=tf.data.AUTOTUNE)
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+class ServedLabels(tf.keras.utils.Sequence):
+    """A sparse-label DirectoryIterator with labels one-hot over every served class"""
+
+    def __init__(self, iterator, served_indices, num_classes):
+        super().__init__()
+        self.iterator = iterator
+        # Iterator label (position in its classes list) -> one-hot served class
+        self.one_hot = np.eye(num_classes, dtype=np.float32)[served_indices]
+
+    def __len__(self):
+        return len(self.iterator)
+
+    def __getitem__(self, index):
+        images, labels = self.iterator[index]
+        return images, self.one_hot[labels.astype(np.int64)]
+
+    def on_epoch_end(self):
+        self.iterator.on_epoch_end()
+
+
+def legacy_generators(data_dir, num_classes, batch_size=BATCH_SIZE):
+    """
+    The notebook's ImageDataGenerator pipeline, kept for timing comparisons,
+    with its labels mapped to DISEASE_CLASSES indices like the tf.data ones.
+    """
+    indices = class_indices(data_dir)
+    folders = sorted(indices, key=indices.get)
+    datagen = tf.keras.preprocessing.image.ImageDataGenerator(
+        rescale=1. / 255,
+        rotation_range=20,
+        zoom_range=0.2,
+        horizontal_flip=True,
+        validation_split=VALIDATION_SPLIT
+    )
+    options = dict(target_size=IMG_SIZE, batch_size=batch_size, class_mode='sparse', classes=folders)
+    served = [indices[folder] for folder in folders]
+    return tuple(
+        ServedLabels(datagen.flow_from_directory(data_dir, subset=subset, **options), served, num_classes)
+        for subset in ('training', 'validation')
+    )
+
+
+class EpochTimer(tf.keras.callbacks.Callback):
+    """Records and prints each epoch's wall time"""
+
+    def __init__(self):
+        super().__init__()
+        self.times = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._started = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.times.append(round(time.perf_counter() - self._started, 2))
+        print(f"Epoch {epoch + 1} wall time: {self.times[-1]:.2f} s")
+
+
+def items_digest(items, seed):
+    """
+    Digest of everything a cached subset depends on: the (path, class
+    index) items in the seed's order, each file's size and modification
+    time, and the image size. A different data directory, or files
+    added, removed, relabelled or rewritten, give a different cache file.
+    """
+    digest = hashlib.sha256(json.dumps([list(IMG_SIZE), seed]).encode())
+    for path, label in items:
+        stat = os.stat(path)
+        digest.update(f"{os.path.abspath(path)}\0{int(label)}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def datasets(args, num_classes):
+    """Training and validation inputs for the chosen pipeline"""
+    if args.pipeline == 'legacy':
+        return legacy_generators(args.data_dir, num_classes, args.batch_size)
+    if args.shards:
+        return (
+            shard_dataset(ShardReader(args.shards, 'training'), num_classes, True, args.batch_size, args.seed),
+            shard_dataset(ShardReader(args.shards, 'validation'), num_classes, False, args.batch_size, args.seed)
+        )
+
+    items = {subset: split_files(args.data_dir, subset) for subset in ('training', 'validation')}
+    cache = {}
+    for subset in ('training', 'validation'):
+        cache[subset] = None
+        if args.cache_dir:
+            os.makedirs(args.cache_dir, exist_ok=True)
+            # Keyed on the items, so a changed dataset never reads another's cached pixels
+            cache[subset] = os.path.join(
+                args.cache_dir, f"{subset}_{IMG_SIZE[0]}x{IMG_SIZE[1]}_{items_digest(items[subset], args.seed)}"
+            )
+
+    return (
+        make_dataset(items['training'], num_classes, True, args.batch_size, cache['training'], args.seed),
+        make_dataset(items['validation'], num_classes, False, args.batch_size, cache['validation'], args.seed)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the AgriVision MobileNetV2 classifier")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="PlantVillage class folders")
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--steps-per-epoch", type=int, help="Limit steps per epoch (for quick timing runs)")
+    parser.add_argument("--pipeline", default="tfdata", choices=["tfdata", "legacy"],
+                        help="tf.data pipeline, or the notebook's ImageDataGenerator for comparison")
+    parser.add_argument("--cache-dir", default=".cache/tfdata",
+                        help="On-disk cache of resized images, one per dataset version; empty string caches in memory")
+    parser.add_argument("--shards", help="Train from a shard directory packed by shards.py instead")
+    parser.add_argument("--weights", default="imagenet", help="Base model weights (imagenet or none)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=config.KERAS_MODEL_PATH, help="Trained .h5 model")
+    parser.add_argument("--history", help="Write per-epoch metrics and wall times here as JSON")
+    args = parser.parse_args()
+
+    tf.keras.utils.set_random_seed(args.seed)
+    class_names = served_class_names()
+    train_data, validation_data = datasets(args, len(class_names))
+
+    model = build_model(len(class_names), weights=None if args.weights == 'none' else args.weights)
+    timer = EpochTimer()
+    history = model.fit(
+        train_data,
+        validation_data=validation_data,
+        epochs=args.epochs,
+        steps_per_epoch=args.steps_per_epoch,
+        validation_steps=args.steps_per_epoch and max(1, args.steps_per_epoch // 4),
+        callbacks=[timer]
+    )
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    model.save(args.output)
+    print(f"✓ Saved {args.output}")
+
+    # Outputs are in DISEASE_CLASSES order; the label map says so explicitly for the model registry
+    labels_path = os.path.splitext(args.output)[0] + "_labels.json"
+    with open(labels_path, 'w') as f:
+        json.dump(class_names, f, indent=2)
+    print(f"✓ Wrote {labels_path}")
+
+    if args.history:
+        with open(args.history, 'w') as f:
+            json.dump({
+                "pipeline": args.pipeline,
+                "epoch_seconds": timer.times,
+                **{key: [round(float(v), 4) for v in values] for key, values in history.history.items()}
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Test-time augmentation for AgriVision Pro
+Flipped, rotated and zoomed copies of a low-confidence image, built with one vectorized gather
+"""
+
+import math
+
+import numpy as np
+
+
+class TestTimeAugmenter:
+    """
+    Builds augmented copies of a decoded image within the notebook's
+    training augmentation: a horizontal flip, rotations by each of angles
+    degrees, with and without the flip, and a centre zoom. Edges are
+    filled with the nearest pixel, as in training.
+
+    Every copy is a fixed pixel permutation for a given image size, so
+    the source index of each output pixel is computed once per size and
+    all copies come out of a single np.take.
+    """
+
+    def __init__(self, angles=(-15, 15), zoom=1.15, flip=True):
+        transforms = [(False, angle, 1.0) for angle in angles]
+        if flip:
+            transforms = [(True, 0, 1.0)] + transforms + [(True, angle, 1.0) for angle in angles]
+        if zoom and zoom != 1.0:
+            transforms.append((False, 0, zoom))
+        self.transforms = transforms  # (flip, degrees, zoom) per copy
+        self._maps = {}
+
+    def __len__(self):
+        return len(self.transforms)
+
+    def index_map(self, height, width):
+        """(copies, height * width) flat source pixel of each output pixel"""
+        key = (height, width)
+        if key not in self._maps:
+            ys, xs = np.mgrid[0:height, 0:width].astype(np.float32)
+            cy, cx = (height - 1) / 2, (width - 1) / 2
+            dy, dx = ys - cy, xs - cx
+
+            maps = np.empty((len(self.transforms), height * width), dtype=np.intp)
+            for i, (flip, degrees, zoom) in enumerate(self.transforms):
+                # Output pixel -> input pixel: undo the zoom and rotation about the centre, then mirror
+                cos, sin = math.cos(math.radians(degrees)), math.sin(math.radians(degrees))
+                source_x = (cos * dx + sin * dy) / zoom
+                source_y = (cos * dy - sin * dx) / zoom
+                if flip:
+                    source_x = -source_x
+                x = np.clip(np.rint(source_x + cx), 0, width - 1).astype(np.intp)
+                y = np.clip(np.rint(source_y + cy), 0, height - 1).astype(np.intp)
+                maps[i] = (y * width + x).ravel()
+            self._maps[key] = maps
+        return self._maps[key]
+
+    def variants(self, pixels):
+        """(copies, height, width, 3) uint8 augmented copies of (height, width, 3) pixels"""
+        height, width, channels = pixels.shape
+        maps = self.index_map(height, width)
+        flat = np.ascontiguousarray(pixels).reshape(-1, channels)
+        return np.take(flat, maps, axis=0).reshape(len(maps), height, width, channels)
+
+
+def average_scores(scores, variant_scores):
+    """Mean of an image's class scores and its copies' scores"""
+    return (np.asarray(scores) + np.sum(variant_scores, axis=0)) / (len(variant_scores) + 1)
@@ -0,0 +1,244 @@
+"""
+Upload helpers for AgriVision Pro
+Bounded, validated upload reads and unpacking of batch uploads and archives
+"""
+
+import io
+import tarfile
+import warnings
+import zipfile
+
+from PIL import Image
+from starlette.exceptions import HTTPException
+
+from responses import dumps
+
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+
+# Leading bytes of each image format PIL is allowed to open
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'JPEG'),
+    (b'\x89PNG\r\n\x1a\n', 'PNG'),
+    (b'GIF87a', 'GIF'),
+    (b'GIF89a', 'GIF'),
+    (b'BM', 'BMP'),
+    (b'II*\x00', 'TIFF'),
+    (b'MM\x00*', 'TIFF')
+)
+EXTENSION_FORMATS = {
+    'jpg': 'JPEG', 'jpeg': 'JPEG', 'png': 'PNG', 'gif': 'GIF',
+    'bmp': 'BMP', 'webp': 'WEBP', 'tif': 'TIFF', 'tiff': 'TIFF'
+}
+
+
+class UploadRejected(ValueError):
+    """An upload refused before decoding, with the HTTP status to answer it with"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def sniff_format(head):
+    """The image format named by a file's first bytes, or None if unrecognized"""
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'WEBP'
+    for signature, image_format in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return image_format
+    return None
+
+
+class UploadPolicy:
+    """
+    What an uploaded image must look like before it is decoded.
+
+    read() pulls an upload in chunk_size pieces and stops as soon as it
+    passes max_bytes, so an oversized upload never sits in memory whole.
+    The first chunk's magic bytes must name an allowed format (or, with
+    check_magic off, the filename must have an allowed extension). Once
+    read, the image header alone is parsed: its format must match and
+    width x height stay within max_pixels, which stops decompression
+    bombs before any pixel is decoded.
+    """
+
+    def __init__(self, max_bytes, allowed_extensions, max_pixels, check_magic=True, check_extension=True,
+                 chunk_size=64 * 1024):
+        self.max_bytes = max_bytes
+        self.allowed_extensions = allowed_extensions
+        self.allowed_formats = {
+            EXTENSION_FORMATS[extension] for extension in allowed_extensions if extension in EXTENSION_FORMATS
+        }
+        self.max_pixels = max_pixels
+        self.check_magic = check_magic
+        self.check_extension = check_extension
+        self.chunk_size = chunk_size
+
+    def _too_large(self):
+        return UploadRejected(f"File exceeds the {self.max_bytes // (1024 * 1024)} MB limit", 413)
+
+    def check_start(self, filename, head):
+        """Reject by magic bytes (or extension) from the first bytes of an upload"""
+        if self.check_magic:
+            if sniff_format(head) not in self.allowed_formats:
+                raise UploadRejected("Unsupported file type: not a recognized image", 415)
+        elif self.check_extension and not has_image_extension(filename or "", self.allowed_extensions):
+            raise UploadRejected(f"Unsupported file extension: {filename}", 415)
+
+    def check_header(self, contents):
+        """Parse only the image header; returns (format, (width, height))"""
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('error', Image.DecompressionBombWarning)
+                with Image.open(io.BytesIO(contents)) as image:
+                    image_format, size = image.format, image.size
+        except (Image.DecompressionBombError, Image.DecompressionBombWarning):
+            raise UploadRejected(f"Image exceeds the {self.max_pixels:,} pixel limit", 413)
+        except Exception:
+            raise UploadRejected("Cannot read image header")
+
+        if image_format not in self.allowed_formats:
+            raise UploadRejected(f"Unsupported image format: {image_format}", 415)
+        width, height = size
+        if width < 1 or height < 1:
+            raise UploadRejected("Image has no pixels")
+        if width * height > self.max_pixels:
+            raise UploadRejected(f"Image is {width}x{height}, over the {self.max_pixels:,} pixel limit", 413)
+        return image_format, size
+
+    def check(self, filename, contents):
+        """Validate an upload already in memory (an archive member); returns contents"""
+        if len(contents) > self.max_bytes:
+            raise self._too_large()
+        self.check_start(filename, contents[:16])
+        self.check_header(contents)
+        return contents
+
+    async def read(self, file):
+        """Read and validate an UploadFile, rejecting it as early as possible"""
+        if file.size is not None and file.size > self.max_bytes:
+            raise self._too_large()
+
+        chunks = []
+        total = 0
+        while True:
+            chunk = await file.read(self.chunk_size)
+            if not chunk:
+                break
+            if not chunks:
+                self.check_start(file.filename, chunk[:16])
+            total += len(chunk)
+            if total > self.max_bytes:
+                raise self._too_large()
+            chunks.append(chunk)
+
+        if not chunks:
+            raise UploadRejected("Empty file")
+        contents = b"".join(chunks)
+        self.check_header(contents)
+        return contents
+
+
+class RequestTooLarge(HTTPException):
+    """Raised into the app when a request body without Content-Length outgrows its limit"""
+
+    def __init__(self, limit):
+        super().__init__(413, f"Request body exceeds {limit // (1024 * 1024)} MB")
+
+
+class UploadLimit:
+    """
+    ASGI middleware capping request body size per path, before anything
+    is parsed or spooled. A Content-Length over the limit is answered
+    with 413 without reading the body; a body sent without one is counted
+    as it streams in and cut off with a 413 once it passes the limit.
+    on_reject(path), if given, is called for every rejected request.
+    """
+
+    def __init__(self, app, max_bytes, path_limits=None, on_reject=None):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_limits = path_limits or {}
+        self.on_reject = on_reject
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        limit = self.path_limits.get(path, self.max_bytes)
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > limit:
+            if self.on_reject is not None:
+                self.on_reject(path)
+            body = dumps({"success": False, "error": f"Request body exceeds {limit // (1024 * 1024)} MB"})
+            await send({
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                            (b"connection", b"close")]
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        received = 0
+
+        async def receive_limited():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    if self.on_reject is not None:
+                        self.on_reject(path)
+                    raise RequestTooLarge(limit)
+            return message
+
+        await self.app(scope, receive_limited, send)
+
+
+def is_archive(filename):
+    """Check whether an uploaded filename looks like a zip or tar archive"""
+    return (filename or "").lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def has_image_extension(filename, allowed_extensions):
+    """Check a filename against the allowed image extensions"""
+    return filename.rsplit('.', 1)[-1].lower() in allowed_extensions
+
+
+def iter_archive_images(filename, fileobj, allowed_extensions, max_images, max_member_bytes):
+    """
+    Yield (name, bytes) for every image inside a zip or tar archive.
+
+    The archive is read from a seekable file object one member at a time,
+    so only the image being yielded is held in memory. Directories, hidden
+    files and non-image members are skipped. Raises ValueError once more
+    than max_images images are found or an image is larger than
+    max_member_bytes, before reading that member.
+    """
+    count = 0
+
+    def accept(name, size):
+        nonlocal count
+        basename = name.rsplit('/', 1)[-1]
+        if not basename or basename.startswith('.') or not has_image_extension(basename, allowed_extensions):
+            return False
+        if count >= max_images:
+            raise ValueError(f"Archive contains more than {max_images} images")
+        if size > max_member_bytes:
+            raise ValueError(f"{name} exceeds the {max_member_bytes // (1024 * 1024)} MB limit")
+        count += 1
+        return True
+
+    if filename.lower().endswith('.zip'):
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and accept(info.filename, info.file_size):
+                    yield info.filename, archive.read(info)
+    else:
+        with tarfile.open(fileobj=fileobj, mode='r:*') as archive:
+            for member in archive:
+                if member.isfile() and accept(member.name, member.size):
+                    yield member.name, archive.extractfile(member).read()
@@ -25,6 +25,17 @@ def check_module(module_name, description):
         print(f"✗ MISSING {description}: {module_name}")
         return False
 
+def check_backend():
+    """Check that some TFLite interpreter backend can be imported"""
+    try:
+        from backends import load_backend
+        name, _ = load_backend("auto")
+        print(f"✓ TFLite Interpreter: {name}")
+        return True
+    except ImportError as e:
+        print(f"✗ MISSING TFLite Interpreter: {e}")
+        return False
+
 def main():
     print("=" * 60)
     print("AgriVision Pro - Setup Verification")
@@ -47,10 +58,11 @@ def main():
     print("-" * 60)
     all_good &= check_module("fastapi", "FastAPI")
     all_good &= check_module("uvicorn", "Uvicorn")
-    all_good &= check_module("tensorflow", "TensorFlow")
+    all_good &= check_backend()
+    check_module("tensorflow", "TensorFlow (optional, requirements-train.txt: training, export and Grad-CAM)")
     all_good &= check_module("PIL", "Pillow")
     all_good &= check_module("numpy", "NumPy")
-    all_good &= check_module("cv2", "OpenCV (optional)")
+    check_module("cv2", "OpenCV (optional, requirements-train.txt)")
     print()
 
     # Check model details
@@ -58,8 +70,8 @@ def main():
         print("🔍 Model Information:")
         print("-" * 60)
         try:
-            import tensorflow as tf
-            interpreter = tf.lite.Interpreter(model_path="models/agrivision_edge_model.tflite")
+            from backends import create_interpreter
+            interpreter = create_interpreter("models/agrivision_edge_model.tflite")
             interpreter.allocate_tensors()
             
             input_details = interpreter.get_input_details()